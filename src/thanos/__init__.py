@@ -1 +1,2 @@
-from ._version import __version__
\ No newline at end of file
+from ._version import __version__
+from .clock import Clock, SystemClock, VirtualClock, use_clock, sleep, now, monotonic
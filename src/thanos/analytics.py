@@ -0,0 +1,187 @@
+"""Aggregate statistics over many workflow runs.
+
+:func:`analyze` turns stage results in the row-per-stage schema of
+:mod:`thanos.store` into four tables:
+
+- ``overview``: runs, failed runs, time span and run throughput
+- ``stages``: per stage executions, error rate, throughput and latency percentiles
+- ``timeline``: the same per stage and time bucket, to spot warm-up and degradation
+- ``parameters``: the same per stage and testcase parameter value (rate, duration, ...)
+
+The source is grouped twice: by time bucket and stage, and by parameter
+combination and stage. Each group keeps its counts and sorted latencies,
+so every percentile of a group costs one sort however many are asked for.
+Runs share a handful of parameter combinations, so the stage and parameter
+tables merge those few groups instead of grouping every stage record
+again. Latencies are of executed (passed and failed) stages and their
+percentiles are nearest-rank, the same definition SLAs are judged on (see
+:mod:`thanos.percentiles`); the error rate is failed over executed stages.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import polars as pl
+
+from thanos.cache import TestRunResult
+from thanos.percentiles import LATENCY_STATUSES, nearest_rank_list
+from thanos.query import parameter_key
+from thanos.store import runs_to_frame
+
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def bucket_seconds(every: str) -> float:
+    """Length in seconds of a polars duration such as '500ms', '10s' or '1m'."""
+    parts = re.findall(r"(\d+)(ms|s|m|h|d)", every)
+    if not parts or "".join(f"{n}{unit}" for n, unit in parts) != every:
+        raise ValueError(f"Unsupported bucket '{every}', expected e.g. 500ms, 10s, 1m or 1h")
+    return sum(int(n) * _UNIT_SECONDS[unit] for n, unit in parts)
+
+
+def percentile_column(q: float) -> str:
+    return f"p{q * 100:g}_ms".replace(".", "_")
+
+
+def _partials(frame: pl.LazyFrame, keys: List[str]) -> pl.LazyFrame:
+    """Counts, time range and sorted latencies of executed stages per group of keys."""
+    status = pl.col("stage_status")
+    return frame.group_by(keys).agg(
+        (status == "PASSED").sum().alias("passed"),
+        (status == "FAILED").sum().alias("failed"),
+        (status == "SKIPPED").sum().alias("skipped"),
+        pl.col("start_time").min().alias("first_start"),
+        pl.col("end_time").max().alias("last_end"),
+        pl.col("latency_ms").drop_nulls().sort().alias("latencies"),
+    )
+
+
+def _merge(partials: pl.LazyFrame, keys: List[str]) -> pl.LazyFrame:
+    """Combine partial groups into coarser ones."""
+    return partials.group_by(keys).agg(
+        pl.col("passed", "failed", "skipped").sum(),
+        pl.col("first_start").min(),
+        pl.col("last_end").max(),
+        pl.col("latencies").flatten().sort(),
+    )
+
+
+def _finish(groups: pl.LazyFrame, percentiles: Sequence[float], seconds: Optional[float] = None) -> pl.LazyFrame:
+    """Rates and latency statistics of partial groups; throughput is per group time span unless seconds is given."""
+    executed = pl.col("passed") + pl.col("failed")
+    span = (pl.col("last_end") - pl.col("first_start")).dt.total_microseconds() / 1e6
+    latencies = pl.col("latencies")
+    return groups.with_columns(
+        executed.alias("executed"),
+        pl.when(executed > 0).then(pl.col("failed") / executed).otherwise(None).alias("error_rate"),
+        span.alias("span_s"),
+    ).with_columns(
+        (executed / seconds if seconds else pl.when(pl.col("span_s") > 0)
+         .then(executed / pl.col("span_s")).otherwise(None)).alias("throughput_per_s"),
+        latencies.list.mean().alias("mean_ms"),
+        *(nearest_rank_list(latencies, q).alias(percentile_column(q)) for q in percentiles),
+        latencies.list.last().alias("max_ms"),
+    ).drop("latencies", "first_start", "last_end", *(["span_s"] if seconds else []))
+
+
+def _parameter_values(frame: pl.LazyFrame, names: Optional[Sequence[str]]) -> Dict[str, Dict[str, str]]:
+    """parameter name -> {parameters JSON string -> value}, over the distinct JSON strings of the runs.
+
+    Runs share a handful of parameter combinations, so decoding the distinct
+    strings and mapping them is far cheaper than parsing JSON on every row.
+    """
+    values: Dict[str, Dict[str, str]] = {}
+    for text in frame.select(pl.col("parameters").unique()).collect()["parameters"].to_list():
+        for name, value in json.loads(text or "{}").items():
+            if names is None or name in names:
+                values.setdefault(name, {})[text] = parameter_key(value)
+    return dict(sorted(values.items()))
+
+
+@dataclass
+class RunAnalytics:
+    """The tables computed by :func:`analyze`."""
+    overview: pl.DataFrame
+    stages: pl.DataFrame
+    timeline: pl.DataFrame
+    parameters: pl.DataFrame
+    bucket: str
+
+    def to_dict(self) -> Dict[str, list]:
+        return {
+            "bucket": self.bucket,
+            "overview": self.overview.to_dicts(),
+            "stages": self.stages.to_dicts(),
+            "timeline": self.timeline.to_dicts(),
+            "parameters": self.parameters.to_dicts(),
+        }
+
+    def write_json(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2, default=str), encoding="utf-8")
+        return path
+
+
+def analyze(frame: pl.DataFrame | pl.LazyFrame, bucket: str = "1s",
+            percentiles: Sequence[float] = PERCENTILES, parameters: Optional[Sequence[str]] = None) -> RunAnalytics:
+    """Compute run analytics over stage results.
+
+    ``bucket`` is the width of the timeline buckets. ``parameters`` limits
+    the breakdown to these parameter names; by default every parameter
+    recorded in the runs is broken down.
+    """
+    seconds = bucket_seconds(bucket)
+    source = frame.lazy().select(
+        "run_id", "parameters", "overall_status", "stage", "stage_status", "start_time", "end_time",
+        pl.when(pl.col("stage_status").is_in(LATENCY_STATUSES)).then(pl.col("duration_ms")).alias("latency_ms"),
+    )
+    overview = source.select(
+        pl.col("run_id").n_unique().alias("runs"),
+        pl.col("run_id").filter(pl.col("overall_status") != "PASSED").n_unique().alias("failed_runs"),
+        pl.len().alias("stage_records"),
+        pl.col("start_time").min().alias("first_start"),
+        pl.col("end_time").max().alias("last_end"),
+    ).with_columns(
+        ((pl.col("last_end") - pl.col("first_start")).dt.total_microseconds() / 1e6).alias("span_s"),
+    ).with_columns(
+        pl.when(pl.col("runs") > 0).then(pl.col("failed_runs") / pl.col("runs")).otherwise(None)
+        .alias("failure_rate"),
+        pl.when(pl.col("span_s") > 0).then(pl.col("runs") / pl.col("span_s")).otherwise(None)
+        .alias("runs_per_s"),
+    )
+
+    timeline = _finish(
+        _partials(source.with_columns(pl.col("start_time").dt.truncate(bucket).alias("bucket")), ["bucket", "stage"]),
+        percentiles, seconds,
+    ).sort("bucket", "stage")
+    # Every other table merges these: runs share few parameter combinations, so there are few groups
+    combinations = _partials(source, ["parameters", "stage"])
+
+    overview, timeline, combinations = pl.collect_all([overview, timeline, combinations])
+    combinations = combinations.lazy()
+    stages = _finish(_merge(combinations, ["stage"]), percentiles).sort("stage")
+    breakdowns = [
+        combinations.with_columns(pl.lit(name).alias("parameter"),
+                                  pl.col("parameters").replace_strict(mapping, default=None).alias("value"))
+        .filter(pl.col("value").is_not_null())
+        .pipe(_merge, ["parameter", "value", "stage"])
+        for name, mapping in _parameter_values(combinations, parameters).items()
+    ]
+    if breakdowns:
+        by_parameter = _finish(pl.concat(breakdowns), percentiles).sort("parameter", "value", "stage")
+    else:
+        by_parameter = pl.LazyFrame(schema={"parameter": pl.String, "value": pl.String, "stage": pl.String})
+    stages, by_parameter = pl.collect_all([stages, by_parameter])
+    return RunAnalytics(overview=overview, stages=stages, timeline=timeline, parameters=by_parameter,
+                        bucket=bucket)
+
+
+def analyze_runs(runs: Iterable[TestRunResult], **options) -> RunAnalytics:
+    """:func:`analyze` over run results, e.g. the contents of a TestCache."""
+    return analyze(runs_to_frame(runs), **options)
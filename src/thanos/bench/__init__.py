@@ -0,0 +1,23 @@
+"""Benchmarks for the framework's own overhead and for test discovery."""
+
+from .framework import (
+    DAG_SHAPES,
+    bench_workflow,
+    bench_operations,
+    run_framework_benchmarks,
+    save_baseline,
+    compare_to_baseline,
+)
+from .discovery import generate_tree, bench_discoverer, run_discovery_benchmarks
+
+__all__ = [
+    'DAG_SHAPES',
+    'bench_workflow',
+    'bench_operations',
+    'run_framework_benchmarks',
+    'save_baseline',
+    'compare_to_baseline',
+    'generate_tree',
+    'bench_discoverer',
+    'run_discovery_benchmarks',
+]
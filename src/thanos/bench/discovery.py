@@ -0,0 +1,284 @@
+"""Benchmarks for test suite discovery over synthetic monorepo trees.
+
+Trees mirror the engine layout, ``engine/<region>/<app>/test_suite_*.py``,
+padded with decoy files (helpers, undecorated suites, non-Python files),
+deeply nested suites and excluded directories such as ``__pycache__`` and
+``.git``. Every discoverer is timed on its own and combined with the AST
+parser and the filters, once cold and then warm.
+
+"Cold" is the first pass over a tree. The tree was just written and is
+likely still cached. With ``drop_caches`` and a process that may write to
+``/proc/sys/vm/drop_caches`` (root on Linux) the OS page, dentry and inode
+caches are dropped before it. That flushes them for the whole host, so it is
+opt-in; the results record whether it happened in ``cold_cache_dropped``.
+"""
+
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from thanos.discovery import (
+    ASTTestSuiteParser,
+    DecoratorFilter,
+    FilteredFileDiscoverer,
+    GlobFileDiscoverer,
+    RegexFileDiscoverer,
+)
+from thanos.discovery.filters import MethodCountFilter
+from thanos.discovery.interfaces import FileDiscoverer, TestSuiteFilter, TestSuiteInfo
+
+REGIONS = ("ny", "ldn", "hk", "tk", "sg", "fra", "chi", "syd")
+
+SUITE_TEMPLATE = '''from testplan.testing.multitest import testsuite, testcase
+from thanos.testing.base_test_suite import TestSuiteTemplate
+
+
+@{decorator}
+class {class_name}(TestSuiteTemplate):
+    """Synthetic suite {index}"""
+{methods}
+'''
+
+METHOD_TEMPLATE = '''
+    @testcase
+    def test_case_{index}(self, env, result):
+        result.true(True)
+'''
+
+HELPER_TEMPLATE = '''import os
+
+
+class Helper{index}:
+    def value(self):
+        return os.getpid() + {index}
+'''
+
+# (discoverer, pattern) pairs. Only FilteredFileDiscoverer skips excluded directories,
+# so the others also count the suite copies under __pycache__ and .git
+DISCOVERERS: Dict[str, Callable[[], Tuple[FileDiscoverer, str]]] = {
+    "glob": lambda: (GlobFileDiscoverer(), "test_suite_*.py"),
+    "filtered": lambda: (FilteredFileDiscoverer(), "test_suite_*.py"),
+    "regex": lambda: (RegexFileDiscoverer(), r"^engine/[^/]+/[^/]+/(.+/)?test_suite_\d+\.py$"),
+}
+
+FILTERS: Dict[str, Callable[[], List[TestSuiteFilter]]] = {
+    "decorator": lambda: [DecoratorFilter({"testsuite"})],
+    "decorator+methods": lambda: [DecoratorFilter({"testsuite"}), MethodCountFilter(3)],
+}
+
+
+@dataclass
+class SyntheticTree:
+    """What generate_tree wrote, to check discovery results against."""
+    root: Path
+    total_files: int
+    suite_files: int
+    nested_suite_files: int
+    decoy_files: int
+    excluded_files: int
+
+
+@dataclass
+class DiscoveryBenchmarkResult:
+    """Timings for one discoverer / parser / filter combination on one tree.
+
+    ``files_per_sec`` is files in the tree walked per second and
+    ``suites_per_sec`` is suites yielded per second, both from the warm time.
+    """
+    case: str
+    tree_files: int
+    files: int
+    suites: int
+    cold_s: float
+    warm_s: float
+    files_per_sec: float
+    suites_per_sec: float
+    cold_cache_dropped: bool
+
+
+def _write(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def _suite_source(index: int, decorator: str, methods: int) -> str:
+    return SUITE_TEMPLATE.format(
+        decorator=decorator,
+        class_name=f"Suite{index}",
+        index=index,
+        methods="".join(METHOD_TEMPLATE.format(index=m) for m in range(methods)),
+    )
+
+
+def generate_tree(root: str | Path, files: int, apps_per_region: int = 25, max_depth: int = 6,
+                  seed: int = 0) -> SyntheticTree:
+    """Write a synthetic engine tree of about ``files`` files under root.
+
+    Roughly 60% are suite files (a tenth of them nested up to max_depth
+    directories below their app), 30% decoys next to them and 10% copies of
+    suite files inside excluded directories.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    apps = [root / "engine" / region / f"app{a:03d}" for region in REGIONS for a in range(apps_per_region)]
+    suite_count = int(files * 0.6)
+    decoy_count = int(files * 0.3)
+    excluded_count = files - suite_count - decoy_count
+    nested = 0
+
+    for index in range(suite_count):
+        app = apps[index % len(apps)]
+        if rng.random() < 0.1:
+            depth = rng.randint(1, max_depth)
+            app = app.joinpath(*(f"lvl{level}" for level in range(depth)))
+            nested += 1
+        _write(app / f"test_suite_{index}.py", _suite_source(index, "testsuite", rng.randint(1, 6)))
+
+    for index in range(decoy_count):
+        app = apps[index % len(apps)]
+        kind = index % 5
+        if kind == 0:
+            _write(app / f"helpers_{index}.py", HELPER_TEMPLATE.format(index=index))
+        elif kind == 1:
+            # Matches the file pattern but holds no decorated suite
+            _write(app / f"test_suite_{suite_count + index}.py", HELPER_TEMPLATE.format(index=index))
+        elif kind == 2:
+            _write(app / f"test_suite_{index}.txt", "not python\n")
+        elif kind == 3:
+            _write(app / f"README_{index}.md", f"# App notes {index}\n")
+        else:
+            # A suite with a decorator the filters do not select
+            _write(app / f"test_suite_{suite_count + index}.py", _suite_source(index, "experimental_suite", 2))
+
+    for index in range(excluded_count):
+        app = apps[index % len(apps)]
+        excluded = app / ("__pycache__" if index % 2 else ".git/objects")
+        _write(excluded / f"test_suite_{index}.py", _suite_source(index, "testsuite", 3))
+
+    return SyntheticTree(root=root, total_files=files, suite_files=suite_count, nested_suite_files=nested,
+                         decoy_files=decoy_count, excluded_files=excluded_count)
+
+
+def drop_os_caches() -> bool:
+    """Ask the kernel to drop clean page, dentry and inode caches host-wide; False if not permitted."""
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def _parse(parser: ASTTestSuiteParser, files: List[Path]) -> List[TestSuiteInfo]:
+    suites = []
+    for file_path in files:
+        suites.extend(parser.parse(file_path))
+    return suites
+
+
+def _apply(filters: List[TestSuiteFilter], suites: List[TestSuiteInfo]) -> List[TestSuiteInfo]:
+    return [suite for suite in suites if all(f.matches(suite) for f in filters)]
+
+
+def bench_discoverer(name: str, tree: SyntheticTree, repeat: int = 3,
+                     drop_caches: bool = False) -> List[DiscoveryBenchmarkResult]:
+    """Time discovery alone, then plus parsing, then plus each filter set.
+
+    Each pass runs the full pipeline once so that the cold pass is a real
+    first contact with the tree; the per-phase times are then summed into
+    the cumulative cases.
+    """
+    discoverer, pattern = DISCOVERERS[name]()
+    parser = ASTTestSuiteParser()
+    filter_sets = {label: factory() for label, factory in FILTERS.items()}
+
+    passes: List[Dict[str, float]] = []
+    dropped = False
+    counts: Dict[str, Tuple[int, int]] = {}
+    for attempt in range(max(repeat, 1) + 1):
+        if attempt == 0 and drop_caches:
+            dropped = drop_os_caches()
+        phases = {}
+        start = time.perf_counter()
+        files = discoverer.discover_files(tree.root, pattern) or []
+        phases["discover"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        suites = _parse(parser, files)
+        phases["parse"] = time.perf_counter() - start
+        counts[name] = (len(files), 0)
+        counts[f"{name}+ast"] = (len(files), len(suites))
+
+        for label, filters in filter_sets.items():
+            start = time.perf_counter()
+            selected = _apply(filters, suites)
+            phases[label] = time.perf_counter() - start
+            counts[f"{name}+ast+{label}"] = (len(files), len(selected))
+        passes.append(phases)
+
+    def timings(*phase_names: str) -> Tuple[float, float]:
+        totals = [sum(p[phase] for phase in phase_names) for p in passes]
+        warm = statistics.median(totals[1:]) if len(totals) > 1 else totals[0]
+        return totals[0], warm
+
+    cases = {name: ("discover",), f"{name}+ast": ("discover", "parse")}
+    cases.update({f"{name}+ast+{label}": ("discover", "parse", label) for label in filter_sets})
+
+    results = []
+    for case, phase_names in cases.items():
+        cold, warm = timings(*phase_names)
+        files_found, suites_found = counts[case]
+        results.append(DiscoveryBenchmarkResult(
+            case=case,
+            tree_files=tree.total_files,
+            files=files_found,
+            suites=suites_found,
+            cold_s=cold,
+            warm_s=warm,
+            files_per_sec=tree.total_files / warm if warm else 0.0,
+            suites_per_sec=suites_found / warm if warm else 0.0,
+            cold_cache_dropped=dropped,
+        ))
+    return results
+
+
+def run_discovery_benchmarks(sizes: List[int], discoverers: Optional[List[str]] = None, repeat: int = 3,
+                             root: Optional[str | Path] = None, keep_tree: bool = False,
+                             drop_caches: bool = False, on_result: Optional[Callable] = None) -> dict:
+    """Generate a tree per size, benchmark every discoverer on it and return a JSON-serializable report."""
+    discoverers = discoverers or list(DISCOVERERS)
+    trees = []
+    results = []
+    for size in sizes:
+        tree_root = Path(root) / f"tree_{size}" if root else Path(tempfile.mkdtemp(prefix=f"thanos_discovery_{size}_"))
+        if tree_root.exists() and root:
+            shutil.rmtree(tree_root)
+        start = time.perf_counter()
+        tree = generate_tree(tree_root, size)
+        generate_s = time.perf_counter() - start
+        if on_result:
+            on_result(tree)
+        trees.append({**asdict(tree), "root": str(tree.root), "generate_s": generate_s})
+        try:
+            for name in discoverers:
+                for result in bench_discoverer(name, tree, repeat, drop_caches):
+                    results.append(result)
+                    if on_result:
+                        on_result(result)
+        finally:
+            if not keep_tree:
+                shutil.rmtree(tree_root, ignore_errors=True)
+
+    return {
+        "python": sys.version.split()[0],
+        "trees": trees,
+        "discovery": [asdict(result) for result in results],
+    }
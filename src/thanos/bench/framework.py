@@ -0,0 +1,260 @@
+"""Overhead benchmarks for the workflow execution engine.
+
+Workflows of no-op stages are run over synthetic DAG shapes so that all of
+the measured time is spent in the framework itself: ``WorkflowRunner``
+scheduling, ``TestStage.run``, ``TestCache`` inserts and the reporting done
+along the way. Console output is discarded while measuring.
+"""
+
+import gc
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from thanos.cache import TestCache, TestRunResult
+from thanos.stage import TestStage
+from thanos.workflow import WorkflowRunner
+
+# Upper bound on stage executions per case, so 10k-node DAGs stay quick
+STAGE_BUDGET = 5_000
+
+
+def noop_action(context):
+    """Stage action that does nothing, isolating framework overhead."""
+    return None
+
+
+def chain_dag(nodes: int) -> Dict[str, List[str]]:
+    """s0 -> s1 -> ... -> sN-1"""
+    return {f"s{i}": ([f"s{i - 1}"] if i else []) for i in range(nodes)}
+
+
+def fanout_dag(nodes: int) -> Dict[str, List[str]]:
+    """One root with nodes-1 independent children."""
+    dag = {"s0": []}
+    dag.update({f"s{i}": ["s0"] for i in range(1, nodes)})
+    return dag
+
+
+def diamond_dag(nodes: int) -> Dict[str, List[str]]:
+    """A root fanning out to nodes-2 stages that all join into one sink."""
+    if nodes < 3:
+        return chain_dag(nodes)
+    middle = [f"s{i}" for i in range(1, nodes - 1)]
+    dag = {"s0": []}
+    dag.update({name: ["s0"] for name in middle})
+    dag[f"s{nodes - 1}"] = middle
+    return dag
+
+
+DAG_SHAPES: Dict[str, Callable[[int], Dict[str, List[str]]]] = {
+    "chain": chain_dag,
+    "fanout": fanout_dag,
+    "diamond": diamond_dag,
+}
+
+
+@dataclass
+class WorkflowBenchmarkResult:
+    """Measurements for one DAG shape and size."""
+    case: str
+    shape: str
+    nodes: int
+    runs: int
+    total_s: float
+    runs_per_sec: float
+    per_stage_overhead_us: float
+    alloc_peak_kb: float
+    retained_blocks_per_run: float
+    peak_rss_mb: float
+
+
+@dataclass
+class OperationBenchmarkResult:
+    """Per-call cost of a single framework operation."""
+    case: str
+    calls: int
+    per_call_us: float
+
+
+@contextmanager
+def quiet() -> Iterator[None]:
+    """Discard everything written to stdout/stderr inside the block."""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+        yield
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_runner(dag: Dict[str, List[str]]) -> WorkflowRunner:
+    runner = WorkflowRunner(cache=TestCache())
+    load_stages(runner, dag)
+    return runner
+
+
+def load_stages(runner: WorkflowRunner, dag: Dict[str, List[str]]):
+    runner.clear_stages()
+    for name, dependencies in dag.items():
+        runner.add_stage(TestStage(name=name, action=noop_action, dependencies=dependencies))
+
+
+def bench_workflow(shape: str, nodes: int, runs: int) -> WorkflowBenchmarkResult:
+    """Time complete workflow executions of a synthetic DAG."""
+    dag = DAG_SHAPES[shape](nodes)
+    runs = max(1, min(runs, STAGE_BUDGET // nodes))
+
+    with quiet():
+        runner = build_runner(dag)
+        # Warm-up run outside the measurement
+        runner.execute_workflow()
+        load_stages(runner, dag)
+
+        gc.collect()
+        blocks_before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        for _ in range(runs):
+            load_stages(runner, dag)
+            runner.execute_workflow()
+        total_s = time.perf_counter() - start
+        retained_blocks = (sys.getallocatedblocks() - blocks_before) / runs
+
+        tracemalloc.start()
+        load_stages(runner, dag)
+        runner.execute_workflow()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return WorkflowBenchmarkResult(
+        case=f"{shape}-{nodes}",
+        shape=shape,
+        nodes=nodes,
+        runs=runs,
+        total_s=total_s,
+        runs_per_sec=runs / total_s,
+        per_stage_overhead_us=total_s / (runs * nodes) * 1e6,
+        alloc_peak_kb=traced_peak / 1024,
+        retained_blocks_per_run=retained_blocks,
+        peak_rss_mb=peak_rss_mb(),
+    )
+
+
+def _time_calls(case: str, calls: int, func: Callable[[int], None]) -> OperationBenchmarkResult:
+    with quiet():
+        func(0)
+        start = time.perf_counter()
+        for i in range(calls):
+            func(i)
+        elapsed = time.perf_counter() - start
+    return OperationBenchmarkResult(case=case, calls=calls, per_call_us=elapsed / calls * 1e6)
+
+
+def bench_operations(calls: int = 2_000) -> List[OperationBenchmarkResult]:
+    """Per-call cost of the individual building blocks of a workflow run."""
+    from datetime import datetime
+
+    results = []
+
+    stage = TestStage(name="noop", action=noop_action, dependencies=[])
+    results.append(_time_calls("TestStage.run", calls, lambda i: stage.run({})))
+
+    cache = TestCache()
+    results.append(_time_calls(
+        "TestCache.add_run_result", calls,
+        lambda i: cache.add_run_result(TestRunResult(run_id=str(i), timestamp=datetime.now(), overall_status="PASSED"))
+    ))
+
+    template_result = _bench_template(calls // 10 or 1)
+    if template_result is not None:
+        results.append(template_result)
+    return results
+
+
+def _bench_template(calls: int) -> Optional[OperationBenchmarkResult]:
+    """Cost of TestSuiteTemplate.execute_workflow_test around a 4-stage no-op workflow."""
+    try:
+        from testplan.testing.result import Result
+    except ImportError:
+        return None
+
+    from thanos.testing.base_test_suite import TestSuiteTemplate, TestConfiguration, StageDefinition
+
+    class NoopSuite(TestSuiteTemplate):
+        def get_stage_definitions(self):
+            return [StageDefinition(name=name, action=noop_action, dependencies=deps)
+                    for name, deps in diamond_dag(4).items()]
+
+        def get_test_configuration(self):
+            return TestConfiguration(name="NoopWorkflow", tags=["bench"], parameters={"rate": (1,)})
+
+    suite = NoopSuite("bench")
+    with quiet():
+        suite.test_cache = TestCache()
+        suite.fixtures = None
+        suite.runner = suite.create_runner(suite.test_cache)
+    return _time_calls("TestSuiteTemplate.execute_workflow_test", calls,
+                       lambda i: suite.execute_workflow_test(None, Result(), rate=1))
+
+
+def run_framework_benchmarks(shapes: List[str], sizes: List[int], runs: int,
+                             on_result: Optional[Callable] = None) -> dict:
+    """Run all workflow and operation benchmarks and return a JSON-serializable report."""
+    workflows = []
+    for shape in shapes:
+        for nodes in sizes:
+            result = bench_workflow(shape, nodes, runs)
+            workflows.append(result)
+            if on_result:
+                on_result(result)
+
+    operations = bench_operations()
+    if on_result:
+        for result in operations:
+            on_result(result)
+
+    return {
+        "python": sys.version.split()[0],
+        "workflows": [asdict(result) for result in workflows],
+        "operations": [asdict(result) for result in operations],
+    }
+
+
+def save_baseline(report: dict, path: str | Path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def compare_to_baseline(report: dict, baseline_path: str | Path, tolerance: float = 0.2) -> List[str]:
+    """Return descriptions of metrics that got worse than the baseline by more than tolerance."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    checks = [
+        ("workflows", "per_stage_overhead_us"),
+        ("operations", "per_call_us"),
+        ("discovery", "warm_s"),
+    ]
+    for section, metric in checks:
+        previous = {entry["case"]: entry for entry in baseline.get(section, [])}
+        for entry in report.get(section, []):
+            reference = previous.get(entry["case"])
+            if not reference or not reference[metric]:
+                continue
+            change = entry[metric] / reference[metric] - 1
+            if change > tolerance:
+                regressions.append(
+                    f"{entry['case']} {metric}: {reference[metric]:.2f} -> {entry[metric]:.2f} (+{change:.0%})"
+                )
+    return regressions
@@ -0,0 +1,176 @@
+"""Content-addressed storage for large stage results.
+
+Stage results over a size threshold are serialized once into a local blob
+store, keyed by the SHA-256 of their serialized bytes, and replaced in run
+results by a :class:`BlobRef` of a few hundred bytes. Identical results
+(the same response body fetched by thousands of runs) are stored once.
+
+Bytes and strings are stored as they are; anything else is pickled. Blobs
+are zlib-compressed when that saves at least ``min_saving`` of their size,
+and uncompressed blobs can be read through ``mmap`` without copying.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+KINDS = ("bytes", "str", "pickle")
+CODECS = ("raw", "zlib")
+
+_PREVIEW_CHARS = 80
+
+
+@dataclass(frozen=True)
+class BlobRef:
+    """Handle to a stage result spilled to a BlobStore."""
+    digest: str
+    size: int           # serialized size in bytes
+    stored_size: int    # size on disk, after compression
+    kind: str
+    codec: str
+    root: str
+    preview: str = ""
+
+    def load(self) -> Any:
+        """The original value, read back from the store."""
+        return BlobStore(self.root).get(self)
+
+    def __repr__(self) -> str:
+        return f"<blob {self.digest[:12]} {_format_size(self.size)} {self.kind}: {self.preview}>"
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024 or unit == "MiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _serialize(value: Any) -> Optional[Tuple[str, bytes]]:
+    """(kind, bytes) of a value, or None if it cannot be serialized."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "bytes", bytes(value)
+    if isinstance(value, str):
+        return "str", value.encode("utf-8")
+    try:
+        return "pickle", pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+
+def _deserialize(kind: str, data) -> Any:
+    if kind == "bytes":
+        return bytes(data)
+    if kind == "str":
+        return bytes(data).decode("utf-8")
+    return pickle.loads(data)
+
+
+def _preview(value: Any) -> str:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        text = repr(bytes(value[:_PREVIEW_CHARS // 4]))
+    elif isinstance(value, str):
+        text = repr(value[:_PREVIEW_CHARS])
+    else:
+        text = f"{type(value).__name__}"
+        if hasattr(value, "__len__"):
+            text += f" of {len(value)}"
+    return text if len(text) <= _PREVIEW_CHARS else text[:_PREVIEW_CHARS - 1] + "…"
+
+
+class BlobStore:
+    """A directory of immutable blobs named by the hash of their content.
+
+    Blobs live at ``<root>/<first two hex digits>/<rest of the digest>``, with
+    a ``.z`` suffix when compressed. Writes go to a temporary file that is
+    renamed into place, so concurrent writers of the same blob are harmless.
+    """
+
+    def __init__(self, root: str, threshold: int = 64 * 1024, compress: bool = True, level: int = 1,
+                 min_saving: float = 0.1):
+        self.root = Path(root)
+        self.threshold = threshold
+        self.compress = compress
+        self.level = level
+        self.min_saving = min_saving
+        self._known: Dict[str, BlobRef] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str, codec: str) -> Path:
+        return self.root / digest[:2] / (digest[2:] + (".z" if codec == "zlib" else ""))
+
+    def put(self, value: Any) -> BlobRef:
+        """Store a value regardless of its size."""
+        serialized = _serialize(value)
+        if serialized is None:
+            raise TypeError(f"Cannot serialize {type(value).__name__} into a blob")
+        return self._put(value, *serialized)
+
+    def _put(self, value: Any, kind: str, data: bytes) -> BlobRef:
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            known = self._known.get(digest)
+        if known is not None:
+            return known
+
+        codec, stored = "raw", data
+        if self.compress:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) <= len(data) * (1 - self.min_saving):
+                codec, stored = "zlib", compressed
+        path = self._path(digest, codec)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(partial, "wb") as f:
+                f.write(stored)
+            os.replace(partial, path)
+
+        ref = BlobRef(digest=digest, size=len(data), stored_size=len(stored), kind=kind, codec=codec,
+                      root=str(self.root), preview=_preview(value))
+        with self._lock:
+            self._known[digest] = ref
+        return ref
+
+    def spill(self, value: Any) -> Any:
+        """A BlobRef for values serializing to more than ``threshold`` bytes, else the value itself."""
+        if value is None or isinstance(value, (bool, int, float, BlobRef)):
+            return value
+        # Cheap checks first: bytes-likes know their size, and UTF-8 takes at most 4 bytes a character
+        if isinstance(value, (bytes, bytearray)) and len(value) <= self.threshold:
+            return value
+        if isinstance(value, memoryview) and value.nbytes <= self.threshold:
+            return value
+        if isinstance(value, str) and len(value) * 4 <= self.threshold:
+            return value
+        serialized = _serialize(value)
+        if serialized is None or len(serialized[1]) <= self.threshold:
+            return value
+        return self._put(value, *serialized)
+
+    def open(self, ref: BlobRef) -> memoryview:
+        """The serialized bytes of a blob; a read-only view of an mmap when it is uncompressed."""
+        path = self._path(ref.digest, ref.codec)
+        if ref.codec == "zlib":
+            return memoryview(zlib.decompress(path.read_bytes()))
+        if ref.size == 0:
+            return memoryview(b"")
+        with open(path, "rb") as f:
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def get(self, ref: BlobRef) -> Any:
+        """The value a BlobRef stands for."""
+        return _deserialize(ref.kind, self.open(ref))
+
+    def __contains__(self, ref: BlobRef) -> bool:
+        return self._path(ref.digest, ref.codec).exists()
+
+    def disk_usage(self) -> int:
+        """Bytes used by all blobs in the store"""
+        return sum(path.stat().st_size for path in self.root.glob("??/*") if not path.name.endswith(".tmp"))
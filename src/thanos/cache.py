@@ -1,8 +1,13 @@
-from dataclasses import dataclass, field
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass, field, replace
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from rich import print as rprint
 
+from thanos.query import RunIndex, RunQuery
+
 
 @dataclass
 class StageResult:
@@ -42,6 +47,184 @@ class TestCache:
         """Returns all cached results."""
         return list(self._cache.values())
 
+    def query(self, query: Optional[RunQuery] = None, **filters) -> List[TestRunResult]:
+        """Cached runs matching a RunQuery (or its fields as keyword arguments), newest first."""
+        query = query or RunQuery(**filters)
+        return query.finish(run for run in self._cache.values() if query.matches(run))
+
+    def update_status(self, run_id: str, status: str) -> bool:
+        """Sets the overall status of a cached run; returns False if the run is unknown."""
+        return self.transition_status(run_id, None, status)
+
+    def transition_status(self, run_id: str, expected: Optional[str], status: str) -> bool:
+        """Moves a run from ``expected`` (any status if None) to ``status``; returns whether it did."""
+        run_result = self._cache.get(run_id)
+        if run_result is None or (expected is not None and run_result.overall_status != expected):
+            return False
+        run_result.overall_status = status
+        return True
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
     def clear(self):
         """Clears the cache."""
         self._cache = {}
+
+
+class _Stripe:
+    """One lock's worth of a ConcurrentTestCache.
+
+    ``log`` is append-only: a run that is replaced gets a new entry, and
+    ``superseded`` maps the old entry's position to the new one, so snapshots
+    taken before the replacement keep seeing the old entry.
+    """
+
+    __slots__ = ("lock", "index", "log", "superseded", "postings")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # run id -> (log position, current result)
+        self.index: Dict[str, Tuple[int, TestRunResult]] = {}
+        # (sequence number, run result)
+        self.log: List[Tuple[int, TestRunResult]] = []
+        self.superseded: Dict[int, int] = {}
+        # Secondary indexes over the current runs of the stripe
+        self.postings = RunIndex()
+
+
+class CacheSnapshot:
+    """Point-in-time view of a ConcurrentTestCache.
+
+    Holds the stripe logs and their lengths when it was taken rather than a
+    copy of the results; iterating yields each run once, in insertion order,
+    with the status it had at that moment.
+    """
+
+    def __init__(self, stripes: List[Tuple[List[Tuple[int, TestRunResult]], Dict[int, int], int]]):
+        self._stripes = stripes
+
+    def _entries(self, stripe) -> Iterator[Tuple[int, TestRunResult]]:
+        log, superseded, length = stripe
+        for position in range(length):
+            if superseded.get(position, length) >= length:
+                yield log[position]
+
+    def __iter__(self) -> Iterator[TestRunResult]:
+        for _, run_result in heapq.merge(*(self._entries(stripe) for stripe in self._stripes),
+                                         key=lambda entry: entry[0]):
+            yield run_result
+
+    def __len__(self) -> int:
+        return sum(1 for stripe in self._stripes for _ in self._entries(stripe))
+
+
+class ConcurrentTestCache(TestCache):
+    """
+    A TestCache for many concurrent writers.
+
+    Runs are spread over ``stripes`` independently locked shards by run id,
+    so writers only contend when they hash to the same stripe, and every lock
+    is held for a dict update and a list append. Status changes replace the
+    stored result instead of mutating it, under the stripe lock, so
+    ``transition_status`` is an atomic compare-and-set and snapshots stay
+    consistent. Reads of a single run take no lock.
+    """
+    def __init__(self, stripes: int = 16, log_writes: bool = True):
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._sequence = itertools.count()
+        # The per-run console lines of TestCache; they serialize writers on stdout when enabled
+        self.log_writes = log_writes
+
+    def _stripe(self, run_id: str) -> _Stripe:
+        return self._stripes[hash(run_id) % len(self._stripes)]
+
+    def _store(self, stripe: _Stripe, run_result: TestRunResult):
+        # Caller holds stripe.lock
+        position = len(stripe.log)
+        stripe.log.append((next(self._sequence), run_result))
+        previous = stripe.index.get(run_result.run_id)
+        if previous is not None:
+            stripe.superseded[previous[0]] = position
+            stripe.postings.remove(previous[1])
+        stripe.index[run_result.run_id] = (position, run_result)
+        stripe.postings.add(run_result)
+
+    def add_run_result(self, run_result: TestRunResult):
+        """Adds a complete test run result to the cache."""
+        stripe = self._stripe(run_result.run_id)
+        with stripe.lock:
+            self._store(stripe, run_result)
+        self._announce(run_result)
+
+    def _announce(self, run_result: TestRunResult):
+        if self.log_writes:
+            rprint(f"Test run '{run_result.run_id}' added to cache with status '{run_result.overall_status}'.")
+            print(f"Test run '{run_result.run_id}' stored in cache.")
+
+    def get_run_result(self, run_id: str) -> TestRunResult | None:
+        """Retrieves a test run result from the cache."""
+        entry = self._stripe(run_id).index.get(run_id)
+        return entry[1] if entry is not None else None
+
+    def transition_status(self, run_id: str, expected: Optional[str], status: str) -> bool:
+        """Atomically moves a run from ``expected`` (any status if None) to ``status``."""
+        stripe = self._stripe(run_id)
+        with stripe.lock:
+            entry = stripe.index.get(run_id)
+            if entry is None:
+                return False
+            current = entry[1]
+            if expected is not None and current.overall_status != expected:
+                return False
+            self._store(stripe, replace(current, overall_status=status))
+        return True
+
+    def query(self, query: Optional[RunQuery] = None, **filters) -> List[TestRunResult]:
+        """Cached runs matching a RunQuery (or its fields as keyword arguments), newest first.
+
+        Each stripe narrows the query to the smallest of its posting sets before
+        checking runs, so the cost follows the number of candidates, not the cache size.
+        """
+        query = query or RunQuery(**filters)
+        matched = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                candidates = stripe.postings.candidates(query)
+                runs = ((stripe.index[run_id][1] for run_id in candidates) if candidates is not None
+                        else (entry[1] for entry in stripe.index.values()))
+                matched.extend(run for run in runs if query.matches(run))
+        return query.finish(matched)
+
+    def snapshot(self) -> CacheSnapshot:
+        """A consistent view of the cached runs that later writes do not affect."""
+        stripes = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                # Later replacements only add superseded entries pointing past this length
+                stripes.append((stripe.log, stripe.superseded, len(stripe.log)))
+        return CacheSnapshot(stripes)
+
+    def __iter__(self) -> Iterator[TestRunResult]:
+        return iter(self.snapshot())
+
+    def get_all_results(self) -> List[TestRunResult]:
+        """Returns all cached results."""
+        return list(self.snapshot())
+
+    def __len__(self) -> int:
+        return sum(len(stripe.index) for stripe in self._stripes)
+
+    def clear(self):
+        """Clears the cache; snapshots taken earlier keep their runs."""
+        for stripe in self._stripes:
+            with stripe.lock:
+                self._reset(stripe)
+
+    @staticmethod
+    def _reset(stripe: _Stripe):
+        # Caller holds stripe.lock
+        stripe.index, stripe.log, stripe.superseded = {}, [], {}
+        stripe.postings = RunIndex()
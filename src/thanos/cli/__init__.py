@@ -1,3 +1,4 @@
+import json
 import sys
 import click
 import questionary
@@ -29,31 +30,419 @@ def basic():
     """Basic testing commands"""
     pass
 
-@perf.command()
-@click.option('--engine', '-e', help='Engine type to use')
-@click.option('--interactive/--no-interactive', '-i/-n', default=True, help='Interactive mode')
-def run(engine, interactive):
-    """Run performance tests"""
+@main.group()
+def report():
+    """Report rendering commands"""
+    pass
+
+@main.group()
+def bench():
+    """Framework benchmark commands"""
+    pass
+
+@bench.command()
+@click.option('--shape', '-s', 'shapes', multiple=True, type=click.Choice(['chain', 'fanout', 'diamond']),
+              help='DAG shape to benchmark (repeatable, default: all)')
+@click.option('--nodes', '-N', 'sizes', multiple=True, type=click.IntRange(min=1),
+              help='Number of stages per DAG (repeatable, default: 10 100 1000 10000)')
+@click.option('--runs', '-r', default=20, show_default=True, type=click.IntRange(min=1),
+              help='Workflow runs per case (reduced automatically for large DAGs)')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write the results as JSON')
+@click.option('--save-baseline', type=click.Path(dir_okay=False), help='Store the results as a new baseline')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Fail if results regress against this baseline')
+@click.option('--tolerance', default=0.2, show_default=True, type=float, help='Allowed slowdown versus the baseline')
+def framework(shapes, sizes, runs, output, save_baseline, baseline, tolerance):
+    """Measure per-stage scheduling overhead of the workflow engine"""
+    from rich.table import Table
+    from thanos.bench import run_framework_benchmarks, compare_to_baseline, save_baseline as store_baseline
+    from thanos.bench.framework import WorkflowBenchmarkResult
+
+    console.print(Panel.fit("⏱️  Thanos Framework Benchmark", style="bold blue"))
+    workflow_table = Table(title="Workflow Execution")
+    for column in ("Case", "Runs", "Runs/s", "Overhead/stage (µs)", "Alloc peak (KiB)", "Retained blocks/run", "Peak RSS (MiB)"):
+        workflow_table.add_column(column, justify="right")
+    operation_table = Table(title="Operations")
+    for column in ("Operation", "Calls", "Per call (µs)"):
+        operation_table.add_column(column, justify="right")
+
+    def on_result(result):
+        if isinstance(result, WorkflowBenchmarkResult):
+            console.print(f"[dim]  {result.case}: {result.per_stage_overhead_us:.1f} µs/stage[/dim]")
+            workflow_table.add_row(result.case, str(result.runs), f"{result.runs_per_sec:.1f}",
+                                   f"{result.per_stage_overhead_us:.1f}", f"{result.alloc_peak_kb:.0f}",
+                                   f"{result.retained_blocks_per_run:.0f}", f"{result.peak_rss_mb:.1f}")
+        else:
+            operation_table.add_row(result.case, str(result.calls), f"{result.per_call_us:.2f}")
+
+    report = run_framework_benchmarks(list(shapes) or ['chain', 'fanout', 'diamond'],
+                                      list(sizes) or [10, 100, 1000, 10000], runs, on_result)
+    console.print(workflow_table)
+    console.print(operation_table)
+
+    if output:
+        store_baseline(report, output)
+    if save_baseline:
+        store_baseline(report, save_baseline)
+        console.print(f"[dim]Baseline saved to {save_baseline}[/dim]")
+    if baseline:
+        regressions = compare_to_baseline(report, baseline, tolerance)
+        if regressions:
+            for regression in regressions:
+                console.print(f"[red]📉 {regression}[/red]")
+            console.print(Panel.fit("❌ Performance regressed against baseline!", style="bold red"))
+            sys.exit(1)
+        console.print(Panel.fit("✅ No regressions against baseline", style="bold green"))
+
+@bench.command()
+@click.option('--files', '-f', 'sizes', multiple=True, type=click.IntRange(min=100),
+              help='Files per synthetic tree (repeatable, default: 10000 50000)')
+@click.option('--discoverer', '-d', 'discoverers', multiple=True, type=click.Choice(['glob', 'filtered', 'regex']),
+              help='Discoverer to benchmark (repeatable, default: all)')
+@click.option('--repeat', '-r', default=3, show_default=True, type=click.IntRange(min=1),
+              help='Warm passes per discoverer after the cold one')
+@click.option('--root', type=click.Path(file_okay=False), help='Generate trees here instead of a temporary directory')
+@click.option('--keep-tree', is_flag=True, help='Do not delete the generated trees')
+@click.option('--drop-caches/--no-drop-caches', default=False, show_default=True,
+              help='Drop the whole host\'s OS caches before the cold pass (needs root on Linux)')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write the results as JSON')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Fail if results regress against this baseline')
+@click.option('--tolerance', default=0.2, show_default=True, type=float, help='Allowed slowdown versus the baseline')
+def discovery(sizes, discoverers, repeat, root, keep_tree, drop_caches, output, baseline, tolerance):
+    """Measure test suite discovery over synthetic engine trees"""
+    from rich.table import Table
+    from thanos.bench import run_discovery_benchmarks, compare_to_baseline, save_baseline
+    from thanos.bench.discovery import SyntheticTree
+
+    console.print(Panel.fit("⏱️  Thanos Discovery Benchmark", style="bold blue"))
+    table = Table(title="Discovery")
+    table.add_column("Case", no_wrap=True)
+    for column in ("Tree files", "Files", "Suites", "Cold (s)", "Warm (s)", "Files/s", "Suites/s"):
+        table.add_column(column, justify="right")
+
+    def on_result(result):
+        if isinstance(result, SyntheticTree):
+            console.print(f"[dim]  Generated {result.total_files} files under {result.root}[/dim]")
+            return
+        table.add_row(result.case, str(result.tree_files), str(result.files), str(result.suites),
+                      f"{result.cold_s:.3f}", f"{result.warm_s:.3f}",
+                      f"{result.files_per_sec:,.0f}", f"{result.suites_per_sec:,.0f}")
+
+    report = run_discovery_benchmarks(list(sizes) or [10_000, 50_000], list(discoverers) or None, repeat,
+                                      root, keep_tree, drop_caches, on_result)
+    console.print(table)
+    if report["discovery"] and not report["discovery"][0]["cold_cache_dropped"]:
+        console.print("[yellow]OS caches could not be dropped; cold passes ran against a cached tree.[/yellow]")
+
+    if output:
+        save_baseline(report, output)
+    if baseline:
+        regressions = compare_to_baseline(report, baseline, tolerance)
+        if regressions:
+            for regression in regressions:
+                console.print(f"[red]📉 {regression}[/red]")
+            console.print(Panel.fit("❌ Discovery regressed against baseline!", style="bold red"))
+            sys.exit(1)
+        console.print(Panel.fit("✅ No regressions against baseline", style="bold green"))
+
+@main.command()
+@click.option('--store', '-s', required=True, type=click.Path(file_okay=False), help='Result store directory')
+@click.option('--baseline', '-b', help='Label of the baseline runs')
+@click.option('--candidate', '-c', help='Label of the candidate runs')
+@click.option('--suite', help='Only compare runs of this suite')
+@click.option('--stage', 'stages', multiple=True, help='Only compare these stages (repeatable)')
+@click.option('--method', '-m', default='mannwhitney', show_default=True, type=click.Choice(['mannwhitney', 'bootstrap']),
+              help='Significance test')
+@click.option('--alpha', default=0.05, show_default=True, type=click.FloatRange(0.0, 1.0, min_open=True, max_open=True),
+              help='Significance level')
+@click.option('--min-change', default=0.1, show_default=True, type=float,
+              help='Smallest relative change in median latency that counts as a regression')
+@click.option('--min-effect', default=0.147, show_default=True, type=float,
+              help="Smallest Cliff's delta that counts as a regression")
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write the comparison as JSON')
+@click.option('--list-labels', is_flag=True, help='List the labels in the store and exit')
+def compare(store, baseline, candidate, suite, stages, method, alpha, min_change, min_effect, output, list_labels):
+    """Detect statistically significant stage latency regressions between two labelled sets of runs"""
+    from rich.table import Table
+    from thanos.compare import compare_stage_latencies, comparisons_to_dicts
+    from thanos.store import ResultStore, RunSelector
+
+    result_store = ResultStore(store)
+    if list_labels:
+        labels = result_store.labels()
+        table = Table(title=f"Labels in {store}")
+        for column in ("Label", "Runs", "First run", "Last run"):
+            table.add_column(column)
+        for row in labels.iter_rows(named=True):
+            table.add_row(row["label"], str(row["runs"]), str(row["first_run"]), str(row["last_run"]))
+        console.print(table)
+        return
+    if not baseline or not candidate:
+        raise click.UsageError("--baseline and --candidate are required unless --list-labels is given")
+
+    console.print(Panel.fit(f"📐 Comparing '{candidate}' against baseline '{baseline}'", style="bold blue"))
+    baseline_runs = result_store.load(RunSelector(label=baseline, suite=suite))
+    candidate_runs = result_store.load(RunSelector(label=candidate, suite=suite))
+    for label, runs in ((baseline, baseline_runs), (candidate, candidate_runs)):
+        if runs.is_empty():
+            console.print(f"[red]No runs labelled '{label}' in {store}[/red]")
+            sys.exit(2)
+
+    comparisons = compare_stage_latencies(baseline_runs, candidate_runs, method=method, alpha=alpha,
+                                          min_effect=min_effect, min_relative_change=min_change,
+                                          stages=list(stages) or None)
+    table = Table(title="Stage latency")
+    table.add_column("Stage")
+    for column in ("n (base/cand)", "p50 base (ms)", "p50 cand (ms)", "p95 base (ms)", "p95 cand (ms)",
+                   "Change", "Cliff's δ", "p-value" if method == 'mannwhitney' else "CI", "Verdict"):
+        table.add_column(column, justify="right")
+    colors = {"regression": "red", "improvement": "green", "insufficient data": "yellow"}
+    for c in comparisons:
+        significance = f"{c.p_value:.3g}" if c.p_value is not None else (
+            f"[{c.ci_low:+.1%}, {c.ci_high:+.1%}]" if c.ci_low is not None else "-")
+        color = colors.get(c.verdict, "white")
+        table.add_row(c.stage, f"{c.baseline_n}/{c.candidate_n}", f"{c.baseline_p50_ms:.2f}", f"{c.candidate_p50_ms:.2f}",
+                      f"{c.baseline_p95_ms:.2f}", f"{c.candidate_p95_ms:.2f}", f"{c.relative_change:+.1%}",
+                      f"{c.cliffs_delta:+.2f}", significance, f"[{color}]{c.verdict}[/{color}]")
+    console.print(table)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({"baseline": baseline, "candidate": candidate, "method": method,
+                       "stages": comparisons_to_dicts(comparisons)}, f, indent=2)
+
+    if any(c.regressed for c in comparisons):
+        console.print(Panel.fit("❌ Latency regressions detected!", style="bold red"))
+        sys.exit(1)
+    console.print(Panel.fit("✅ No latency regressions", style="bold green"))
+
+@main.command()
+@click.option('--store', '-s', required=True, type=click.Path(file_okay=False), help='Result store directory')
+@click.option('--label', '-l', help='Only analyze runs with this label')
+@click.option('--suite', help='Only analyze runs of this suite')
+@click.option('--testcase', help='Only analyze runs of this testcase')
+@click.option('--since', type=click.DateTime(), help='Only analyze runs started at or after this time')
+@click.option('--until', type=click.DateTime(), help='Only analyze runs started before this time')
+@click.option('--bucket', default='1s', show_default=True, help='Width of the timeline buckets, e.g. 500ms, 10s, 1m')
+@click.option('--parameter', 'parameters', multiple=True,
+              help='Only break down these parameters (repeatable); defaults to all')
+@click.option('--timeline', 'show_timeline', is_flag=True, help='Also print the per-bucket timeline')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write all tables as JSON')
+def analyze(store, label, suite, testcase, since, until, bucket, parameters, show_timeline, output):
+    """Throughput, error rates and latency percentiles of stored runs, per stage, time bucket and parameter"""
+    from rich.table import Table
+    from thanos.analytics import analyze as analyze_runs, percentile_column, PERCENTILES
+    from thanos.query import RunQuery
+    from thanos.store import ResultStore
+
+    query = RunQuery(label=label, suite=suite, testcase=testcase, since=since, until=until)
+    try:
+        analytics = analyze_runs(ResultStore(store).scan_query(query), bucket=bucket,
+                                 parameters=list(parameters) or None)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--bucket')
+    overview = analytics.overview.row(0, named=True)
+    if not overview["runs"]:
+        console.print(f"[red]No matching runs in {store}[/red]")
+        sys.exit(2)
+
+    console.print(Panel.fit(
+        f"📊 {overview['runs']} runs, {overview['stage_records']} stage results over {overview['span_s']:.1f}s "
+        f"({overview['runs_per_s'] or 0:.1f} runs/s), {overview['failure_rate']:.2%} failed",
+        style="bold blue"))
+
+    def stat_table(title, frame, keys):
+        table = Table(title=title)
+        for key in keys:
+            table.add_column(key.capitalize())
+        columns = ["executed", "error_rate", "throughput_per_s", "mean_ms", *map(percentile_column, PERCENTILES),
+                   "max_ms"]
+        for column in columns:
+            header = {"executed": "Executed", "error_rate": "Error rate", "throughput_per_s": "Throughput/s",
+                      "mean_ms": "Mean (ms)"}.get(column, column.replace("_ms", " (ms)"))
+            table.add_column(header, justify="right")
+        for row in frame.iter_rows(named=True):
+            cells = [str(row[key]) for key in keys]
+            for column in columns:
+                value = row[column]
+                cells.append("-" if value is None else f"{value:.2%}" if column == "error_rate"
+                             else str(value) if column == "executed" else f"{value:.2f}")
+            table.add_row(*cells)
+        console.print(table)
+
+    stat_table("Stages", analytics.stages, ["stage"])
+    if not analytics.parameters.is_empty():
+        stat_table("By parameter", analytics.parameters, ["parameter", "value", "stage"])
+    if show_timeline:
+        stat_table(f"Timeline ({bucket} buckets)", analytics.timeline, ["bucket", "stage"])
+    if output:
+        console.print(f"[green]Analytics written to {analytics.write_json(output)}[/green]")
+
+@main.group()
+def distributed():
+    """Run workflows across worker processes on several nodes"""
+    pass
+
+@distributed.command()
+@click.option('--workers', '-w', default=0, show_default=True, type=click.IntRange(min=0),
+              help='Number of remote workers to wait for')
+@click.option('--runs', '-r', type=click.IntRange(min=1), help='Total workflow runs, split across the workers')
+@click.option('--duration', '-d', type=click.FloatRange(min=0.0, min_open=True),
+              help='Run for this many seconds on every worker instead of a fixed number of runs')
+@click.option('--workflow', default='standard_user_workflow', show_default=True, help='Registered workflow template')
+@click.option('--base-url', help='Run the HTTP user workflow against this service instead of a template')
+@click.option('--simulate', is_flag=True, help='Run workers on a virtual clock')
+@click.option('--host', default='0.0.0.0', show_default=True, help='Interface to listen on')
+@click.option('--port', default=7878, show_default=True, type=int, help='Port to listen on (0 picks a free port)')
+@click.option('--spawn-local', type=click.IntRange(min=1), help='Also start this many workers on this machine')
+@click.option('--concurrency', '-c', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Threads per spawned local worker')
+@click.option('--store', type=click.Path(file_okay=False), help='Append the collected runs to this result store')
+@click.option('--label', help='Label for the runs in the result store')
+def coordinator(workers, runs, duration, workflow, base_url, simulate, host, port, spawn_local, concurrency, store, label):
+    """Split workflow runs across workers and merge their results"""
+    from rich.table import Table
+    from thanos.distributed import Coordinator, DistributedJob, spawn_local_workers
+
+    if (runs is None) == (duration is None):
+        raise click.UsageError("Give exactly one of --runs and --duration")
+    if not workers and not spawn_local:
+        raise click.UsageError("Give --workers, --spawn-local or both")
+    job = DistributedJob(workflow=workflow, runs=runs, duration_s=duration, base_url=base_url, simulate=simulate)
+    console.print(Panel.fit("🌐 Thanos Distributed Run", style="bold blue"))
+    coord = Coordinator(job, expected_workers=workers + (spawn_local or 0), host=host, port=port)
+    local = spawn_local_workers(spawn_local, coord.port, concurrency) if spawn_local else []
+    try:
+        summary = coord.run()
+    finally:
+        for process in local:
+            process.wait()
+
+    table = Table(title="Workers")
+    for column in ("Worker", "Threads", "Runs", "Failed", "Elapsed (s)"):
+        table.add_column(column)
+    for worker in summary.workers:
+        table.add_row(worker.worker_id, str(worker.concurrency), str(worker.runs), str(worker.failed),
+                      f"{worker.elapsed_s:.2f}" if not worker.error else f"[red]{worker.error}[/red]")
+    console.print(table)
+
+    table = Table(title=f"Stage latency over {len(summary.runs)} runs ({summary.throughput:,.1f} runs/s)")
+    table.add_column("Stage", no_wrap=True)
+    for column in ("Count", "Mean (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)"):
+        table.add_column(column, justify="right")
+    for stage, histogram in summary.histograms.items():
+        table.add_row(stage, str(histogram.count), f"{histogram.mean:.2f}", f"{histogram.percentile(50):.2f}",
+                      f"{histogram.percentile(95):.2f}", f"{histogram.percentile(99):.2f}", f"{histogram.max:.2f}")
+    console.print(table)
+
+    if store:
+        from thanos.store import ResultStore
+        path = ResultStore(store).append(summary.runs, label=label, suite=f"distributed:{workflow}")
+        console.print(f"[dim]Stored {len(summary.runs)} runs in {path}[/dim]")
+
+    if not summary.passed:
+        console.print(Panel.fit("❌ Distributed run had failures!", style="bold red"))
+        sys.exit(1)
+    console.print(Panel.fit("✅ Distributed run passed", style="bold green"))
+
+@distributed.command()
+@click.option('--connect', 'address', required=True, help='Coordinator address as host:port')
+@click.option('--concurrency', '-c', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Workflow runs executed concurrently by this worker')
+@click.option('--worker-id', help='Name reported to the coordinator (defaults to host-pid)')
+@click.option('--verbose', is_flag=True, help='Show per-stage output')
+def worker(address, concurrency, worker_id, verbose):
+    """Connect to a coordinator and execute its assignment"""
+    from thanos.distributed import run_worker
+
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        raise click.BadParameter("expected host:port", param_hint='--connect')
+    run_worker(host, int(port), concurrency, worker_id, verbose)
+
+@main.command('mock-server')
+@click.option('--host', default='127.0.0.1', show_default=True, help='Interface to bind')
+@click.option('--port', default=8080, show_default=True, type=int, help='Port to listen on (0 picks a free port)')
+@click.option('--latency', '-l', 'latencies', multiple=True,
+              help='Latency distribution in ms, optionally per endpoint, e.g. lognormal:median=5,sigma=0.5 '
+                   'or create_user=uniform:10,50 (repeatable)')
+@click.option('--error-rate', default=0.0, show_default=True, type=click.FloatRange(0.0, 1.0),
+              help='Fraction of workflow requests answered with HTTP 500')
+@click.option('--max-rps', type=click.FloatRange(min=0.0, min_open=True),
+              help='Throughput cap; excess requests are queued')
+def mock_server(host, port, latencies, error_rate, max_rps):
+    """Run the local mock service behind the standard user workflow"""
+    from thanos.mock import LatencyDistribution, MockServiceConfig, run_mock_server
+    from thanos.mock.server import ENDPOINTS
+
+    config = MockServiceConfig(host=host, port=port, error_rate=error_rate, max_rps=max_rps)
+    try:
+        for spec in latencies:
+            endpoint, sep, distribution = spec.partition('=')
+            if sep and ':' not in endpoint:
+                if endpoint not in ENDPOINTS:
+                    raise click.BadParameter(f"unknown endpoint '{endpoint}', expected one of {', '.join(ENDPOINTS)}",
+                                             param_hint='--latency')
+                config.endpoint_latency[endpoint] = LatencyDistribution.parse(distribution)
+            else:
+                config.latency = LatencyDistribution.parse(spec)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--latency')
+
+    run_mock_server(config)
+
+@main.command()
+@click.option('--engine', '-e', 'engines', multiple=True,
+              help='Only re-run suites of this engine package or glob pattern (repeatable)')
+@click.option('--interval', default=0.5, show_default=True, type=click.FloatRange(min=0.05),
+              help='Seconds between polls for changed files')
+@click.option('--parallel', '-p', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Number of engines to run concurrently')
+@click.option('--report-dir', type=click.Path(file_okay=False), help='Directory for engine logs')
+@click.option('--run-now', is_flag=True, help='Run the watched suites once before waiting for changes')
+def watch(engines, interval, parallel, report_dir, run_now):
+    """Re-run the engine suites affected by every saved change"""
+    from thanos.cli.watch import watch_engines
+
+    try:
+        watch_engines(list(engines), interval=interval, parallel=parallel, report_dir=report_dir, run_now=run_now)
+    except ValueError as e:
+        console.print(Panel.fit(f"💥 {e}", style="bold red"))
+        sys.exit(1)
+
+def _run_perf(engines, parallel, interactive, report_dir=None):
+    """Shared implementation of the perf run commands"""
     console.print(Panel.fit("🚀 Thanos Performance Test Runner", style="bold blue"))
     
-    if interactive:
-        engine = _prompt_for_engine() if not engine else engine
+    if interactive and not engines:
+        engines = (_prompt_for_engine(),)
     
     runner = TestRunner()
-    runner.run_performance_tests(engine)
+    if engines:
+        runner.run_engines(list(engines), parallel=parallel, report_dir=report_dir)
+    else:
+        runner.run_performance_tests(None)
+
+@perf.command()
+@click.option('--engine', '-e', 'engines', multiple=True,
+              help='Engine package or glob pattern, e.g. ny.* (repeatable)')
+@click.option('--parallel', '-p', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Number of engines to run concurrently')
+@click.option('--report-dir', type=click.Path(file_okay=False), help='Directory for the merged report and engine logs')
+@click.option('--interactive/--no-interactive', '-i/-n', default=True, help='Interactive mode')
+def run(engines, parallel, report_dir, interactive):
+    """Run performance tests"""
+    _run_perf(engines, parallel, interactive, report_dir)
 
 @performance.command()
-@click.option('--engine', '-e', help='Engine type to use')
+@click.option('--engine', '-e', 'engines', multiple=True,
+              help='Engine package or glob pattern, e.g. ny.* (repeatable)')
+@click.option('--parallel', '-p', default=1, show_default=True, type=click.IntRange(min=1),
+              help='Number of engines to run concurrently')
+@click.option('--report-dir', type=click.Path(file_okay=False), help='Directory for the merged report and engine logs')
 @click.option('--interactive/--no-interactive', '-i/-n', default=True, help='Interactive mode')
-def run_perf(engine, interactive):
+def run_perf(engines, parallel, report_dir, interactive):
     """Run performance tests"""
-    console.print(Panel.fit("🚀 Thanos Performance Test Runner", style="bold blue"))
-    
-    if interactive:
-        engine = _prompt_for_engine() if not engine else engine
-    
-    runner = TestRunner()
-    runner.run_performance_tests(engine)
+    _run_perf(engines, parallel, interactive, report_dir)
 
 @basic.command()
 @click.option('--engine', '-e', help='Engine type to use') 
@@ -68,14 +457,35 @@ def run_basic(engine, interactive):
     runner = TestRunner()
     runner.run_basic_tests(engine)
 
+@report.command()
+@click.argument('report_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', '-f', 'fmt', type=click.Choice(['pdf', 'html']), default='pdf', show_default=True,
+              help='Output document format')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Output file (defaults next to the report)')
+@click.option('--background/--foreground', '-b/-F', default=False, help='Render in a detached background process')
+def render(report_path, fmt, output, background):
+    """Render a serialized JSON report to PDF or HTML"""
+    from thanos.reporting import render_report, render_in_background
+
+    if background:
+        process = render_in_background(report_path, fmt, output)
+        console.print(f"[dim]Rendering {fmt.upper()} in background (pid {process.pid})[/dim]")
+        return
+
+    with console.status(f"Rendering {fmt.upper()} report..."):
+        output_path = render_report(report_path, fmt, output)
+    console.print(f"[bold green]📄 {fmt.upper()} generated at {output_path}[/bold green]")
+
 def _prompt_for_engine():
     """Interactive prompt for engine selection"""
-    engines = ["eu.app_one", "us.app_two", "asia.app_three"]
+    from thanos.cli.engines import discover_engines
+
+    engines = [engine.name for engine in discover_engines()]
     
     engine = questionary.select(
         "Select test engine:",
         choices=engines,
-        default="eu.app_one"
+        default="eu.app_one" if "eu.app_one" in engines else None
     ).ask()
     
     return engine
@@ -0,0 +1,238 @@
+"""Engine package resolution and parallel multi-engine execution."""
+
+import fnmatch
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from thanos.discovery import TestSuiteDiscovery, TestSuiteInfo
+from thanos.percentiles import LATENCY_STATUSES, nearest_rank
+from thanos.shared_cache import SHARED_CACHE_ENV, SharedTestCache
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+ENGINE_ROOT = PACKAGE_ROOT / "engine"
+ENGINE_SUITE_PATTERN = "test_suite_*.py"
+
+
+@dataclass
+class EngineInfo:
+    """An engine package under ``thanos/engine`` and the suites it contains."""
+    name: str
+    path: Path
+    suites: List[TestSuiteInfo] = field(default_factory=list)
+
+    def suite_refs(self) -> List[Tuple[str, str]]:
+        """Return picklable (module, class name) references for each suite."""
+        return [(_module_name(suite.file_path), suite.class_name) for suite in self.suites]
+
+
+@dataclass
+class EngineRunSummary:
+    """Aggregated outcome of one engine run, returned by a worker process."""
+    engine: str
+    passed: bool
+    wall_time_s: float
+    runs: int = 0
+    failed_runs: int = 0
+    stage_stats: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    log_path: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def throughput(self) -> float:
+        """Workflow runs completed per second of engine wall time."""
+        return self.runs / self.wall_time_s if self.wall_time_s > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["throughput"] = self.throughput
+        return data
+
+
+def _module_name(file_path: Path) -> str:
+    """Map a file inside the thanos package to its dotted module name."""
+    relative = Path(file_path).resolve().relative_to(PACKAGE_ROOT).with_suffix("")
+    return ".".join(("thanos",) + relative.parts)
+
+
+def discover_engines(root: Path = ENGINE_ROOT) -> List[EngineInfo]:
+    """Find every engine package (a directory holding test suites) below root."""
+    return group_engines(TestSuiteDiscovery().discover(root, ENGINE_SUITE_PATTERN), root)
+
+
+def group_engines(suites: Iterable[TestSuiteInfo], root: Path = ENGINE_ROOT) -> List[EngineInfo]:
+    """Group suites by the engine package they live in, sorted by engine name."""
+    engines: Dict[str, EngineInfo] = {}
+    for suite in suites:
+        package_dir = suite.file_path.parent
+        name = ".".join(package_dir.relative_to(root).parts)
+        engine = engines.setdefault(name, EngineInfo(name=name, path=package_dir))
+        engine.suites.append(suite)
+
+    for engine in engines.values():
+        engine.suites.sort(key=lambda s: (s.file_path.name, s.class_name))
+    return [engines[name] for name in sorted(engines)]
+
+
+def resolve_engines(patterns: List[str], root: Path = ENGINE_ROOT) -> List[EngineInfo]:
+    """Resolve engine names or glob patterns (e.g. ``ny.*``) to engine packages.
+
+    Engines are returned in the order their first matching pattern was given,
+    without duplicates. A pattern matching nothing raises ``ValueError``.
+    """
+    available = discover_engines(root)
+    resolved: Dict[str, EngineInfo] = {}
+    for pattern in patterns:
+        matches = [engine for engine in available if fnmatch.fnmatchcase(engine.name, pattern)]
+        if not matches:
+            names = ", ".join(engine.name for engine in available) or "none"
+            raise ValueError(f"No engine matches '{pattern}' (available: {names})")
+        for engine in matches:
+            resolved.setdefault(engine.name, engine)
+    return list(resolved.values())
+
+
+def summarize_runs(engine: str, run_results: list, wall_time_s: float, passed: bool) -> EngineRunSummary:
+    """Build per-stage latency statistics from a list of ``TestRunResult``.
+
+    Latencies are of executed stages (see :mod:`thanos.percentiles`); count
+    is the number of executions, skipped stages are only counted as such.
+    """
+    durations: Dict[str, List[float]] = {}
+    statuses: Dict[str, Dict[str, int]] = {}
+    for run in run_results:
+        for stage in run.stage_results:
+            values = durations.setdefault(stage.name, [])
+            if stage.status in LATENCY_STATUSES:
+                values.append(stage.duration_ms)
+            counts = statuses.setdefault(stage.name, {})
+            counts[stage.status] = counts.get(stage.status, 0) + 1
+
+    stage_stats = {}
+    for name, values in durations.items():
+        values.sort()
+        stage_stats[name] = {
+            "count": len(values),
+            "passed": statuses[name].get("PASSED", 0),
+            "failed": statuses[name].get("FAILED", 0),
+            "skipped": statuses[name].get("SKIPPED", 0),
+            "mean_ms": sum(values) / len(values) if values else 0.0,
+            "p50_ms": nearest_rank(values, 0.50) or 0.0,
+            "p95_ms": nearest_rank(values, 0.95) or 0.0,
+            "p99_ms": nearest_rank(values, 0.99) or 0.0,
+            "max_ms": values[-1] if values else 0.0,
+        }
+
+    return EngineRunSummary(
+        engine=engine,
+        passed=passed,
+        wall_time_s=wall_time_s,
+        runs=len(run_results),
+        failed_runs=sum(1 for run in run_results if run.overall_status != "PASSED"),
+        stage_stats=stage_stats,
+    )
+
+
+def _redirect_output(log_path: str):
+    """Point this process' stdout/stderr file descriptors at a log file."""
+    log_file = open(log_path, "w", buffering=1, encoding="utf-8")
+    os.dup2(log_file.fileno(), 1)
+    os.dup2(log_file.fileno(), 2)
+    return log_file
+
+
+def run_engine(engine: str, suite_refs: List[Tuple[str, str]], log_path: Optional[str] = None,
+               shared_cache_dir: Optional[str] = None) -> EngineRunSummary:
+    """Worker entry point: run all suites of one engine in a single test plan."""
+    log_file = _redirect_output(log_path) if log_path else None
+    if shared_cache_dir:
+        # Suites created below publish their runs to the parent's SharedTestCache
+        os.environ[SHARED_CACHE_ENV] = shared_cache_dir
+    start = time.perf_counter()
+    try:
+        from thanos.cli.runner import TestRunner
+
+        suites = []
+        for module_name, class_name in suite_refs:
+            suite_class = getattr(importlib.import_module(module_name), class_name)
+            suites.append(suite_class(name=class_name))
+
+        passed = TestRunner()._execute_plan(name=f"Engine {engine}", suites=suites, engine=engine)
+        run_results = []
+        for suite in suites:
+            cache = getattr(suite, "test_cache", None)
+            if cache is not None:
+                run_results.extend(cache.get_all_results())
+
+        summary = summarize_runs(engine, run_results, time.perf_counter() - start, passed)
+    except Exception as e:
+        summary = EngineRunSummary(
+            engine=engine,
+            passed=False,
+            wall_time_s=time.perf_counter() - start,
+            error=f"{type(e).__name__}: {e}",
+        )
+    finally:
+        if log_file:
+            log_file.flush()
+
+    summary.log_path = log_path
+    return summary
+
+
+def run_engines(engines: List[EngineInfo], parallel: int = 1, log_dir: Optional[Path] = None,
+                on_complete=None, shared_cache: Optional[SharedTestCache] = None,
+                start_method: str = "spawn", preload: Sequence[str] = ()) -> List[EngineRunSummary]:
+    """Run each engine's suites in its own worker process, ``parallel`` at a time.
+
+    Workers are started with the ``spawn`` method and retired after one engine,
+    so every engine gets a fresh interpreter with no state shared with the
+    parent or with other engines. With ``shared_cache``, workers publish
+    every run to it as they go and the parent drains it in the background
+    while the engines run, so results can be watched live.
+    Summaries are returned in the order the engines were given.
+
+    ``start_method="forkserver"`` forks workers from a server process that
+    has imported the ``preload`` modules once, which saves their import
+    time on every run. Only third-party modules should be preloaded: a
+    preloaded thanos module would not pick up edits to its source.
+    """
+    if log_dir is not None:
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+    context = get_context(start_method)
+    if preload:
+        context.set_forkserver_preload(list(preload))
+
+    summaries: Dict[str, EngineRunSummary] = {}
+    # Workers drop runs once their ring is full, so keep the rings drained while they publish
+    draining = shared_cache is not None and shared_cache.start_draining()
+    try:
+        with ProcessPoolExecutor(max_workers=parallel, mp_context=context, max_tasks_per_child=1) as pool:
+            futures = {}
+            for engine in engines:
+                log_path = str(log_dir / f"{engine.name}.log") if log_dir is not None else None
+                future = pool.submit(run_engine, engine.name, engine.suite_refs(), log_path,
+                                     str(shared_cache.directory) if shared_cache is not None else None)
+                futures[future] = engine.name
+
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    summary = EngineRunSummary(engine=name, passed=False, wall_time_s=0.0,
+                                               error=f"{type(e).__name__}: {e}")
+                summaries[name] = summary
+                if on_complete:
+                    on_complete(summary)
+    finally:
+        if draining:
+            shared_cache.stop_draining()
+
+    return [summaries[engine.name] for engine in engines]
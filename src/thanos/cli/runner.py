@@ -1,7 +1,11 @@
 import sys
 import os
-from typing import Optional
+import json
+import time
+from pathlib import Path
+from typing import List, Optional
 from rich.console import Console
+from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
 
@@ -16,6 +20,11 @@ class TestRunner:
     
     def __init__(self):
         self.console = console
+
+    @staticmethod
+    def report_path(name: str) -> str:
+        """Location of the serialized JSON report written for a test plan"""
+        return os.path.join(os.path.dirname(__file__), f"{name.lower().replace(' ', '_')}_report.json")
     
     def run_performance_tests(self, engine: Optional[str] = None):
         """Run performance tests with optional engine selection"""
@@ -63,14 +72,105 @@ class TestRunner:
                 engine=engine
             )
     
+    def run_engines(self, patterns: List[str], parallel: int = 1, report_dir: Optional[str] = None):
+        """Run the suites of every engine matching patterns in parallel worker processes"""
+        from thanos.cli.engines import resolve_engines, run_engines
+        from thanos.shared_cache import SharedTestCache
+
+        try:
+            engines = resolve_engines(patterns)
+        except ValueError as e:
+            console.print(Panel.fit(f"💥 {e}", style="bold red"))
+            sys.exit(1)
+
+        report_dir = Path(report_dir or os.path.join(os.path.dirname(__file__), "engine_runs"))
+        console.print(f"\n[bold green]Starting {len(engines)} engine(s) with parallelism {parallel}[/bold green]")
+        for engine in engines:
+            console.print(f"[dim]  {engine.name}: {', '.join(s.class_name for s in engine.suites)}[/dim]")
+
+        shared_cache = SharedTestCache()
+
+        def on_complete(summary):
+            icon = "✅" if summary.passed else "❌"
+            console.print(f"{icon} [cyan]{summary.engine}[/cyan] finished in {summary.wall_time_s:.1f}s "
+                          f"[dim]({len(shared_cache)} runs recorded across engines so far)[/dim]")
+
+        start = time.perf_counter()
+        with shared_cache:
+            summaries = run_engines(engines, parallel=parallel, log_dir=report_dir / "logs",
+                                    on_complete=on_complete, shared_cache=shared_cache)
+            if shared_cache.dropped:
+                console.print(f"[yellow]⚠️  {shared_cache.dropped} runs were not shared: "
+                              f"a worker's ring buffer was full[/yellow]")
+        wall_time_s = time.perf_counter() - start
+
+        self._report_engine_summaries(summaries, wall_time_s)
+        report_path = report_dir / "engine_report.json"
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "engines": [summary.to_dict() for summary in summaries],
+                "parallel": parallel,
+                "wall_time_s": wall_time_s,
+                "total_runs": sum(summary.runs for summary in summaries),
+            }, f, indent=2)
+        console.print(f"[dim]Merged report written to {report_path}[/dim]")
+
+        if all(summary.passed for summary in summaries):
+            console.print(Panel.fit("✅ All engines completed successfully!", style="bold green"))
+        else:
+            console.print(Panel.fit("❌ One or more engines failed!", style="bold red"))
+            sys.exit(1)
+
+    def _report_engine_summaries(self, summaries: list, wall_time_s: float):
+        """Print merged per-engine throughput and per-stage latency tables"""
+        engines_table = Table(title=f"Engine Summary ({wall_time_s:.1f}s wall time)")
+        for column in ("Engine", "Status", "Runs", "Failed Runs", "Wall (s)", "Runs/s"):
+            engines_table.add_column(column)
+        for summary in summaries:
+            status = "[green]PASSED[/green]" if summary.passed else "[red]FAILED[/red]"
+            engines_table.add_row(summary.engine, status, str(summary.runs), str(summary.failed_runs),
+                                  f"{summary.wall_time_s:.1f}", f"{summary.throughput:.2f}")
+        console.print(engines_table)
+
+        stages_table = Table(title="Stage Latency by Engine (ms)")
+        for column in ("Engine", "Stage", "Count", "Failed", "Mean", "p50", "p95", "p99", "Max"):
+            stages_table.add_column(column)
+        for summary in summaries:
+            if summary.error:
+                console.print(f"[red]💀 {summary.engine}: {summary.error}[/red]")
+            for stage_name, stats in summary.stage_stats.items():
+                stages_table.add_row(
+                    summary.engine, stage_name, str(stats["count"]), str(stats["failed"]),
+                    *(f"{stats[key]:.1f}" for key in ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"))
+                )
+        console.print(stages_table)
+
     def _run_test_plan(self, name: str, suites: list, engine: Optional[str] = None):
         """Execute test plan with given suites"""
+        console.print(f"\n[bold green]Starting {name}[/bold green]")
+        if engine:
+            console.print(f"[dim]Engine: {engine}[/dim]")
+        
+        try:
+            result = self._execute_plan(name, suites, engine)
+            console.print(f"[dim]Report saved to {self.report_path(name)} "
+                          f"(render with: thanos report render <path> --format pdf|html)[/dim]")
+            if result:
+                console.print(Panel.fit("✅ Tests completed successfully!", style="bold green"))
+            else:
+                console.print(Panel.fit("❌ Tests failed!", style="bold red"))
+                sys.exit(1)
+        except Exception as e:
+            console.print(Panel.fit(f"💥 Error running tests: {str(e)}", style="bold red"))
+            sys.exit(1)
+
+    def _execute_plan(self, name: str, suites: list, engine: Optional[str] = None) -> bool:
+        """Build and run a test plan for the given suites, returning whether it passed"""
         
         @test_plan(
             name=name,
             stdout_style=Style(passing="testcase", failing="assertion-detail"),
-            pdf_path=os.path.join(os.path.dirname(__file__), f"{name.lower().replace(' ', '_')}_report.pdf"),
-            pdf_style=Style(passing="testcase", failing="assertion-detail"),
+            json_path=self.report_path(name),
             parse_cmdline=False,
         )
         def plan(testplan: Testplan):
@@ -80,17 +180,4 @@ class TestRunner:
             )
             testplan.add(test)
         
-        console.print(f"\n[bold green]Starting {name}[/bold green]")
-        if engine:
-            console.print(f"[dim]Engine: {engine}[/dim]")
-        
-        try:
-            result = plan()
-            if result:
-                console.print(Panel.fit("✅ Tests completed successfully!", style="bold green"))
-            else:
-                console.print(Panel.fit("❌ Tests failed!", style="bold red"))
-                sys.exit(1)
-        except Exception as e:
-            console.print(Panel.fit(f"💥 Error running tests: {str(e)}", style="bold red"))
-            sys.exit(1)
\ No newline at end of file
+        return bool(plan())
@@ -0,0 +1,135 @@
+"""Watch the thanos package and re-run the engine suites affected by each edit."""
+
+import fnmatch
+import time
+from pathlib import Path
+from typing import List, Optional, Set
+
+from rich.console import Console
+
+from thanos.cli.engines import (ENGINE_ROOT, ENGINE_SUITE_PATTERN, PACKAGE_ROOT, EngineInfo, EngineRunSummary,
+                                group_engines, run_engines)
+from thanos.discovery import DiscoveryIndex
+
+console = Console()
+
+# Imported once by the fork server instead of by every worker. Never list
+# thanos modules here: workers must import the edited source.
+PRELOAD_MODULES = ("testplan", "polars", "pydantic", "rich")
+
+SETTLE_SECONDS = 0.1
+
+
+class EngineWatcher:
+    """Keeps a discovery index of the package hot and re-runs the suites an edit affects.
+
+    Files are polled every ``interval`` seconds; only the ones whose
+    modification time or size changed are parsed again. A suite is affected
+    when its file changed or when it imports a changed module, directly or
+    through other modules of the package.
+    """
+
+    def __init__(self, patterns: Optional[List[str]] = None, interval: float = 0.5, parallel: int = 1,
+                 report_dir: Optional[Path] = None, package_root: Path = PACKAGE_ROOT,
+                 engine_root: Path = ENGINE_ROOT):
+        self.patterns = list(patterns or [])
+        self.interval = interval
+        self.parallel = parallel
+        self.report_dir = report_dir
+        self.engine_root = Path(engine_root).resolve()
+        self.index = DiscoveryIndex(package_root, suite_root=engine_root, suite_pattern=ENGINE_SUITE_PATTERN)
+        # Time spent re-parsing files and tracing imports for the last batch of changes
+        self.index_ms = 0.0
+
+    def _selected(self, engines: List[EngineInfo]) -> List[EngineInfo]:
+        if not self.patterns:
+            return engines
+        return [engine for engine in engines
+                if any(fnmatch.fnmatchcase(engine.name, pattern) for pattern in self.patterns)]
+
+    def start(self) -> List[EngineInfo]:
+        """Build the index; raises ValueError when a pattern matches no engine."""
+        self.index.refresh()
+        available = group_engines(self.index.suites(), self.engine_root)
+        for pattern in self.patterns:
+            if not any(fnmatch.fnmatchcase(engine.name, pattern) for engine in available):
+                names = ", ".join(engine.name for engine in available) or "none"
+                raise ValueError(f"No engine matches '{pattern}' (available: {names})")
+        return self._selected(available)
+
+    def wait_for_changes(self) -> Set[Path]:
+        """Block until files changed and then stayed unchanged for a short moment."""
+        while True:
+            time.sleep(self.interval)
+            start = time.perf_counter()
+            changes = self.index.refresh()
+            if changes:
+                break
+        self.index_ms = (time.perf_counter() - start) * 1000
+        changed = set(changes.paths)
+        # Editors and formatters often save a file in several writes
+        while True:
+            time.sleep(SETTLE_SECONDS)
+            start = time.perf_counter()
+            changes = self.index.refresh()
+            if not changes:
+                return changed
+            self.index_ms += (time.perf_counter() - start) * 1000
+            changed.update(changes.paths)
+
+    def affected_engines(self, paths: Set[Path]) -> List[EngineInfo]:
+        start = time.perf_counter()
+        engines = self._selected(group_engines(self.index.affected_suites(paths), self.engine_root))
+        self.index_ms += (time.perf_counter() - start) * 1000
+        return engines
+
+    def run(self, engines: List[EngineInfo]) -> List[EngineRunSummary]:
+        def on_complete(summary):
+            icon = "✅" if summary.passed else "❌"
+            console.print(f"{icon} [cyan]{summary.engine}[/cyan] finished in {summary.wall_time_s:.1f}s")
+
+        log_dir = self.report_dir / "logs" if self.report_dir is not None else None
+        return run_engines(engines, parallel=self.parallel, log_dir=log_dir, on_complete=on_complete,
+                           start_method="forkserver", preload=PRELOAD_MODULES)
+
+
+def watch_engines(patterns: List[str], interval: float = 0.5, parallel: int = 1,
+                  report_dir: Optional[str] = None, run_now: bool = False):
+    """Re-run affected engine suites after every change until interrupted."""
+    from thanos.cli.runner import TestRunner
+
+    watcher = EngineWatcher(patterns, interval=interval, parallel=parallel,
+                            report_dir=Path(report_dir) if report_dir else None)
+    start = time.perf_counter()
+    engines = watcher.start()
+    console.print(f"[bold green]👀 Watching {PACKAGE_ROOT}[/bold green] [dim]({len(watcher.index.files)} files, "
+                  f"{len(engines)} engine(s) indexed in {(time.perf_counter() - start) * 1000:.0f} ms; "
+                  f"Ctrl-C to stop)[/dim]")
+
+    runner = TestRunner()
+    try:
+        while True:
+            if run_now:
+                run_now = False
+            else:
+                changed = watcher.wait_for_changes()
+                engines = watcher.affected_engines(changed)
+                names = ", ".join(str(path.relative_to(PACKAGE_ROOT)) for path in sorted(changed))
+                console.print(f"\n[bold]🔁 Changed: {names}[/bold] [dim](re-indexed in {watcher.index_ms:.0f} ms)[/dim]")
+                for path in changed:
+                    entry = watcher.index.files.get(path)
+                    if entry is not None and watcher.index.is_suite_file(path) and not entry.suites:
+                        console.print(f"[yellow]⚠️  No test suites found in {path.name}, "
+                                      f"check it for syntax errors[/yellow]")
+                if not engines:
+                    console.print("[dim]No watched suites are affected[/dim]")
+                    continue
+
+            for engine in engines:
+                console.print(f"[dim]  {engine.name}: {', '.join(s.class_name for s in engine.suites)}[/dim]")
+            start = time.perf_counter()
+            summaries = watcher.run(engines)
+            runner._report_engine_summaries(summaries, time.perf_counter() - start)
+            console.print("[dim]👀 Waiting for changes...[/dim]")
+    except KeyboardInterrupt:
+        console.print("\n[dim]Stopped watching[/dim]")
@@ -0,0 +1,114 @@
+"""Clock abstraction used by stages and the workflow runner.
+
+Stage actions should wait with :func:`thanos.clock.sleep` (also exported as
+``thanos.sleep``) instead of ``time.sleep``. Under the default system clock
+this really sleeps; when a runner executes with a :class:`VirtualClock`, the
+sleep advances simulated time instantly, while stage timings recorded by the
+runner still reflect the simulated durations.
+
+The active clock is held in a context variable, so concurrent runners in
+different threads can each use their own clock.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+
+class Clock(ABC):
+    """Source of time for workflow execution."""
+
+    @abstractmethod
+    def now(self) -> datetime:
+        pass
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        """Seconds from an arbitrary origin, for measuring durations."""
+        pass
+
+    @abstractmethod
+    def sleep(self, seconds: float):
+        pass
+
+
+class SystemClock(Clock):
+    """Wall-clock time; sleeping blocks the calling thread."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        return time.perf_counter()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Simulated time that only moves when something sleeps or advances it."""
+
+    def __init__(self, start: Optional[datetime] = None):
+        self._start = start or datetime.now()
+        self._elapsed = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def elapsed(self) -> float:
+        """Total simulated seconds since the clock was created."""
+        return self._elapsed
+
+    def now(self) -> datetime:
+        return self._start + timedelta(seconds=self._elapsed)
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def advance(self, seconds: float):
+        """Move simulated time forward without blocking."""
+        if seconds < 0:
+            raise ValueError("Cannot move a clock backwards")
+        with self._lock:
+            self._elapsed += seconds
+
+
+SYSTEM_CLOCK = SystemClock()
+
+_current_clock: ContextVar[Clock] = ContextVar("thanos_clock", default=SYSTEM_CLOCK)
+
+
+def get_clock() -> Clock:
+    """Return the clock active in the current context."""
+    return _current_clock.get()
+
+
+@contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    """Make clock the active clock for the duration of the block."""
+    token = _current_clock.set(clock)
+    try:
+        yield clock
+    finally:
+        _current_clock.reset(token)
+
+
+def now() -> datetime:
+    """Current time according to the active clock."""
+    return _current_clock.get().now()
+
+
+def monotonic() -> float:
+    """Monotonic seconds according to the active clock."""
+    return _current_clock.get().monotonic()
+
+
+def sleep(seconds: float):
+    """Sleep on the active clock; instant under a VirtualClock."""
+    _current_clock.get().sleep(seconds)
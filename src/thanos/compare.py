@@ -0,0 +1,265 @@
+"""Statistical comparison of stage latencies between two sets of runs.
+
+For every stage present in both the baseline and the candidate, the latency
+distributions are compared with a one-sided Mann–Whitney U test (normal
+approximation with tie and continuity correction) or with a bootstrap
+confidence interval of the relative change in median latency. A stage is
+flagged as a regression only when the slowdown is statistically significant
+*and* large enough to matter: Cliff's delta and the relative change of the
+median must both exceed their thresholds, so tiny but consistent shifts in
+huge samples do not fail a build.
+
+All per-stage statistics are computed in a handful of grouped polars
+expressions over the combined samples. Medians and p95s are nearest-rank
+percentiles, as in every other latency report (see
+:mod:`thanos.percentiles`).
+"""
+
+import json
+import math
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Sequence
+
+import polars as pl
+
+from thanos.percentiles import nearest_rank_expr
+
+METHODS = ("mannwhitney", "bootstrap")
+
+# |Cliff's delta| >= 0.147 is conventionally a "small" effect
+DEFAULT_MIN_EFFECT = 0.147
+
+
+@dataclass
+class StageComparison:
+    """Baseline vs candidate latency of one stage"""
+    stage: str
+    baseline_n: int
+    candidate_n: int
+    baseline_p50_ms: float
+    candidate_p50_ms: float
+    baseline_p95_ms: float
+    candidate_p95_ms: float
+    relative_change: float
+    cliffs_delta: float
+    p_value: Optional[float]
+    ci_low: Optional[float] = None
+    ci_high: Optional[float] = None
+    verdict: str = "unchanged"
+
+    @property
+    def regressed(self) -> bool:
+        return self.verdict == "regression"
+
+    def describe(self) -> str:
+        line = (f"{self.stage}: p50 {self.baseline_p50_ms:.2f} -> {self.candidate_p50_ms:.2f} ms "
+                f"({self.relative_change:+.1%}), p95 {self.baseline_p95_ms:.2f} -> {self.candidate_p95_ms:.2f} ms, "
+                f"Cliff's delta {self.cliffs_delta:+.2f}")
+        if self.p_value is not None:
+            line += f", p={self.p_value:.3g}"
+        if self.ci_low is not None:
+            line += f", CI [{self.ci_low:+.1%}, {self.ci_high:+.1%}]"
+        return line
+
+
+def _samples(frame: pl.DataFrame, statuses: Sequence[str]) -> pl.DataFrame:
+    return frame.filter(pl.col("stage_status").is_in(list(statuses))).select("stage", "duration_ms")
+
+
+def _mann_whitney(combined: pl.DataFrame) -> pl.DataFrame:
+    """U statistic, tie-corrected variance and Cliff's delta per stage; 'candidate' is the tested group."""
+    ties = (
+        combined.group_by("stage", "duration_ms").len()
+        .group_by("stage")
+        .agg(((pl.col("len") ** 3) - pl.col("len")).sum().cast(pl.Float64).alias("tie_sum"))
+    )
+    ranked = combined.with_columns(pl.col("duration_ms").rank("average").over("stage").alias("rank"))
+    per_stage = (
+        ranked.group_by("stage")
+        .agg(
+            pl.col("rank").filter(pl.col("candidate")).sum().alias("rank_sum"),
+            pl.col("candidate").sum().cast(pl.Float64).alias("n_c"),
+            (~pl.col("candidate")).sum().cast(pl.Float64).alias("n_b"),
+        )
+        .join(ties, on="stage")
+        .with_columns((pl.col("n_c") + pl.col("n_b")).alias("n"))
+        .with_columns((pl.col("rank_sum") - pl.col("n_c") * (pl.col("n_c") + 1) / 2).alias("u"))
+        .with_columns(
+            (2 * pl.col("u") / (pl.col("n_c") * pl.col("n_b")) - 1).alias("cliffs_delta"),
+            (pl.col("n_c") * pl.col("n_b") / 12
+             * ((pl.col("n") + 1) - pl.col("tie_sum") / (pl.col("n") * (pl.col("n") - 1)))).sqrt().alias("sigma"),
+        )
+    )
+    return per_stage.select("stage", "u", "n_b", "n_c", "sigma", "cliffs_delta")
+
+
+def _upper_tail(z: float) -> float:
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _bootstrap_ci(baseline: pl.Series, candidate: pl.Series, samples: int, confidence: float,
+                  seed: Optional[int]) -> tuple:
+    """Percentile CI of candidate_median / baseline_median - 1, resampling each group in one pass."""
+    def medians(values: pl.Series, offset: int) -> pl.Series:
+        n = len(values)
+        resampled = values.sample(n * samples, with_replacement=True, seed=None if seed is None else seed + offset)
+        return (
+            pl.DataFrame({"value": resampled})
+            .with_row_index("i")
+            .group_by((pl.col("i") // n).alias("replicate"))
+            .agg(nearest_rank_expr(pl.col("value"), 0.5))
+            .sort("replicate")["value"]
+        )
+
+    ratios = medians(candidate, 1) / medians(baseline, 0) - 1
+    tail = (1 - confidence) / 2
+    return ratios.quantile(tail, "linear"), ratios.quantile(1 - tail, "linear")
+
+
+def compare_stage_latencies(
+    baseline: pl.DataFrame,
+    candidate: pl.DataFrame,
+    method: str = "mannwhitney",
+    alpha: float = 0.05,
+    min_effect: float = DEFAULT_MIN_EFFECT,
+    min_relative_change: float = 0.1,
+    min_samples: int = 5,
+    stages: Optional[Sequence[str]] = None,
+    statuses: Sequence[str] = ("PASSED",),
+    bootstrap_samples: int = 2000,
+    seed: Optional[int] = 0,
+) -> List[StageComparison]:
+    """Compare per-stage latencies of two stage-result frames (see ``thanos.store``).
+
+    Only stage results with one of ``statuses`` are used. Stages with fewer
+    than ``min_samples`` results on either side get the verdict
+    "insufficient data".
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown comparison method '{method}', expected one of {METHODS}")
+
+    combined = pl.concat([
+        _samples(baseline, statuses).with_columns(pl.lit(False).alias("candidate")),
+        _samples(candidate, statuses).with_columns(pl.lit(True).alias("candidate")),
+    ])
+    if stages:
+        combined = combined.filter(pl.col("stage").is_in(list(stages)))
+
+    summary = (
+        combined.group_by("stage", "candidate")
+        .agg(
+            pl.len().alias("n"),
+            nearest_rank_expr(pl.col("duration_ms"), 0.5).alias("p50"),
+            nearest_rank_expr(pl.col("duration_ms"), 0.95).alias("p95"),
+        )
+    )
+    rows: Dict[str, Dict[bool, dict]] = {}
+    for row in summary.iter_rows(named=True):
+        rows.setdefault(row["stage"], {})[row["candidate"]] = row
+
+    tests = {row["stage"]: row for row in _mann_whitney(combined).iter_rows(named=True)}
+
+    comparisons = []
+    for stage in sorted(rows):
+        sides = rows[stage]
+        if False not in sides or True not in sides:
+            continue
+        base, cand = sides[False], sides[True]
+        relative_change = cand["p50"] / base["p50"] - 1 if base["p50"] else 0.0
+        test = tests[stage]
+        comparison = StageComparison(
+            stage=stage,
+            baseline_n=base["n"],
+            candidate_n=cand["n"],
+            baseline_p50_ms=base["p50"],
+            candidate_p50_ms=cand["p50"],
+            baseline_p95_ms=base["p95"],
+            candidate_p95_ms=cand["p95"],
+            relative_change=relative_change,
+            cliffs_delta=test["cliffs_delta"],
+            p_value=None,
+        )
+        if min(base["n"], cand["n"]) < min_samples:
+            comparison.verdict = "insufficient data"
+            comparisons.append(comparison)
+            continue
+
+        if method == "mannwhitney":
+            mean_u = test["n_b"] * test["n_c"] / 2
+            if test["sigma"] > 0:
+                slower_z = (test["u"] - mean_u - 0.5) / test["sigma"]
+                faster_z = (mean_u - test["u"] - 0.5) / test["sigma"]
+                p_slower, p_faster = _upper_tail(slower_z), _upper_tail(faster_z)
+            else:
+                p_slower = p_faster = 1.0
+            comparison.p_value = p_slower if relative_change >= 0 else p_faster
+            slower, faster = p_slower < alpha, p_faster < alpha
+        else:
+            values = combined.filter(pl.col("stage") == stage)
+            comparison.ci_low, comparison.ci_high = _bootstrap_ci(
+                values.filter(~pl.col("candidate"))["duration_ms"],
+                values.filter(pl.col("candidate"))["duration_ms"],
+                bootstrap_samples, 1 - 2 * alpha, seed,
+            )
+            slower, faster = comparison.ci_low > 0, comparison.ci_high < 0
+
+        if slower and comparison.cliffs_delta >= min_effect and relative_change >= min_relative_change:
+            comparison.verdict = "regression"
+        elif faster and -comparison.cliffs_delta >= min_effect and -relative_change >= min_relative_change:
+            comparison.verdict = "improvement"
+        comparisons.append(comparison)
+    return comparisons
+
+
+def comparisons_to_dicts(comparisons: List[StageComparison]) -> List[dict]:
+    return [{**asdict(comparison), "regressed": comparison.regressed} for comparison in comparisons]
+
+
+def assert_no_regressions(result, comparisons: List[StageComparison],
+                          description: str = "Stage latency versus baseline"):
+    """Log a comparison table to a testplan result and fail one assertion per regressed stage."""
+    result.table.log(
+        [
+            {
+                "stage": c.stage,
+                "baseline p50 (ms)": round(c.baseline_p50_ms, 2),
+                "candidate p50 (ms)": round(c.candidate_p50_ms, 2),
+                "change": f"{c.relative_change:+.1%}",
+                "Cliff's delta": round(c.cliffs_delta, 3),
+                "p-value": "" if c.p_value is None else f"{c.p_value:.3g}",
+                "verdict": c.verdict,
+            }
+            for c in comparisons
+        ],
+        description=description,
+    )
+    for comparison in comparisons:
+        result.false(comparison.regressed, description=f"No latency regression: {comparison.describe()}")
+
+
+def baseline_assertion(store_path: str, baseline_label: str, match_parameters: bool = False, **options):
+    """Build a ``TestConfiguration.custom_assertions`` entry comparing against stored baseline runs.
+
+    The candidate is every run of the suite so far, taken from the suite's
+    cache rather than the runner's (a matrix combination's runner only holds
+    its own run), so the check gains power as the suite's testcases execute. With
+    ``match_parameters`` only runs with the current testcase parameters are
+    compared on both sides. ``options`` go to :func:`compare_stage_latencies`.
+    """
+    from thanos.store import ResultStore, RunSelector, runs_to_frame
+
+    def check(result, runner, test_params):
+        cache = runner.suite_cache if runner.suite_cache is not None else runner.cache
+        candidate = runs_to_frame(cache.get_all_results())
+        baseline = ResultStore(store_path).load(RunSelector(label=baseline_label, suite=runner.metadata.get("suite")))
+        if match_parameters:
+            parameters = json.dumps(test_params, sort_keys=True, default=str)
+            candidate = candidate.filter(pl.col("parameters") == parameters)
+            baseline = baseline.filter(pl.col("parameters") == parameters)
+        if baseline.is_empty():
+            result.log(f"No baseline runs labelled '{baseline_label}' in {store_path}; skipping regression check")
+            return
+        assert_no_regressions(result, compare_stage_latencies(baseline, candidate, **options),
+                              description=f"Stage latency versus baseline '{baseline_label}'")
+
+    return check
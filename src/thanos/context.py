@@ -0,0 +1,246 @@
+"""Workflow context that stages can share without copying.
+
+:class:`WorkflowContext` replaces the runner's plain context dict when a
+suite turns on scoped contexts. Every write produces a new immutable
+:class:`ContextSnapshot` that shares all other entries with the previous
+one, so taking a snapshot for a stage is free and a stage running in
+parallel with a later write never sees it change. Each stage gets a
+:class:`ScopedContext` view of the snapshot limited to the stages it
+depends on (directly or transitively); reading anything else is an error
+rather than an undeclared dependency.
+
+Mutable bytes-like results are exposed as read-only ``memoryview``s, so
+consumers slice them without copying and cannot mutate a producer's
+``bytearray``.
+Above ``shared_memory_threshold`` they are moved once into
+:class:`SharedBytes`, a ``multiprocessing.shared_memory`` segment that
+pickles as its name, so handing it to another process copies nothing.
+"""
+
+import weakref
+from collections.abc import Mapping, MutableMapping
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional
+
+
+class SharedBytes:
+    """Read-only bytes in a shared memory segment.
+
+    Pickling sends only the segment name and size; the receiving process
+    maps the same memory. The creating process owns the segment and frees
+    it with :meth:`release`.
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, size: int, owner: bool):
+        self._segment = segment
+        self.size = size
+        self.owner = owner
+
+    @classmethod
+    def allocate(cls, size: int) -> 'SharedBytes':
+        """An owned, writable segment for a producer to fill in place (see :meth:`writable`)."""
+        return cls(shared_memory.SharedMemory(create=True, size=max(size, 1)), size, owner=True)
+
+    @classmethod
+    def copy_of(cls, data) -> 'SharedBytes':
+        """Move bytes-like data into a new segment; the one copy it takes."""
+        view = memoryview(data).cast("B")
+        shared = cls.allocate(view.nbytes)
+        shared._segment.buf[:view.nbytes] = view
+        return shared
+
+    @property
+    def name(self) -> str:
+        return self._segment.name
+
+    def writable(self) -> memoryview:
+        return self._segment.buf[:self.size]
+
+    def view(self) -> memoryview:
+        return self._segment.buf[:self.size].toreadonly()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.view())
+
+    def __reduce__(self):
+        return _attach_shared_bytes, (self.name, self.size)
+
+    def __repr__(self) -> str:
+        return f"<SharedBytes {self.name} {self.size} bytes>"
+
+    def release(self) -> bool:
+        """Unmap the segment (and unlink it if owned); False while views of it are still alive."""
+        try:
+            self._segment.close()
+        except BufferError:
+            return False
+        if self.owner:
+            # A reader sharing this process's resource tracker unregistered the
+            # segment when it attached; unlink() expects it to be registered.
+            resource_tracker.register(self._segment._name, "shared_memory")
+            try:
+                self._segment.unlink()
+            except FileNotFoundError:
+                pass
+        return True
+
+
+def _attach_shared_bytes(name: str, size: int) -> SharedBytes:
+    segment = shared_memory.SharedMemory(name=name)
+    # Attaching registers the segment with this process's resource tracker, which
+    # would unlink it on exit; the segment belongs to the process that created it.
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return SharedBytes(segment, size, owner=False)
+
+
+def _release_segments(segments: List[SharedBytes]):
+    segments[:] = [segment for segment in segments if not segment.release()]
+
+
+class ContextSnapshot(Mapping):
+    """An immutable mapping of stage name to result.
+
+    ``set`` returns a new snapshot; the entry dict of a snapshot is never
+    modified after creation, so snapshots share their values (and old
+    snapshots stay valid) without any locking.
+    """
+
+    __slots__ = ("_entries",)
+
+    def __init__(self, entries: Optional[Dict[str, Any]] = None):
+        self._entries = entries if entries is not None else {}
+
+    def set(self, key: str, value: Any) -> 'ContextSnapshot':
+        entries = dict(self._entries)
+        entries[key] = value
+        return ContextSnapshot(entries)
+
+    def without(self, key: str) -> 'ContextSnapshot':
+        entries = dict(self._entries)
+        del entries[key]
+        return ContextSnapshot(entries)
+
+    def scoped(self, stage: str, allowed: Iterable[str]) -> 'ScopedContext':
+        return ScopedContext(self, stage, frozenset(allowed))
+
+    def __getitem__(self, key: str) -> Any:
+        return self._entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return repr(self._entries)
+
+
+class ScopedContext(Mapping):
+    """What one stage may read: the results of the stages it depends on."""
+
+    __slots__ = ("_snapshot", "stage", "allowed")
+
+    def __init__(self, snapshot: ContextSnapshot, stage: str, allowed: FrozenSet[str]):
+        self._snapshot = snapshot
+        self.stage = stage
+        self.allowed = allowed
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.allowed:
+            raise KeyError(f"Stage '{self.stage}' read '{key}' from the context but does not depend on it; "
+                           f"add '{key}' to its dependencies")
+        return self._snapshot[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self._snapshot if key in self.allowed)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.allowed and key in self._snapshot
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class WorkflowContext(MutableMapping):
+    """The runner's context: a current snapshot plus the shared memory it owns."""
+
+    def __init__(self, shared_memory_threshold: Optional[int] = None):
+        self.shared_memory_threshold = shared_memory_threshold
+        self._snapshot = ContextSnapshot()
+        # Segments this context created; ones still viewed when released are retried on the next clear
+        self._segments: List[SharedBytes] = []
+        weakref.finalize(self, _release_segments, self._segments)
+
+    def snapshot(self) -> ContextSnapshot:
+        return self._snapshot
+
+    @property
+    def shared_segments(self) -> int:
+        """Shared memory segments this context still owns."""
+        return len(self._segments)
+
+    def view_for(self, stage: str, allowed: Iterable[str]) -> ScopedContext:
+        return self._snapshot.scoped(stage, allowed)
+
+    def _share(self, value: Any) -> Any:
+        if isinstance(value, SharedBytes):
+            return value.view()
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            if self.shared_memory_threshold is not None and memoryview(value).nbytes >= self.shared_memory_threshold:
+                shared = SharedBytes.copy_of(value)
+                self._segments.append(shared)
+                return shared.view()
+            # bytes are immutable and already shared by reference
+            return value if isinstance(value, bytes) else memoryview(value).toreadonly()
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        self._snapshot = self._snapshot.set(key, self._share(value))
+
+    def __getitem__(self, key: str) -> Any:
+        return self._snapshot[key]
+
+    def __delitem__(self, key: str):
+        self._snapshot = self._snapshot.without(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot)
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def clear(self):
+        """Start an empty snapshot and free the shared memory of the previous run."""
+        self._snapshot = ContextSnapshot()
+        _release_segments(self._segments)
+
+    def __repr__(self) -> str:
+        return repr(self._snapshot)
+
+
+def transitive_dependencies(dag: Dict[str, List[str]]) -> Dict[str, FrozenSet[str]]:
+    """Every stage's direct and indirect dependencies."""
+    resolved: Dict[str, FrozenSet[str]] = {}
+
+    def resolve(stage: str, visiting: FrozenSet[str]) -> FrozenSet[str]:
+        if stage in resolved:
+            return resolved[stage]
+        if stage in visiting:
+            raise ValueError(f"Dependency cycle through stage '{stage}'")
+        ancestors = set()
+        for dependency in dag.get(stage, ()):
+            ancestors.add(dependency)
+            ancestors |= resolve(dependency, visiting | {stage})
+        resolved[stage] = frozenset(ancestors)
+        return resolved[stage]
+
+    for stage in dag:
+        resolve(stage, frozenset())
+    return resolved
@@ -0,0 +1,163 @@
+"""Rows of a Parquet or CSV dataset handed out to workflow runs.
+
+A :class:`DatasetFeeder` streams a dataset with polars in batches of
+``batch_size`` rows, so only one batch per feeder is ever in memory however
+large the file is. Every call to :meth:`DatasetFeeder.next_row` returns the
+next row as a dict; concurrent runs never get the same row.
+
+Workers split a dataset into ``shard_count`` disjoint shards. Parquet files
+are split into contiguous row ranges (the row count comes from the file
+metadata and each batch is a sliced scan, so a shard only reads its own row
+groups); CSV files are read with a batched reader and rows are dealt out
+round-robin. Shards default to ``$THANOS_SHARD_INDEX`` and
+``$THANOS_SHARD_COUNT``, which distributed workers set from their
+assignment.
+
+With ``loop`` a feeder starts over at the end of its shard; otherwise it
+raises :class:`DatasetExhausted`.
+"""
+
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence
+
+import polars as pl
+
+SHARD_INDEX_ENV = "THANOS_SHARD_INDEX"
+SHARD_COUNT_ENV = "THANOS_SHARD_COUNT"
+
+
+class DatasetExhausted(Exception):
+    """Every row of a non-looping feeder's shard has been handed out."""
+
+
+def default_shard() -> tuple:
+    """(index, count) of this process's shard, from the environment."""
+    return int(os.environ.get(SHARD_INDEX_ENV, 0)), int(os.environ.get(SHARD_COUNT_ENV, 1))
+
+
+def shard_range(rows: int, index: int, count: int) -> tuple:
+    """[start, end) of the rows of shard index out of count, sizes differing by at most one."""
+    return rows * index // count, rows * (index + 1) // count
+
+
+class DatasetFeeder:
+    """Thread-safe, lazily loaded supply of dataset rows.
+
+    ``columns`` limits the columns read; ``csv_options`` are passed to
+    ``polars.read_csv_batched``. The shard is resolved when the first row
+    is read, so a feeder built at import time picks up the shard its
+    process is assigned later.
+    """
+
+    def __init__(self, path: str, shard_index: Optional[int] = None, shard_count: Optional[int] = None,
+                 loop: bool = False, batch_size: int = 10_000, columns: Optional[Sequence[str]] = None,
+                 csv_options: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        suffix = self.path.suffix.lower()
+        if suffix not in (".parquet", ".csv"):
+            raise ValueError(f"Unsupported dataset format '{suffix}', expected .parquet or .csv")
+        self.format = suffix[1:]
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.loop = loop
+        self.batch_size = batch_size
+        self.columns = list(columns) if columns else None
+        self.csv_options = csv_options or {}
+        # Rows handed out so far, and how many times the shard was started over
+        self.rows_served = 0
+        self.epoch = 0
+        self._rows: Deque[Dict[str, Any]] = deque()
+        self._batches: Optional[Iterator[pl.DataFrame]] = None
+        self._lock = threading.Lock()
+
+    def _shard(self) -> tuple:
+        index, count = default_shard()
+        index = self.shard_index if self.shard_index is not None else index
+        count = self.shard_count if self.shard_count is not None else count
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Invalid shard {index} of {count}")
+        return index, count
+
+    def _parquet_batches(self, index: int, count: int) -> Iterator[pl.DataFrame]:
+        scan = pl.scan_parquet(self.path)
+        if self.columns:
+            scan = scan.select(self.columns)
+        start, end = shard_range(scan.select(pl.len()).collect().item(), index, count)
+        for offset in range(start, end, self.batch_size):
+            yield scan.slice(offset, min(self.batch_size, end - offset)).collect()
+
+    def _csv_batches(self, index: int, count: int) -> Iterator[pl.DataFrame]:
+        reader = pl.read_csv_batched(self.path, columns=self.columns, batch_size=self.batch_size,
+                                     **self.csv_options)
+        seen = 0
+        while True:
+            batches = reader.next_batches(1)
+            if not batches:
+                return
+            batch = batches[0]
+            if count > 1:
+                # Deal rows out round-robin by their position in the file
+                first = (index - seen) % count
+                batch = batch.gather_every(count, offset=first) if first < batch.height else batch.clear()
+            seen += batches[0].height
+            if batch.height:
+                yield batch
+
+    def _open(self) -> Iterator[pl.DataFrame]:
+        index, count = self._shard()
+        if self.format == "parquet":
+            return self._parquet_batches(index, count)
+        return self._csv_batches(index, count)
+
+    def _refill(self):
+        if self._batches is None:
+            self._batches = self._open()
+        restarted = False
+        while not self._rows:
+            batch = next(self._batches, None)
+            if batch is not None:
+                self._rows.extend(batch.iter_rows(named=True))
+                continue
+            if not self.loop:
+                raise DatasetExhausted(f"All rows of {self.path} (shard {self._shard()[0]}) have been used")
+            if restarted:
+                raise DatasetExhausted(f"Shard {self._shard()[0]} of {self.path} has no rows")
+            self._batches = self._open()
+            self.epoch += 1
+            restarted = True
+
+    def next_row(self) -> Dict[str, Any]:
+        """The next row of this feeder's shard."""
+        with self._lock:
+            if not self._rows:
+                self._refill()
+            self.rows_served += 1
+            return self._rows.popleft()
+
+    def take(self, count: int) -> List[Dict[str, Any]]:
+        """The next count rows, or fewer if a non-looping shard runs out."""
+        rows = []
+        try:
+            for _ in range(count):
+                rows.append(self.next_row())
+        except DatasetExhausted:
+            pass
+        return rows
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            try:
+                yield self.next_row()
+            except DatasetExhausted:
+                return
+
+    def reset(self):
+        """Start the shard over, e.g. between testcases."""
+        with self._lock:
+            self._rows.clear()
+            self._batches = None
+            self.epoch = 0
+            self.rows_served = 0
@@ -1,6 +1,7 @@
 """Test suite discovery utilities."""
 
 from .discovery import TestSuiteDiscovery
+from .index import DiscoveryIndex, IndexChanges
 from .interfaces import TestSuiteInfo
 from .parsers import ASTTestSuiteParser
 from .filters import DecoratorFilter
@@ -8,6 +9,8 @@ from .discoverers import GlobFileDiscoverer, FilteredFileDiscoverer, RegexFileDi
 
 __all__ = [
     'TestSuiteDiscovery', 
+    'DiscoveryIndex',
+    'IndexChanges',
     'TestSuiteInfo', 
     'ASTTestSuiteParser', 
     'DecoratorFilter',
@@ -52,6 +52,7 @@ class FilteredFileDiscoverer(FileDiscoverer):
             if fnmatch.fnmatch(file_path.name, pattern):
                 files.append(file_path)
         
+        return files
 
 
 
@@ -52,7 +52,7 @@ class TestSuiteDiscovery:
             discoverer=self.discoverer,
             filters=[DecoratorFilter({decorator})]
         )
-
+        return discovery.discover(directory)
     
     def discover_with_regex(self, directory: str | Path, regex_pattern: str, case_sensitive: bool = True) -> List[TestSuiteInfo]:
         """Discover test suites using advanced regex path matching.
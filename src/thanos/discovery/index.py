@@ -0,0 +1,168 @@
+"""Incrementally maintained index of test suites and module imports."""
+
+import fnmatch
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .interfaces import TestSuiteFilter, TestSuiteInfo
+from .parsers import ASTTestSuiteParser
+from .filters import DecoratorFilter
+
+
+@dataclass
+class IndexedFile:
+    """What the index knows about one Python file."""
+    signature: Tuple[int, int]
+    module: str
+    imports: List[str]
+    suites: List[TestSuiteInfo]
+
+
+@dataclass
+class IndexChanges:
+    """Files that appeared, changed or disappeared since the previous refresh."""
+    added: List[Path] = field(default_factory=list)
+    modified: List[Path] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+
+    @property
+    def paths(self) -> List[Path]:
+        return self.added + self.modified + self.removed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+class DiscoveryIndex:
+    """Test suites and imports of every Python file in a package, kept current by polling.
+
+    :meth:`refresh` stats every file and re-parses only those whose
+    modification time or size changed, so a refresh of an unchanged tree
+    costs one ``stat`` per file. Suites are only collected from files under
+    ``suite_root`` matching ``suite_pattern``; imports are kept for every
+    file so that a change to a helper module can be traced to the suites
+    that use it, directly or through other modules.
+    """
+
+    def __init__(self, package_root: Path, suite_root: Optional[Path] = None,
+                 suite_pattern: str = "test_suite_*.py", parser: Optional[ASTTestSuiteParser] = None,
+                 filters: Optional[List[TestSuiteFilter]] = None):
+        self.package_root = Path(package_root).resolve()
+        self.suite_root = Path(suite_root).resolve() if suite_root else self.package_root
+        self.suite_pattern = suite_pattern
+        self.parser = parser or ASTTestSuiteParser()
+        self.filters = filters or [DecoratorFilter({'testsuite'})]
+        self.files: Dict[Path, IndexedFile] = {}
+        # module -> modules importing it, rebuilt after every refresh that changed something
+        self._importers: Dict[str, Set[str]] = {}
+        self._modules: Set[str] = set()
+
+    def module_name(self, path: Path) -> str:
+        """Dotted module name of a file in the package (``pkg/__init__.py`` is ``pkg``)."""
+        relative = path.relative_to(self.package_root.parent).with_suffix("")
+        parts = relative.parts[:-1] if relative.name == "__init__" else relative.parts
+        return ".".join(parts)
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        signatures = {}
+        stack = [self.package_root]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != "__pycache__" and not entry.name.startswith("."):
+                            stack.append(Path(entry.path))
+                    elif entry.name.endswith(".py"):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        signatures[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def is_suite_file(self, path: Path) -> bool:
+        """Whether suites are collected from path."""
+        return path.is_relative_to(self.suite_root) and fnmatch.fnmatch(path.name, self.suite_pattern)
+
+    def _index(self, path: Path, signature: Tuple[int, int]):
+        suites, imports = self.parser.parse_module(path)
+        if not self.is_suite_file(path):
+            suites = []
+        suites = [suite for suite in suites if all(f.matches(suite) for f in self.filters)]
+        self.files[path] = IndexedFile(signature=signature, module=self.module_name(path),
+                                       imports=imports, suites=suites)
+
+    def refresh(self) -> IndexChanges:
+        """Bring the index up to date with the files on disk."""
+        changes = IndexChanges()
+        signatures = self._scan()
+        for path, signature in signatures.items():
+            known = self.files.get(path)
+            if known is None:
+                changes.added.append(path)
+            elif known.signature != signature:
+                changes.modified.append(path)
+            else:
+                continue
+            self._index(path, signature)
+        changes.removed.extend(set(self.files) - set(signatures))
+        if changes:
+            self._rebuild_graph(removed=changes.removed)
+        return changes
+
+    def _resolve(self, entry: IndexedFile, path: Path, imported: str) -> Optional[str]:
+        """The indexed module an import of entry refers to, if any."""
+        if imported.startswith("."):
+            level = len(imported) - len(imported.lstrip("."))
+            package = entry.module if path.name == "__init__.py" else entry.module.rpartition(".")[0]
+            for _ in range(level - 1):
+                package = package.rpartition(".")[0]
+            imported = f"{package}.{imported[level:]}" if imported[level:] else package
+        # "pkg.module.name" may name a module or an attribute of one; take the longest module prefix
+        candidate = imported
+        while candidate:
+            if candidate in self._modules:
+                return candidate
+            candidate = candidate.rpartition(".")[0]
+        return None
+
+    def _rebuild_graph(self, removed: Iterable[Path] = ()):
+        # Removed modules stay resolvable until the next rebuild, so the suites that imported them are affected
+        self._modules = {entry.module for entry in self.files.values()}
+        for path in removed:
+            del self.files[path]
+        importers: Dict[str, Set[str]] = {}
+        for path, entry in self.files.items():
+            for imported in entry.imports:
+                target = self._resolve(entry, path, imported)
+                if target is not None and target != entry.module:
+                    importers.setdefault(target, set()).add(entry.module)
+        self._importers = importers
+
+    def suites(self) -> List[TestSuiteInfo]:
+        """Every indexed test suite, in file order."""
+        return [suite for path in sorted(self.files) for suite in self.files[path].suites]
+
+    def affected_suites(self, paths: Iterable[Path]) -> List[TestSuiteInfo]:
+        """Suites defined in paths or importing them, directly or through other modules."""
+        pending = []
+        for path in paths:
+            path = Path(path).resolve()
+            entry = self.files.get(path)
+            if entry is not None:
+                pending.append(entry.module)
+            elif path.is_relative_to(self.package_root) and path.suffix == ".py":
+                pending.append(self.module_name(path))
+        seen = set(pending)
+        while pending:
+            for importer in self._importers.get(pending.pop(), ()):
+                if importer not in seen:
+                    seen.add(importer)
+                    pending.append(importer)
+        return [suite for suite in self.suites() if self.files[suite.file_path].module in seen]
@@ -1,7 +1,7 @@
 """AST-based parsers for test suite discovery."""
 
 import ast
-from typing import List, Set
+from typing import List, Set, Tuple
 from pathlib import Path
 
 from .interfaces import FileParser, TestSuiteInfo
@@ -15,6 +15,10 @@ class ASTTestSuiteParser(FileParser):
     
     def parse(self, file_path: Path) -> List[TestSuiteInfo]:
         """Parse Python file using AST to find decorated test suites."""
+        return self.parse_module(file_path)[0]
+    
+    def parse_module(self, file_path: Path) -> Tuple[List[TestSuiteInfo], List[str]]:
+        """Parse a Python file once for both its test suites and its imports."""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
@@ -23,7 +27,7 @@ class ASTTestSuiteParser(FileParser):
             visitor = TestSuiteVisitor(self.target_decorators)
             visitor.visit(tree)
             
-            return [
+            suites = [
                 TestSuiteInfo(
                     file_path=file_path,
                     class_name=suite['class_name'],
@@ -33,8 +37,9 @@ class ASTTestSuiteParser(FileParser):
                 )
                 for suite in visitor.test_suites
             ]
+            return suites, visitor.imports
         except (SyntaxError, UnicodeDecodeError, FileNotFoundError):
-            return []
+            return [], []
 
 
 class TestSuiteVisitor(ast.NodeVisitor):
@@ -52,10 +57,10 @@ class TestSuiteVisitor(ast.NodeVisitor):
         self.generic_visit(node)
     
     def visit_ImportFrom(self, node):
-        """Extract from-import statements."""
-        if node.module:
-            for alias in node.names:
-                self.imports.append(f"{node.module}.{alias.name}")
+        """Extract from-import statements; relative ones keep their leading dots."""
+        prefix = "." * node.level + (f"{node.module}." if node.module else "")
+        for alias in node.names:
+            self.imports.append(f"{prefix}{alias.name}")
         self.generic_visit(node)
     
     def visit_ClassDef(self, node):
@@ -0,0 +1,16 @@
+"""Spread workflow runs across worker processes on several nodes."""
+
+from .coordinator import Coordinator, DistributedJob, DistributedRunSummary, WorkerSummary, spawn_local_workers
+from .histogram import LatencyHistogram
+from .worker import Worker, run_worker
+
+__all__ = [
+    'Coordinator',
+    'DistributedJob',
+    'DistributedRunSummary',
+    'WorkerSummary',
+    'spawn_local_workers',
+    'LatencyHistogram',
+    'Worker',
+    'run_worker',
+]
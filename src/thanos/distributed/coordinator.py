@@ -0,0 +1,202 @@
+"""Coordinator side: hands out run quotas and merges what the workers send back."""
+
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from rich import print as rprint
+
+from thanos.cache import TestRunResult
+
+from .histogram import LatencyHistogram
+from .protocol import (ASSIGN, DONE, ERROR, HELLO, RESULTS, SHUTDOWN, ProtocolError, decode_run, recv_message,
+                       send_message)
+
+
+@dataclass
+class DistributedJob:
+    """What every worker runs: a workflow and either a run count or a duration."""
+    workflow: str = "standard_user_workflow"
+    runs: Optional[int] = None
+    duration_s: Optional[float] = None
+    base_url: Optional[str] = None
+    simulate: bool = False
+    parameters: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if (self.runs is None) == (self.duration_s is None):
+            raise ValueError("Give exactly one of runs or duration_s")
+
+
+@dataclass
+class WorkerSummary:
+    worker_id: str
+    host: str
+    concurrency: int
+    assigned_runs: Optional[int] = None
+    runs: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class DistributedRunSummary:
+    """Merged outcome of a distributed run"""
+    workers: List[WorkerSummary]
+    runs: List[TestRunResult]
+    histograms: Dict[str, LatencyHistogram]
+    wall_time_s: float
+
+    @property
+    def failed_runs(self) -> int:
+        return sum(1 for run in self.runs if run.overall_status != "PASSED")
+
+    @property
+    def throughput(self) -> float:
+        return len(self.runs) / self.wall_time_s if self.wall_time_s else 0.0
+
+    @property
+    def passed(self) -> bool:
+        return not self.failed_runs and not any(worker.error for worker in self.workers)
+
+
+def split_quota(total: int, capacities: List[int]) -> List[int]:
+    """Divide total runs in proportion to worker capacity, handing out remainders largest-first."""
+    weight = sum(capacities)
+    shares = [total * capacity // weight for capacity in capacities]
+    remainders = sorted(range(len(capacities)), key=lambda i: (total * capacities[i]) % weight, reverse=True)
+    for i in remainders[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+class Coordinator:
+    """Waits for ``expected_workers`` workers, splits the job among them and collects their results.
+
+    A connection that does not send its HELLO within ``handshake_timeout``
+    seconds is dropped, so a stray or stalled client cannot hold up the run.
+    """
+
+    def __init__(self, job: DistributedJob, expected_workers: int, host: str = "0.0.0.0", port: int = 7878,
+                 connect_timeout: float = 60.0, handshake_timeout: float = 10.0):
+        self.job = job
+        self.expected_workers = expected_workers
+        self.connect_timeout = connect_timeout
+        self.handshake_timeout = handshake_timeout
+        self._server = socket.create_server((host, port), reuse_port=False, backlog=expected_workers)
+        self.host, self.port = self._server.getsockname()[:2]
+        self._runs: List[TestRunResult] = []
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def run(self) -> DistributedRunSummary:
+        connections = self._accept_workers()
+        start = time.perf_counter()
+        workers = []
+        for sock, hello in connections:
+            workers.append(WorkerSummary(worker_id=hello["worker_id"], host=hello["host"],
+                                         concurrency=hello.get("concurrency", 1)))
+        shares = split_quota(self.job.runs, [w.concurrency for w in workers]) if self.job.runs is not None else None
+
+        threads = []
+        for index, ((sock, _), worker) in enumerate(zip(connections, workers)):
+            worker.assigned_runs = shares[index] if shares else None
+            # Workers feeding from a dataset each read their own shard of it
+            assignment = {**self.job.__dict__, "runs": worker.assigned_runs,
+                          "shard_index": index, "shard_count": len(workers)}
+            thread = threading.Thread(target=self._serve_worker, args=(sock, worker, assignment),
+                                      name=f"thanos-coordinator-{worker.worker_id}")
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        self._server.close()
+
+        return DistributedRunSummary(workers=workers, runs=self._runs, histograms=self._histograms,
+                                     wall_time_s=time.perf_counter() - start)
+
+    def _accept_workers(self) -> list:
+        rprint(f"[bold blue]📡 Coordinator on {self.host}:{self.port} waiting for "
+               f"{self.expected_workers} worker(s)[/bold blue]")
+        deadline = time.monotonic() + self.connect_timeout
+        connections = []
+        while len(connections) < self.expected_workers:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                for sock, _ in connections:
+                    send_message(sock, SHUTDOWN)
+                    sock.close()
+                raise TimeoutError(f"Only {len(connections)} of {self.expected_workers} workers connected "
+                                   f"within {self.connect_timeout:g}s")
+            self._server.settimeout(remaining)
+            try:
+                sock, address = self._server.accept()
+            except socket.timeout:
+                continue
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.settimeout(min(self.handshake_timeout, max(deadline - time.monotonic(), 0.001)))
+            try:
+                kind, hello = recv_message(sock)
+            except (OSError, ProtocolError, ValueError) as e:
+                rprint(f"[yellow]  ⚠️  Dropped connection from {address[0]}: no HELLO ({type(e).__name__})[/yellow]")
+                sock.close()
+                continue
+            if kind != HELLO:
+                sock.close()
+                continue
+            sock.settimeout(None)
+            rprint(f"[green]  ✅ {hello['worker_id']} connected from {address[0]} "
+                   f"({hello.get('concurrency', 1)} threads)[/green]")
+            connections.append((sock, hello))
+        return connections
+
+    def _serve_worker(self, sock: socket.socket, worker: WorkerSummary, assignment: dict):
+        metadata = {"worker": worker.worker_id, "host": worker.host, "parameters": self.job.parameters}
+        try:
+            send_message(sock, ASSIGN, assignment)
+            while True:
+                kind, payload = recv_message(sock)
+                if kind == RESULTS:
+                    runs = [decode_run(record, metadata) for record in payload]
+                    with self._lock:
+                        self._runs.extend(runs)
+                elif kind == DONE:
+                    worker.runs = payload["runs"]
+                    worker.failed = payload["failed"]
+                    worker.elapsed_s = payload["elapsed_s"]
+                    with self._lock:
+                        for stage, data in payload["histograms"].items():
+                            histogram = LatencyHistogram.from_dict(data)
+                            if stage in self._histograms:
+                                self._histograms[stage].merge(histogram)
+                            else:
+                                self._histograms[stage] = histogram
+                    send_message(sock, SHUTDOWN)
+                    rprint(f"[green]  🏁 {worker.worker_id}: {worker.runs} runs in {worker.elapsed_s:.2f}s[/green]")
+                    return
+                elif kind == ERROR:
+                    worker.error = payload.get("error")
+                    rprint(f"[red]  ❌ {worker.worker_id}: {worker.error}[/red]")
+                    return
+        except Exception as e:
+            worker.error = worker.error or f"{type(e).__name__}: {e}"
+            rprint(f"[red]  ❌ {worker.worker_id}: {worker.error}[/red]")
+        finally:
+            sock.close()
+
+
+def spawn_local_workers(count: int, port: int, concurrency: int = 1, host: str = "127.0.0.1") -> List[subprocess.Popen]:
+    """Start worker processes on this machine, e.g. to exercise the protocol on localhost."""
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "thanos.cli", "distributed", "worker",
+             "--connect", f"{host}:{port}", "--concurrency", str(concurrency)],
+            stdout=subprocess.DEVNULL,
+        )
+        for _ in range(count)
+    ]
@@ -0,0 +1,93 @@
+import math
+from typing import Dict, Iterable, Optional
+
+from thanos.percentiles import nearest_rank_index
+
+
+class LatencyHistogram:
+    """Sparse log-bucketed histogram of latencies in ms.
+
+    Bucket boundaries grow by a fixed ratio, so every recorded value is
+    known to within ``precision`` (1% by default) regardless of magnitude.
+    Histograms with the same precision merge by adding bucket counts, which
+    lets workers ship a few hundred integers instead of every sample.
+    """
+
+    def __init__(self, precision: float = 0.01, min_value: float = 0.001):
+        self.precision = precision
+        self.min_value = min_value
+        self._log_base = math.log1p(precision)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return math.ceil(math.log(value / self.min_value) / self._log_base)
+
+    def _upper_bound(self, index: int) -> float:
+        return self.min_value * math.exp(index * self._log_base)
+
+    def record(self, value: float):
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def record_many(self, values: Iterable[float]):
+        for value in values:
+            self.record(value)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        if other.precision != self.precision or other.min_value != self.min_value:
+            raise ValueError("Only histograms with the same precision and minimum can be merged")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Nearest-rank percentile, accurate to the bucket precision."""
+        if not self.count:
+            return None
+        rank = nearest_rank_index(self.count, percent / 100) + 1
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self._upper_bound(index), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        return {
+            "precision": self.precision,
+            "min_value": self.min_value,
+            "buckets": [[index, count] for index, count in self.buckets.items()],
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'LatencyHistogram':
+        histogram = cls(data["precision"], data["min_value"])
+        histogram.buckets = {int(index): count for index, count in data["buckets"]}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
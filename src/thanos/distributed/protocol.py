@@ -0,0 +1,98 @@
+"""Wire protocol between coordinator and workers.
+
+Every message is one frame: a 4-byte big-endian payload length, a 1-byte
+message type and a compact JSON payload. Stage results travel as positional
+lists rather than objects to keep RESULTS frames small.
+"""
+
+import json
+import socket
+import struct
+from datetime import datetime
+from typing import Any, List, Tuple
+
+from thanos.cache import StageResult, TestRunResult
+
+HELLO = 1      # worker -> coordinator: identity and capacity
+ASSIGN = 2     # coordinator -> worker: the job and this worker's quota
+RESULTS = 3    # worker -> coordinator: a batch of finished runs
+DONE = 4       # worker -> coordinator: quota finished, with merged histograms
+ERROR = 5      # either way: fatal error description
+SHUTDOWN = 6   # coordinator -> worker: disconnect
+
+MESSAGE_NAMES = {HELLO: "HELLO", ASSIGN: "ASSIGN", RESULTS: "RESULTS", DONE: "DONE", ERROR: "ERROR",
+                 SHUTDOWN: "SHUTDOWN"}
+
+_HEADER = struct.Struct(">IB")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+STATUS_CODES = {"PASSED": 0, "FAILED": 1, "SKIPPED": 2, "ERROR": 3, "IN_PROGRESS": 4}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+
+class ProtocolError(Exception):
+    """The peer sent something that is not a valid frame or closed mid-frame."""
+
+
+def send_message(sock: socket.socket, kind: int, payload: Any = None):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    if len(body) > MAX_FRAME_BYTES:
+        raise ProtocolError(f"{MESSAGE_NAMES.get(kind, kind)} frame of {len(body)} bytes exceeds the limit")
+    sock.sendall(_HEADER.pack(len(body), kind) + body)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ProtocolError("Connection closed by peer")
+        received += count
+    return bytes(buffer)
+
+
+def recv_message(sock: socket.socket) -> Tuple[int, Any]:
+    """Block until one complete frame arrives; returns (message type, payload)."""
+    length, kind = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    if length > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame of {length} bytes exceeds the limit")
+    return kind, json.loads(_recv_exactly(sock, length)) if length else None
+
+
+def _micros(moment: datetime) -> int:
+    return int(moment.timestamp() * 1_000_000)
+
+
+def encode_run(run: TestRunResult) -> list:
+    """[run_id, status, timestamp_us, [[stage, status, start_us, duration_ms], ...]]"""
+    return [
+        run.run_id,
+        STATUS_CODES.get(run.overall_status, 3),
+        _micros(run.timestamp),
+        [[stage.name, STATUS_CODES.get(stage.status, 3), _micros(stage.start_time), round(stage.duration_ms, 4)]
+         for stage in run.stage_results],
+    ]
+
+
+def decode_run(record: List, metadata: dict) -> TestRunResult:
+    """Rebuild a TestRunResult from encode_run output; stage result data is not transferred."""
+    run_id, status, timestamp_us, stages = record
+    run = TestRunResult(
+        run_id=run_id,
+        timestamp=datetime.fromtimestamp(timestamp_us / 1_000_000),
+        overall_status=STATUS_NAMES.get(status, "ERROR"),
+        metadata=dict(metadata),
+    )
+    for name, stage_status, start_us, duration_ms in stages:
+        start = datetime.fromtimestamp(start_us / 1_000_000)
+        run.stage_results.append(StageResult(
+            name=name,
+            status=STATUS_NAMES.get(stage_status, "ERROR"),
+            result_data=None,
+            start_time=start,
+            end_time=datetime.fromtimestamp((start_us + duration_ms * 1000) / 1_000_000),
+            duration_ms=duration_ms,
+        ))
+    return run
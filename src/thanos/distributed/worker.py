@@ -0,0 +1,204 @@
+"""Worker side: executes a share of the coordinator's workflow runs."""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+
+from rich import print as rprint
+
+from thanos.bench.framework import quiet
+from thanos.cache import TestCache
+from thanos.clock import VirtualClock
+from thanos.dataset import SHARD_COUNT_ENV, SHARD_INDEX_ENV
+from thanos.fixtures import FixtureManager
+from thanos.stage import TestStage
+from thanos.workflow import WorkflowRunner
+
+from .histogram import LatencyHistogram
+from .protocol import ASSIGN, DONE, ERROR, HELLO, RESULTS, SHUTDOWN, encode_run, recv_message, send_message
+
+
+def resolve_workflow(job: dict):
+    """Stage definitions for the job's workflow: a registered template, or the HTTP workflow against base_url."""
+    from thanos.testing.stage_factory import StageFactory, WorkflowTemplateRegistry
+
+    if job.get("base_url"):
+        return StageFactory.create_http_workflow(job["base_url"])
+    return WorkflowTemplateRegistry.get_template(job["workflow"]).stages
+
+
+def connect(host: str, port: int, timeout: float = 30.0) -> socket.socket:
+    """Connect to the coordinator, retrying while it is not yet listening."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port), timeout=timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.settimeout(None)
+            return sock
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+class Worker:
+    """Runs assigned workflow runs on ``concurrency`` threads and streams results back.
+
+    Each thread owns a WorkflowRunner and a histogram per stage; the
+    histograms are merged once the quota is done. Finished runs are sent in
+    batches of ``batch_size`` or every ``flush_interval`` seconds, whichever
+    comes first.
+    """
+
+    def __init__(self, host: str, port: int, concurrency: int = 1, worker_id: Optional[str] = None,
+                 batch_size: int = 200, flush_interval: float = 0.5):
+        self.host = host
+        self.port = port
+        self.concurrency = concurrency
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._sock: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._pending: List[list] = []
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def run(self) -> Optional[dict]:
+        """Connect, execute the assignment and return its summary once the coordinator says goodbye.
+
+        Returns None when the coordinator sends the worker away without a job.
+        Stage output goes to stdout; silence it in the process entry point
+        (see :func:`run_worker`), since redirecting stdout here would swap it
+        for every thread of the process.
+        """
+        self._sock = connect(self.host, self.port)
+        try:
+            send_message(self._sock, HELLO, {"worker_id": self.worker_id, "host": socket.gethostname(),
+                                             "pid": os.getpid(), "concurrency": self.concurrency})
+            kind, job = recv_message(self._sock)
+            if kind == SHUTDOWN:
+                return None
+            if kind != ASSIGN:
+                raise RuntimeError(f"Expected ASSIGN from coordinator, got message type {kind}")
+            rprint(f"[bold blue]🛠️  Worker {self.worker_id}: {job.get('runs') or 'timed'} runs of "
+                   f"'{job['workflow']}' on {self.concurrency} threads[/bold blue]")
+
+            try:
+                summary = self._execute(job)
+            except Exception as e:
+                send_message(self._sock, ERROR, {"error": f"{type(e).__name__}: {e}"})
+                raise
+
+            self._flush(force=True)
+            send_message(self._sock, DONE, summary)
+            # Wait for the coordinator to acknowledge before disconnecting
+            recv_message(self._sock)
+            return summary
+        finally:
+            self._sock.close()
+
+    def _execute(self, job: dict) -> dict:
+        if "shard_index" in job:
+            # Dataset feeders in this process read only this worker's shard
+            os.environ[SHARD_INDEX_ENV] = str(job["shard_index"])
+            os.environ[SHARD_COUNT_ENV] = str(job["shard_count"])
+        definitions = resolve_workflow(job)
+        remaining = [job.get("runs")]
+        claim_lock = threading.Lock()
+        deadline = time.monotonic() + job["duration_s"] if job.get("duration_s") else None
+        fixtures = FixtureManager()
+        histograms: List[Dict[str, LatencyHistogram]] = []
+        counts = {"runs": 0, "failed": 0}
+        counts_lock = threading.Lock()
+        metadata = {"worker": self.worker_id, "parameters": job.get("parameters", {})}
+
+        def claim() -> bool:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            if remaining[0] is None:
+                return True
+            with claim_lock:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+                return True
+
+        def loop():
+            local: Dict[str, LatencyHistogram] = {}
+            histograms.append(local)
+            runner = WorkflowRunner(cache=TestCache(), fixtures=fixtures,
+                                    clock=VirtualClock() if job.get("simulate") else None)
+            runner.testcase = job["workflow"]
+            runner.metadata = metadata
+            while claim():
+                runner.clear_stages()
+                for definition in definitions:
+                    runner.add_stage(TestStage(name=definition.name, action=definition.action,
+                                               dependencies=definition.dependencies, scope=definition.scope,
+                                               teardown=definition.teardown))
+                run_id = runner.execute_workflow()
+                run = runner.cache.get_run_result(run_id)
+                # Results live on the coordinator; don't accumulate them here
+                runner.cache.clear()
+                for stage in run.stage_results:
+                    if stage.status != "SKIPPED":
+                        local.setdefault(stage.name, LatencyHistogram()).record(stage.duration_ms)
+                with counts_lock:
+                    counts["runs"] += 1
+                    counts["failed"] += run.overall_status != "PASSED"
+                with self._pending_lock:
+                    self._pending.append(encode_run(run))
+                self._flush()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=loop, name=f"thanos-worker-{i}") for i in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        fixtures.teardown()
+
+        merged: Dict[str, LatencyHistogram] = {}
+        for local in histograms:
+            for stage, histogram in local.items():
+                if stage in merged:
+                    merged[stage].merge(histogram)
+                else:
+                    merged[stage] = histogram
+        return {
+            "runs": counts["runs"],
+            "failed": counts["failed"],
+            "elapsed_s": time.perf_counter() - start,
+            "histograms": {stage: histogram.to_dict() for stage, histogram in merged.items()},
+        }
+
+    def _flush(self, force: bool = False):
+        with self._pending_lock:
+            due = len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval
+            if not self._pending or not (force or due):
+                return
+            batch, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        with self._send_lock:
+            send_message(self._sock, RESULTS, batch)
+
+
+def run_worker(host: str, port: int, concurrency: int = 1, worker_id: Optional[str] = None,
+               verbose: bool = False):
+    """Entry point of a worker process; stage output is discarded unless ``verbose``."""
+    worker = Worker(host, port, concurrency, worker_id)
+    rprint(f"[bold blue]🛠️  Worker {worker.worker_id} connecting to {host}:{port} "
+           f"on {concurrency} threads[/bold blue]")
+    with ExitStack() as stack:
+        if not verbose:
+            stack.enter_context(quiet())
+        summary = worker.run()
+    if summary is not None:
+        rprint(f"[green]🏁 Worker {worker.worker_id}: {summary['runs']} runs "
+               f"({summary['failed']} failed) in {summary['elapsed_s']:.2f}s[/green]")
@@ -16,13 +16,9 @@ class PerfTestSuite(TestSuiteTemplate):
     
     def get_test_configuration(self) -> TestConfiguration:
         """Define test configuration using the builder"""
-        return create_performance_test_config().build()
+        return create_performance_test_config().with_max_workers(4).build()
     
-    @testcase(
-        name="WorkflowTest", 
-        tags=["performance", "workflow"], 
-        parameters={"rate": (2,4), "duration": (3,5), "threshold": (6, 20)},
-    )
-    def test_my_workflow(self, env, result, rate, duration, threshold):
-        """Execute workflow test using template method"""
-        return self.execute_workflow_test(env, result, rate=rate, duration=duration, threshold=threshold)
\ No newline at end of file
+    @testcase(name="WorkflowTest", tags=["performance", "workflow"])
+    def test_my_workflow(self, env, result):
+        """Execute every parameter combination concurrently, one result group each"""
+        return self.execute_workflow_matrix(env, result)
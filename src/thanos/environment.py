@@ -0,0 +1,171 @@
+"""Process-wide capture of host environment and hardware information.
+
+Collecting hardware details is slow (testplan samples CPU usage for a full
+second), and the result is identical for every suite running in the same
+process. The snapshot is therefore captured once, written to a single JSON
+file and attached to each suite report by reference. A short hash of the
+stable machine properties lets result rows be grouped by host without
+storing the snapshot itself alongside every run.
+
+Values of environment variables whose names look like credentials (tokens,
+passwords, keys, ...) are redacted before the snapshot is kept or written.
+The file is private to the user (mode 0600, in a private temporary
+directory) and removed when the process exits; testplan copies attachments
+into the report when it exports it.
+"""
+
+import hashlib
+import json
+import os
+import platform
+import re
+import shutil
+import socket
+import tempfile
+import threading
+from multiprocessing import util
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from rich import print as rprint
+
+REDACTED = "<redacted>"
+# Matched against upper-cased variable names
+SECRET_NAME = re.compile(r"TOKEN|SECRET|PASSW|PWD$|KEY|CREDENTIAL|AUTH|COOKIE|SESSION|PRIVATE|SIGNATURE|DSN|CONN")
+# user:password@ in URLs held by variables with innocuous names
+_URL_CREDENTIALS = re.compile(r"(?<=://)[^/@\s]+@")
+
+
+@dataclass(frozen=True)
+class EnvironmentSnapshot:
+    """Redacted environment variables and hardware details captured once per process."""
+    host: str
+    fingerprint: str
+    captured_at: datetime
+    environment: Dict[str, str]
+    hardware: Dict[str, Any]
+    path: Path
+
+    @property
+    def short_fingerprint(self) -> str:
+        return self.fingerprint[:12]
+
+
+_snapshot: Optional[EnvironmentSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def machine_fingerprint() -> str:
+    """Stable hash of the machine identity, cheap enough to tag every run.
+
+    Only properties that do not change while the machine is up are hashed
+    (host name, OS, architecture, CPU count, total memory, Python build), so
+    runs from different processes on the same host share a fingerprint.
+    """
+    identity = {
+        "host": socket.getfqdn(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "memory_total": _total_memory(),
+        "python": platform.python_version(),
+    }
+    encoded = json.dumps(identity, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _total_memory() -> Optional[int]:
+    """Physical memory in bytes, where the platform exposes it."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def get_environment_snapshot() -> EnvironmentSnapshot:
+    """Return the process-wide snapshot, capturing it on first use."""
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = _capture_snapshot()
+    return _snapshot
+
+
+def reset_environment_snapshot():
+    """Drop the cached snapshot so the next call captures a fresh one."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def redact_environment(environment: Dict[str, str]) -> Dict[str, str]:
+    """A copy of environment with credential-like values replaced by ``REDACTED``."""
+    return {
+        name: REDACTED if SECRET_NAME.search(name.upper()) else _URL_CREDENTIALS.sub(f"{REDACTED}@", value)
+        for name, value in environment.items()
+    }
+
+
+def _write_private(payload: Dict[str, Any], name: str) -> Path:
+    """Write payload as JSON readable only by this user, removed when the process exits."""
+    directory = tempfile.mkdtemp(prefix="thanos-environment-")
+    # util.Finalize also runs in multiprocessing workers, which exit without atexit handlers
+    util.Finalize(None, shutil.rmtree, args=(directory,), kwargs={"ignore_errors": True}, exitpriority=0)
+    path = Path(directory) / name
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True, default=str)
+    return path
+
+
+def _capture_snapshot() -> EnvironmentSnapshot:
+    """Collect environment and hardware information and write it to a private file."""
+    from testplan.common.utils.helper import get_hardware_info
+
+    rprint("[dim]📸 Capturing environment and hardware snapshot...[/dim]")
+    fingerprint = machine_fingerprint()
+    host = socket.getfqdn()
+    captured_at = datetime.now()
+    environment = redact_environment(dict(os.environ))
+    hardware = get_hardware_info()
+
+    path = _write_private({
+        "host": host,
+        "fingerprint": fingerprint,
+        "captured_at": captured_at.isoformat(),
+        "environment": environment,
+        "hardware": hardware,
+    }, f"environment-{fingerprint[:12]}.json")
+
+    return EnvironmentSnapshot(
+        host=host,
+        fingerprint=fingerprint,
+        captured_at=captured_at,
+        environment=environment,
+        hardware=hardware,
+        path=path,
+    )
+
+
+def log_environment_snapshot(result):
+    """Reference the cached snapshot from a testplan result.
+
+    Replaces ``helper.log_environment`` / ``helper.log_hardware``: the host and
+    fingerprint are logged inline and the full snapshot is attached as a file,
+    which testplan stores once no matter how many suites attach it.
+    """
+    snapshot = get_environment_snapshot()
+    result.log(snapshot.host, description="Current Host")
+    result.log(snapshot.fingerprint, description="Machine fingerprint")
+    result.attach(
+        str(snapshot.path),
+        description=f"Environment and hardware snapshot ({snapshot.short_fingerprint})",
+    )
+    return snapshot
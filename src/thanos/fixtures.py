@@ -0,0 +1,145 @@
+"""Scoped fixture values for stages whose results can be shared between runs."""
+
+import atexit
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from rich import print as rprint
+
+
+class FixtureScope:
+    """Lifetimes a stage result can be shared for."""
+    PER_RUN = "per-run"
+    PER_TESTCASE = "per-testcase"
+    PER_SUITE = "per-suite"
+    PER_PROCESS = "per-process"
+
+    ALL = (PER_RUN, PER_TESTCASE, PER_SUITE, PER_PROCESS)
+
+    @classmethod
+    def validate(cls, scope: str) -> str:
+        if scope not in cls.ALL:
+            raise ValueError(f"Unknown fixture scope '{scope}', expected one of {cls.ALL}")
+        return scope
+
+
+@dataclass
+class FixtureValue:
+    """A computed fixture and the hook that releases it."""
+    value: Any
+    teardown: Optional[Callable[[Any], None]] = None
+
+
+class FixtureStore:
+    """
+    Thread-safe store of lazily computed fixture values for one scope instance.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._values: Dict[Hashable, FixtureValue] = {}
+        self._order: List[Hashable] = []
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any],
+                      teardown: Optional[Callable[[Any], None]] = None) -> Tuple[Any, bool]:
+        """Return the value for key, running factory only if it is not yet computed.
+
+        Concurrent callers for the same key wait for the first one instead of
+        computing the value twice. If factory raises, nothing is stored and the
+        next caller tries again. Returns ``(value, created)``.
+        """
+        entry = self._values.get(key)
+        if entry is not None:
+            return entry.value, False
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._values.get(key)
+            if entry is not None:
+                return entry.value, False
+            value = factory()
+            with self._lock:
+                self._values[key] = FixtureValue(value=value, teardown=teardown)
+                self._order.append(key)
+            return value, True
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def teardown(self):
+        """Run teardown hooks in reverse creation order and forget all values."""
+        with self._lock:
+            entries = [(key, self._values[key]) for key in reversed(self._order)]
+            self._values.clear()
+            self._order.clear()
+            self._key_locks.clear()
+
+        for key, entry in entries:
+            if entry.teardown is None:
+                continue
+            try:
+                entry.teardown(entry.value)
+            except Exception as e:
+                rprint(f"[bold red]❌ Teardown of fixture '{_key_name(key)}' ({self.name}) failed: {e}[/bold red]")
+
+
+class FixtureManager:
+    """
+    Resolves the store that backs each fixture scope for a test suite.
+    """
+    def __init__(self):
+        self.suite = FixtureStore("suite")
+        self._testcases: Dict[str, FixtureStore] = {}
+        self._lock = threading.Lock()
+
+    def store_for(self, scope: str, testcase: Optional[str] = None) -> Optional[FixtureStore]:
+        """Return the store for a scope, or None for per-run stages."""
+        FixtureScope.validate(scope)
+        if scope == FixtureScope.PER_RUN:
+            return None
+        if scope == FixtureScope.PER_PROCESS:
+            return process_fixtures()
+        if scope == FixtureScope.PER_SUITE:
+            return self.suite
+
+        name = testcase or "default"
+        with self._lock:
+            store = self._testcases.get(name)
+            if store is None:
+                store = self._testcases[name] = FixtureStore(f"testcase:{name}")
+        return store
+
+    def teardown_testcase(self, testcase: str):
+        """Release the fixtures shared by the runs of one testcase."""
+        with self._lock:
+            store = self._testcases.pop(testcase, None)
+        if store is not None:
+            store.teardown()
+
+    def teardown(self):
+        """Release testcase and suite fixtures; process fixtures live until exit."""
+        with self._lock:
+            stores = list(self._testcases.values())
+            self._testcases.clear()
+        for store in stores:
+            store.teardown()
+        self.suite.teardown()
+
+
+def _key_name(key: Hashable) -> str:
+    return key[0] if isinstance(key, tuple) else str(key)
+
+
+_process_store = FixtureStore("process")
+atexit.register(_process_store.teardown)
+
+
+def process_fixtures() -> FixtureStore:
+    """The store shared by every suite and runner in this process."""
+    return _process_store
@@ -0,0 +1,248 @@
+"""Opt-in memory instrumentation for workflow runs.
+
+A :class:`MemoryProfiler` given to ``WorkflowRunner`` takes a tracemalloc
+snapshot and reads the process RSS before and after every stage. For each
+stage it keeps the traced-memory delta and peak, the RSS delta, the top
+allocation sites by growth and the retained size of the stage result; at the
+end of a run it measures the retained size of every context entry. Comparing
+these across runs shows which stage or result object keeps growing.
+
+Snapshots are expensive, so only enable this while hunting a leak.
+"""
+
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Deque, Dict, Iterator, List, Optional
+from rich import print as rprint
+from rich.table import Table
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Allocations made by the profiler itself are not interesting
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process, or 0 where it cannot be read."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Only the peak is available here; ru_maxrss is bytes on macOS, KiB elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Bytes retained by obj and everything reachable from it through containers and attributes.
+
+    Objects shared between entries are counted once per call; classes,
+    modules and functions are not followed.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(current))
+        try:
+            total += sys.getsizeof(current)
+        except TypeError:
+            continue
+
+        if isinstance(current, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        if hasattr(current, "__dict__"):
+            stack.append(vars(current))
+        for slot in getattr(type(current), "__slots__", ()):
+            if hasattr(current, slot):
+                stack.append(getattr(current, slot))
+    return total
+
+
+@dataclass
+class AllocationSite:
+    """Net allocations at one source line during a stage"""
+    location: str
+    size_delta_kb: float
+    count_delta: int
+
+
+@dataclass
+class StageMemoryProfile:
+    """Memory measurements around one stage execution"""
+    stage: str
+    traced_delta_kb: float
+    traced_peak_kb: float
+    rss_before_mb: float
+    rss_after_mb: float
+    result_size_kb: float
+    top_sites: List[AllocationSite] = field(default_factory=list)
+
+    @property
+    def rss_delta_mb(self) -> float:
+        return self.rss_after_mb - self.rss_before_mb
+
+
+@dataclass
+class RunMemoryProfile:
+    """Per-stage profiles and retained context sizes of one workflow run"""
+    run_id: str
+    rss_start_mb: float
+    rss_end_mb: float = 0.0
+    stages: List[StageMemoryProfile] = field(default_factory=list)
+    context_sizes_kb: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        for stage, profile in zip(data["stages"], self.stages):
+            stage["rss_delta_mb"] = profile.rss_delta_mb
+        return data
+
+    def summary(self) -> dict:
+        """A few numbers for the run's metadata; the full profile is too big to keep with every run"""
+        largest = max(self.stages, key=lambda profile: profile.traced_delta_kb, default=None)
+        return {
+            "rss_start_mb": round(self.rss_start_mb, 2),
+            "rss_end_mb": round(self.rss_end_mb, 2),
+            "traced_delta_kb": round(sum(profile.traced_delta_kb for profile in self.stages), 1),
+            "traced_peak_kb": round(max((profile.traced_peak_kb for profile in self.stages), default=0.0), 1),
+            "largest_stage": largest.stage if largest is not None else None,
+        }
+
+
+class MemoryProfiler:
+    """Collects a RunMemoryProfile for every workflow the runner executes.
+
+    Only the latest ``keep_runs`` profiles are kept, and :meth:`take` hands
+    one over for good, so profiling a soak run does not itself grow without
+    bound. tracemalloc is started on first use if it is not already tracing
+    and is stopped again by :meth:`stop`. ``frames`` is the traceback depth kept per
+    allocation; 1 groups by line, larger values let ``group_by="traceback"``
+    show who called the allocating line.
+    """
+
+    def __init__(self, top_n: int = 10, frames: int = 1, group_by: str = "lineno", keep_runs: int = 256):
+        self.top_n = top_n
+        self.frames = frames
+        self.group_by = group_by
+        self.runs: Deque[RunMemoryProfile] = deque(maxlen=keep_runs)
+        self._started_tracing = False
+        # Snapshots cover the whole process, so stages are profiled one at a time
+        self._lock = threading.RLock()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+
+    def stop(self):
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+
+    def begin_run(self, run_id: str) -> RunMemoryProfile:
+        self.start()
+        run = RunMemoryProfile(run_id=run_id, rss_start_mb=current_rss_bytes() / (1024 * 1024))
+        with self._lock:
+            self.runs.append(run)
+        return run
+
+    def take(self, run_id: str) -> Optional[RunMemoryProfile]:
+        """Remove and return the profile of a run, None if it was never kept or is already gone"""
+        with self._lock:
+            for run in self.runs:
+                if run.run_id == run_id:
+                    self.runs.remove(run)
+                    return run
+        return None
+
+    def end_run(self, run: RunMemoryProfile, context: Dict[str, Any]):
+        """Record the retained size of every context entry at the end of the run"""
+        run.context_sizes_kb = {name: deep_sizeof(value) / 1024 for name, value in context.items()}
+        run.rss_end_mb = current_rss_bytes() / (1024 * 1024)
+
+    @contextmanager
+    def profile_stage(self, run: RunMemoryProfile, stage_name: str, context: Dict[str, Any]) -> Iterator[None]:
+        """Measure the enclosed stage; its result is looked up in context afterwards."""
+        with self._lock:
+            gc.collect()
+            before = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            traced_before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            rss_before = current_rss_bytes()
+            try:
+                yield
+            finally:
+                _, traced_peak = tracemalloc.get_traced_memory()
+                gc.collect()
+                # Read totals before the second snapshot adds its own allocations
+                traced_after, _ = tracemalloc.get_traced_memory()
+                rss_after = current_rss_bytes()
+                after = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+                growth = [diff for diff in after.compare_to(before, self.group_by) if diff.size_diff > 0]
+                run.stages.append(StageMemoryProfile(
+                    stage=stage_name,
+                    traced_delta_kb=(traced_after - traced_before) / 1024,
+                    traced_peak_kb=max(traced_peak - traced_before, 0) / 1024,
+                    rss_before_mb=rss_before / (1024 * 1024),
+                    rss_after_mb=rss_after / (1024 * 1024),
+                    result_size_kb=deep_sizeof(context[stage_name]) / 1024 if stage_name in context else 0.0,
+                    top_sites=[
+                        AllocationSite(
+                            location=self._format_location(diff.traceback),
+                            size_delta_kb=diff.size_diff / 1024,
+                            count_delta=diff.count_diff,
+                        )
+                        for diff in growth[:self.top_n]
+                    ],
+                ))
+
+    @staticmethod
+    def _format_location(traceback: tracemalloc.Traceback) -> str:
+        return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in traceback)
+
+    def report(self, run: Optional[RunMemoryProfile] = None, sites: int = 3):
+        """Print per-stage measurements, top allocation sites and context sizes of a run."""
+        run = run or (self.runs[-1] if self.runs else None)
+        if run is None:
+            return
+
+        table = Table(title=f"🧠 Memory profile of run {run.run_id}")
+        for column in ("Stage", "Traced Δ (KiB)", "Traced peak (KiB)", "RSS Δ (MiB)", "Result (KiB)", "Top allocation sites"):
+            table.add_column(column, justify="left" if column in ("Stage", "Top allocation sites") else "right")
+        for profile in run.stages:
+            top = "\n".join(f"{site.size_delta_kb:+.1f} KiB {site.location}" for site in profile.top_sites[:sites])
+            table.add_row(profile.stage, f"{profile.traced_delta_kb:+.1f}", f"{profile.traced_peak_kb:.1f}",
+                          f"{profile.rss_delta_mb:+.2f}", f"{profile.result_size_kb:.1f}", top or "-")
+        rprint(table)
+
+        if run.context_sizes_kb:
+            largest = sorted(run.context_sizes_kb.items(), key=lambda item: item[1], reverse=True)
+            rprint("[bold]Retained context entries:[/bold] " +
+                   ", ".join(f"[cyan]{name}[/cyan]={size:.1f} KiB" for name, size in largest))
+        rprint(f"[dim]RSS {run.rss_start_mb:.1f} MiB -> {run.rss_end_mb:.1f} MiB[/dim]")
@@ -0,0 +1,17 @@
+"""Local stand-in services for exercising workflows without real backends."""
+
+from .server import (
+    LatencyDistribution,
+    MockServiceConfig,
+    MockService,
+    MockServiceThread,
+    run_mock_server,
+)
+
+__all__ = [
+    'LatencyDistribution',
+    'MockServiceConfig',
+    'MockService',
+    'MockServiceThread',
+    'run_mock_server',
+]
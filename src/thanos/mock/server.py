@@ -0,0 +1,350 @@
+"""Asyncio stand-in for the service behind the standard user workflow.
+
+Implements the login / create-user / check-profile / cleanup endpoints with
+configurable latency distributions, error rates and a throughput cap. The
+HTTP handling is a minimal HTTP/1.1 protocol (keep-alive and pipelining, no
+chunked bodies) written directly on ``asyncio.Protocol`` so that a single
+core can serve tens of thousands of requests per second.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+from rich import print as rprint
+
+STATUS_REASONS = {
+    200: b"OK",
+    201: b"Created",
+    400: b"Bad Request",
+    404: b"Not Found",
+    405: b"Method Not Allowed",
+    500: b"Internal Server Error",
+}
+
+ENDPOINTS = ("login", "create_user", "check_user_profile", "cleanup_data")
+
+
+class LatencyDistribution:
+    """Samples response latencies in milliseconds.
+
+    Specs look like ``constant:5``, ``uniform:2,10``, ``normal:mean=5,stddev=1``,
+    ``lognormal:median=5,sigma=0.5`` or ``exponential:mean=5``.
+    """
+
+    def __init__(self, kind: str = "constant", **params: float):
+        self.kind = kind
+        self.params = params
+        self._sample = self._build_sampler(kind, params)
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyDistribution':
+        kind, _, args = spec.partition(":")
+        kind = kind.strip().lower()
+        positional = {
+            "constant": ("value",),
+            "uniform": ("low", "high"),
+            "normal": ("mean", "stddev"),
+            "lognormal": ("median", "sigma"),
+            "exponential": ("mean",),
+        }
+        if kind not in positional:
+            raise ValueError(f"Unknown latency distribution '{kind}' in '{spec}'")
+
+        names = positional[kind]
+        params = {}
+        for index, item in enumerate(filter(None, (part.strip() for part in args.split(",")))):
+            if "=" in item:
+                name, value = item.split("=", 1)
+                name = name.strip()
+            elif index < len(names):
+                name, value = names[index], item
+            else:
+                raise ValueError(f"Too many parameters for '{kind}' in '{spec}'")
+            if name not in names:
+                raise ValueError(f"Unknown parameter '{name}' for '{kind}' in '{spec}', expected {', '.join(names)}")
+            params[name] = float(value)
+        return cls(kind, **params)
+
+    @staticmethod
+    def _build_sampler(kind: str, params: Dict[str, float]) -> Callable[[], float]:
+        if kind == "constant":
+            value = params.get("value", 0.0)
+            return lambda: value
+        if kind == "uniform":
+            low, high = params.get("low", 0.0), params.get("high", 0.0)
+            return lambda: random.uniform(low, high)
+        if kind == "normal":
+            mean, stddev = params.get("mean", 0.0), params.get("stddev", 0.0)
+            return lambda: max(0.0, random.gauss(mean, stddev))
+        if kind == "lognormal":
+            mu, sigma = math.log(max(params.get("median", 1.0), 1e-9)), params.get("sigma", 0.0)
+            return lambda: random.lognormvariate(mu, sigma)
+        if kind == "exponential":
+            mean = params.get("mean", 0.0)
+            return (lambda: random.expovariate(1.0 / mean)) if mean > 0 else (lambda: 0.0)
+        raise ValueError(f"Unknown latency distribution '{kind}'")
+
+    def sample(self) -> float:
+        return self._sample()
+
+    @property
+    def is_zero(self) -> bool:
+        return self.kind == "constant" and self.params.get("value", 0.0) == 0.0
+
+    def __repr__(self):
+        args = ",".join(f"{name}={value:g}" for name, value in self.params.items())
+        return f"{self.kind}:{args}"
+
+
+@dataclass
+class MockServiceConfig:
+    """Behaviour of the mock service."""
+    host: str = "127.0.0.1"
+    port: int = 8080
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    endpoint_latency: Dict[str, LatencyDistribution] = field(default_factory=dict)
+    error_rate: float = 0.0
+    max_rps: Optional[float] = None
+
+    def latency_for(self, endpoint: str) -> LatencyDistribution:
+        return self.endpoint_latency.get(endpoint, self.latency)
+
+
+class ThroughputLimiter:
+    """Spaces admissions to at most ``rate`` per second by queueing excess requests."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+
+    def delay(self, now: float) -> float:
+        """Seconds the request admitted at ``now`` has to wait for its slot."""
+        start = max(now, self._next_slot)
+        self._next_slot = start + self.interval
+        return start - now
+
+
+class MockService:
+    """In-memory state and request routing of the mock service."""
+
+    USER_PATH = re.compile(r"^/users/([^/?]+)$")
+
+    def __init__(self, config: MockServiceConfig):
+        self.config = config
+        self.users: Dict[str, dict] = {}
+        self.requests = 0
+        self.errors = 0
+        self.limiter = ThroughputLimiter(config.max_rps) if config.max_rps else None
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[str, int, object]:
+        """Route a request; returns (endpoint, status, json payload)."""
+        self.requests += 1
+        if method == "POST" and path == "/login":
+            return "login", 200, {"session_id": uuid.uuid4().hex}
+
+        if method == "POST" and path == "/users":
+            try:
+                data = json.loads(body) if body else {}
+            except ValueError:
+                return "create_user", 400, {"error": "invalid JSON body"}
+            user_id = data.get("user_id") or f"user_{uuid.uuid4().hex[:12]}"
+            user = {"user_id": user_id, "username": data.get("username", "test_user")}
+            self.users[user_id] = user
+            return "create_user", 201, user
+
+        if path == "/stats" and method == "GET":
+            return "stats", 200, {"requests": self.requests, "errors": self.errors, "users": len(self.users)}
+
+        if path == "/health" and method == "GET":
+            return "health", 200, {"status": "ok"}
+
+        match = self.USER_PATH.match(path)
+        if match:
+            user_id = match.group(1)
+            if method == "GET":
+                user = self.users.get(user_id)
+                return ("check_user_profile", 200, user) if user else ("check_user_profile", 404, {"error": "no such user"})
+            if method == "DELETE":
+                removed = self.users.pop(user_id, None)
+                return ("cleanup_data", 200, {"deleted": user_id}) if removed else ("cleanup_data", 404, {"error": "no such user"})
+            return "user", 405, {"error": "method not allowed"}
+
+        return "unknown", 404, {"error": f"no route for {method} {path}"}
+
+    def respond(self, method: str, path: str, body: bytes, now: float) -> Tuple[float, int, bytes]:
+        """Handle a request and decide its injected delay; returns (delay_s, status, payload)."""
+        endpoint, status, payload = self.handle(method, path, body)
+        if self.config.error_rate and endpoint in ENDPOINTS and random.random() < self.config.error_rate:
+            self.errors += 1
+            status, payload = 500, {"error": "injected failure"}
+
+        delay = 0.0
+        distribution = self.config.latency_for(endpoint)
+        if not distribution.is_zero:
+            delay = distribution.sample() / 1000.0
+        if self.limiter is not None:
+            delay += self.limiter.delay(now)
+        return delay, status, json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    head = b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n" % (
+        status, STATUS_REASONS.get(status, b"Unknown"), len(body))
+    if not keep_alive:
+        head += b"Connection: close\r\n"
+    return head + b"\r\n" + body
+
+
+class MockHttpProtocol(asyncio.Protocol):
+    """One client connection; supports keep-alive and in-order pipelined responses."""
+
+    def __init__(self, service: MockService):
+        self.service = service
+        self.loop = asyncio.get_running_loop()
+        self.transport = None
+        self.buffer = bytearray()
+        # Responses not yet written, in request order: [payload or None, keep_alive]
+        self.pending: deque = deque()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        while True:
+            header_end = self.buffer.find(b"\r\n\r\n")
+            if header_end < 0:
+                return
+            head = bytes(self.buffer[:header_end])
+            lower = head.lower()
+            content_length = 0
+            position = lower.find(b"\r\ncontent-length:")
+            if position >= 0:
+                line_end = lower.find(b"\r\n", position + 2)
+                value = lower[position + 17:line_end if line_end >= 0 else None]
+                content_length = int(value.strip() or 0)
+            body_start = header_end + 4
+            if len(self.buffer) < body_start + content_length:
+                return
+            body = bytes(self.buffer[body_start:body_start + content_length])
+            del self.buffer[:body_start + content_length]
+
+            request_line = head.split(b"\r\n", 1)[0].split(b" ")
+            if len(request_line) < 3:
+                self._enqueue(0.0, 400, b'{"error":"bad request line"}', keep_alive=False)
+                return
+            keep_alive = b"\r\nconnection: close" not in lower and request_line[2] != b"HTTP/1.0"
+            method = request_line[0].decode("ascii", "replace")
+            path = request_line[1].decode("utf-8", "replace")
+            delay, status, payload = self.service.respond(method, path, body, self.loop.time())
+            self._enqueue(delay, status, payload, keep_alive)
+            if not keep_alive:
+                return
+
+    def _enqueue(self, delay: float, status: int, payload: bytes, keep_alive: bool):
+        response = _encode_response(status, payload, keep_alive)
+        if delay <= 0 and not self.pending:
+            self._write(response, keep_alive)
+            return
+        entry = [None, keep_alive]
+        self.pending.append(entry)
+        self.loop.call_later(max(delay, 0.0), self._complete, entry, response)
+
+    def _complete(self, entry: list, response: bytes):
+        entry[0] = response
+        while self.pending and self.pending[0][0] is not None:
+            ready, keep_alive = self.pending.popleft()
+            self._write(ready, keep_alive)
+
+    def _write(self, response: bytes, keep_alive: bool):
+        if self.transport is None or self.transport.is_closing():
+            return
+        self.transport.write(response)
+        if not keep_alive:
+            self.transport.close()
+
+
+async def serve(config: MockServiceConfig, ready: Optional[asyncio.Event] = None) -> None:
+    """Run the mock service until cancelled."""
+    service = MockService(config)
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(lambda: MockHttpProtocol(service), config.host, config.port,
+                                      reuse_address=True, backlog=1024)
+    config.port = server.sockets[0].getsockname()[1]
+    rprint(f"[bold green]🧪 Mock service listening on http://{config.host}:{config.port}[/bold green]")
+    rprint(f"[dim]latency={config.latency!r} per-endpoint={config.endpoint_latency} "
+           f"error_rate={config.error_rate} max_rps={config.max_rps}[/dim]")
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def run_mock_server(config: MockServiceConfig):
+    """Blocking entry point; uses uvloop when it is installed."""
+    try:
+        import uvloop
+        runner = uvloop.run
+    except ImportError:
+        runner = asyncio.run
+    try:
+        runner(serve(config))
+    except KeyboardInterrupt:
+        rprint("[yellow]Mock service stopped.[/yellow]")
+
+
+class MockServiceThread:
+    """Runs the mock service on a background thread, e.g. for local checks of HTTP stages."""
+
+    def __init__(self, config: Optional[MockServiceConfig] = None):
+        self.config = config or MockServiceConfig(port=0)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.config.host}:{self.config.port}"
+
+    def start(self) -> 'MockServiceThread':
+        import threading
+
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            ready = asyncio.Event()
+            self._task = self._loop.create_task(serve(self.config, ready))
+            self._loop.create_task(ready.wait()).add_done_callback(lambda _: started.set())
+            try:
+                self._loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="thanos-mock-service", daemon=True)
+        self._thread.start()
+        if not started.wait(timeout=10):
+            raise RuntimeError("Mock service did not start within 10s")
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            self._thread.join(timeout=10)
+
+    def __enter__(self) -> 'MockServiceThread':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
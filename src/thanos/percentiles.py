@@ -0,0 +1,44 @@
+"""The percentile definition shared by every latency report in thanos.
+
+Percentiles are nearest-rank: the p-th percentile of n sorted values is the
+value at index ``ceil(p * n) - 1``. It is always an observed latency, so the
+p50 of 1..10 ms is 5 and the p90 is 9, whether it is read from an SLA, the
+engine summary, the live metrics endpoint or ``thanos analyze``.
+
+Latencies are those of executed stages, i.e. ``LATENCY_STATUSES``; skipped
+stages never ran and carry no latency.
+"""
+
+import math
+from typing import Optional, Sequence
+
+import polars as pl
+
+LATENCY_STATUSES = ("PASSED", "FAILED")
+
+
+def nearest_rank_index(count: int, q: float) -> int:
+    """Index of the q-th (0 < q <= 1) nearest-rank percentile among count sorted values."""
+    # Rounding first keeps e.g. 0.07 * 100 = 7.000000000000001 at rank 7
+    return max(math.ceil(round(q * count, 9)) - 1, 0)
+
+
+def nearest_rank(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values, None when there are none."""
+    if not sorted_values:
+        return None
+    return sorted_values[nearest_rank_index(len(sorted_values), q)]
+
+
+def nearest_rank_expr(values: pl.Expr, q: float) -> pl.Expr:
+    """Aggregation: nearest-rank percentile of a column (per group in a group_by)."""
+    return values.sort().get(_index_expr(values.len(), q))
+
+
+def nearest_rank_list(sorted_lists: pl.Expr, q: float) -> pl.Expr:
+    """Nearest-rank percentile of each list of already sorted values; null for empty lists."""
+    return sorted_lists.list.get(_index_expr(sorted_lists.list.len(), q), null_on_oob=True)
+
+
+def _index_expr(count: pl.Expr, q: float) -> pl.Expr:
+    return ((count * q).round(9).ceil().cast(pl.Int64) - 1).clip(lower_bound=0)
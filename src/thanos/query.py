@@ -0,0 +1,261 @@
+"""Queries over cached and stored runs, and the indexes that answer them.
+
+A :class:`RunQuery` describes runs by overall status, stage (and the status
+that stage had), suite, testcase, label, time range and parameters recorded
+in the run metadata. ``TestCache.query`` and ``ResultStore.query`` both accept one.
+
+:class:`RunIndex` keeps posting sets of run ids per indexed value plus
+per-minute time buckets, so a query only touches the runs in its most
+selective posting set instead of every cached run.
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import polars as pl
+
+if TYPE_CHECKING:
+    from thanos.cache import TestRunResult
+
+
+def parameter_key(value: Any) -> str:
+    """Canonical text of a parameter value, as matched by indexes and stored JSON."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, default=str)
+
+
+@dataclass
+class RunQuery:
+    """Which runs to return; unset fields match everything.
+
+    ``stage_status`` without ``stage`` matches runs where any stage had that
+    status. Matching runs come back newest first, at most ``limit`` of them.
+    """
+    status: Optional[str] = None
+    stage: Optional[str] = None
+    stage_status: Optional[str] = None
+    suite: Optional[str] = None
+    testcase: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    # The result label, recorded in the metadata of runs executed by a suite
+    label: Optional[str] = None
+    limit: Optional[int] = None
+
+    def index_keys(self) -> List[tuple]:
+        """Posting keys a matching run must be filed under."""
+        keys = []
+        if self.status is not None:
+            keys.append(("status", self.status))
+        if self.stage is not None:
+            keys.append(("stage", self.stage) if self.stage_status is None
+                        else ("stage_status", self.stage, self.stage_status))
+        elif self.stage_status is not None:
+            keys.append(("stage_status", None, self.stage_status))
+        if self.suite is not None:
+            keys.append(("suite", self.suite))
+        if self.testcase is not None:
+            keys.append(("testcase", self.testcase))
+        if self.label is not None:
+            keys.append(("label", self.label))
+        for name, value in self.parameters.items():
+            keys.append(("parameter", name, parameter_key(value)))
+        return keys
+
+    def matches(self, run: 'TestRunResult') -> bool:
+        metadata = run.metadata or {}
+        if self.status is not None and run.overall_status != self.status:
+            return False
+        if self.since is not None and run.timestamp < self.since:
+            return False
+        if self.until is not None and run.timestamp >= self.until:
+            return False
+        if self.suite is not None and metadata.get("suite") != self.suite:
+            return False
+        if self.testcase is not None and metadata.get("testcase") != self.testcase:
+            return False
+        if self.label is not None and metadata.get("label") != self.label:
+            return False
+        if self.parameters:
+            parameters = metadata.get("parameters") or {}
+            for name, value in self.parameters.items():
+                if name not in parameters or parameter_key(parameters[name]) != parameter_key(value):
+                    return False
+        if self.stage is not None or self.stage_status is not None:
+            return any((self.stage is None or stage.name == self.stage)
+                       and (self.stage_status is None or stage.status == self.stage_status)
+                       for stage in run.stage_results)
+        return True
+
+    def finish(self, runs: Iterable['TestRunResult']) -> List['TestRunResult']:
+        """Order matched runs newest first and apply the limit."""
+        ordered = sorted(runs, key=lambda run: run.timestamp, reverse=True)
+        return ordered[:self.limit] if self.limit is not None else ordered
+
+    def to_polars(self) -> List[pl.Expr]:
+        """Row filters over the stage-result schema of thanos.store."""
+        conditions = []
+        for column, value in (("overall_status", self.status), ("stage", self.stage),
+                              ("stage_status", self.stage_status), ("suite", self.suite),
+                              ("testcase", self.testcase), ("label", self.label)):
+            if value is not None:
+                conditions.append(pl.col(column) == value)
+        if self.since is not None:
+            conditions.append(pl.col("run_timestamp") >= self.since)
+        if self.until is not None:
+            conditions.append(pl.col("run_timestamp") < self.until)
+        for name, value in self.parameters.items():
+            conditions.append(pl.col("parameters").str.json_path_match(f"$.{name}") == parameter_key(value))
+        return conditions
+
+
+def run_index_keys(run: 'TestRunResult') -> Set[tuple]:
+    """Every posting key a run is filed under."""
+    metadata = run.metadata or {}
+    keys = {("status", run.overall_status)}
+    for stage in run.stage_results:
+        keys.add(("stage", stage.name))
+        keys.add(("stage_status", stage.name, stage.status))
+        keys.add(("stage_status", None, stage.status))
+    for name in ("suite", "testcase", "label"):
+        if metadata.get(name) is not None:
+            keys.add((name, metadata[name]))
+    for name, value in (metadata.get("parameters") or {}).items():
+        keys.add(("parameter", name, parameter_key(value)))
+    return keys
+
+
+class RunIndex:
+    """Secondary indexes over a set of runs, by run id.
+
+    Not thread-safe; ConcurrentTestCache keeps one per stripe, guarded by
+    the stripe lock.
+    """
+
+    def __init__(self, bucket_s: int = 60):
+        self.bucket_s = bucket_s
+        self.postings: Dict[tuple, Set[str]] = {}
+        self.buckets: Dict[int, Set[str]] = {}
+
+    def _bucket(self, moment: datetime) -> int:
+        return int(moment.timestamp() // self.bucket_s)
+
+    def add(self, run: 'TestRunResult'):
+        for key in run_index_keys(run):
+            self.postings.setdefault(key, set()).add(run.run_id)
+        self.buckets.setdefault(self._bucket(run.timestamp), set()).add(run.run_id)
+
+    def remove(self, run: 'TestRunResult'):
+        for key in run_index_keys(run):
+            posting = self.postings.get(key)
+            if posting is not None:
+                posting.discard(run.run_id)
+                if not posting:
+                    del self.postings[key]
+        bucket = self._bucket(run.timestamp)
+        posting = self.buckets.get(bucket)
+        if posting is not None:
+            posting.discard(run.run_id)
+            if not posting:
+                del self.buckets[bucket]
+
+    def clear(self):
+        self.postings.clear()
+        self.buckets.clear()
+
+    def candidates(self, query: RunQuery) -> Optional[Set[str]]:
+        """Run ids that may match, smallest posting sets intersected first; None if nothing is indexed."""
+        sets: List[Set[str]] = []
+        for key in query.index_keys():
+            posting = self.postings.get(key)
+            if not posting:
+                return set()
+            sets.append(posting)
+        if query.since is not None or query.until is not None:
+            low = self._bucket(query.since) if query.since is not None else None
+            high = self._bucket(query.until) if query.until is not None else None
+            in_range = [run_ids for bucket, run_ids in self.buckets.items()
+                        if (low is None or bucket >= low) and (high is None or bucket <= high)]
+            # Only worth materializing when the time range is more selective than the postings;
+            # otherwise matches() checks the timestamps of the few candidates
+            if not sets or sum(map(len, in_range)) < min(map(len, sets)):
+                sets.append(set().union(*in_range))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            result &= other
+            if not result:
+                break
+        return result
+
+
+@dataclass
+class FileIndex:
+    """What one Parquet file of a ResultStore contains, to skip files a query cannot match."""
+    rows: int
+    runs: int
+    min_timestamp: Optional[datetime]
+    max_timestamp: Optional[datetime]
+    # column -> distinct values; parameters as "name=value" strings
+    values: Dict[str, Set[str]]
+
+    @classmethod
+    def build(cls, frame: pl.DataFrame) -> 'FileIndex':
+        values = {}
+        for column in ("label", "suite", "testcase", "overall_status", "stage"):
+            values[column] = {value for value in frame[column].unique().to_list() if value is not None}
+        values["stage_status"] = {f"{stage}={status}" for stage, status
+                                  in frame.select("stage", "stage_status").unique().iter_rows()}
+        values["stage_status"] |= {f"={status}" for status in frame["stage_status"].unique().to_list()}
+        values["parameters"] = set()
+        for text in frame["parameters"].unique().to_list():
+            for name, value in json.loads(text or "{}").items():
+                values["parameters"].add(f"{name}={parameter_key(value)}")
+        return cls(
+            rows=frame.height,
+            runs=frame["run_id"].n_unique(),
+            min_timestamp=frame["run_timestamp"].min(),
+            max_timestamp=frame["run_timestamp"].max(),
+            values=values,
+        )
+
+    def may_match(self, query: RunQuery) -> bool:
+        checks: List[Tuple[str, Optional[str]]] = [
+            ("label", query.label), ("suite", query.suite), ("testcase", query.testcase),
+            ("overall_status", query.status), ("stage", query.stage),
+        ]
+        if query.stage_status is not None:
+            checks.append(("stage_status", f"{query.stage or ''}={query.stage_status}"))
+        checks.extend(("parameters", f"{name}={parameter_key(value)}") for name, value in query.parameters.items())
+        if any(value is not None and value not in self.values[column] for column, value in checks):
+            return False
+        if query.since is not None and self.max_timestamp is not None and self.max_timestamp < query.since:
+            return False
+        if query.until is not None and self.min_timestamp is not None and self.min_timestamp >= query.until:
+            return False
+        return True
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "runs": self.runs,
+            "min_timestamp": self.min_timestamp.isoformat() if self.min_timestamp else None,
+            "max_timestamp": self.max_timestamp.isoformat() if self.max_timestamp else None,
+            "values": {column: sorted(values) for column, values in self.values.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FileIndex':
+        return cls(
+            rows=data["rows"],
+            runs=data["runs"],
+            min_timestamp=datetime.fromisoformat(data["min_timestamp"]) if data["min_timestamp"] else None,
+            max_timestamp=datetime.fromisoformat(data["max_timestamp"]) if data["max_timestamp"] else None,
+            values={column: set(values) for column, values in data["values"].items()},
+        )
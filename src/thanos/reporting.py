@@ -0,0 +1,142 @@
+"""On-demand rendering of serialized testplan reports.
+
+Test runs only write the compact JSON report produced by testplan's JSON
+exporter. Documents (PDF or HTML) are generated afterwards from that file,
+either in the foreground or by a detached background process.
+"""
+
+import html
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+RENDER_FORMATS = ("pdf", "html")
+
+STATUS_COLORS = {
+    "passed": "#2e7d32",
+    "failed": "#c62828",
+    "error": "#c62828",
+    "skipped": "#f9a825",
+    "xfail": "#6a1b9a",
+    "unknown": "#616161",
+}
+
+
+def load_report_data(report_path: str | Path) -> Dict[str, Any]:
+    """Load a serialized testplan report as plain python data."""
+    with open(report_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def default_output_path(report_path: str | Path, fmt: str) -> Path:
+    """Place rendered documents next to the report they were built from."""
+    return Path(report_path).with_suffix(f".{fmt}")
+
+
+def render_report(report_path: str | Path, fmt: str = "pdf", output_path: Optional[str | Path] = None,
+                  passing: str = "testcase", failing: str = "assertion-detail") -> Path:
+    """Render a serialized report to the requested format and return the output path."""
+    if fmt not in RENDER_FORMATS:
+        raise ValueError(f"Unsupported report format '{fmt}', expected one of {RENDER_FORMATS}")
+
+    output_path = Path(output_path) if output_path else default_output_path(report_path, fmt)
+    data = load_report_data(report_path)
+    if fmt == "pdf":
+        return _render_pdf(data, output_path, passing, failing)
+    return _render_html(data, output_path)
+
+
+def render_in_background(report_path: str | Path, fmt: str = "pdf",
+                         output_path: Optional[str | Path] = None) -> subprocess.Popen:
+    """Start a detached process that renders the report, without waiting for it."""
+    command = [sys.executable, "-m", "thanos.cli", "report", "render", str(report_path), "--format", fmt]
+    if output_path:
+        command += ["--output", str(output_path)]
+    return subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _render_pdf(data: Dict[str, Any], output_path: Path, passing: str, failing: str) -> Path:
+    """Rebuild the testplan report object and feed it to testplan's PDF exporter."""
+    from testplan.exporters.testing.pdf import PDFExporter
+    from testplan.report import TestReport
+    from testplan.report.testing.styles import Style
+
+    report = TestReport.deserialize(data)
+    exporter = PDFExporter(
+        pdf_path=str(output_path),
+        pdf_style=Style(passing=passing, failing=failing),
+    )
+    return Path(exporter.create_pdf(report))
+
+
+def _render_html(data: Dict[str, Any], output_path: Path) -> Path:
+    """Write a self-contained HTML page with collapsible report sections."""
+    body = _html_entry(data, depth=0)
+    title = html.escape(str(data.get("name", "Test report")))
+    document = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+details {{ margin-left: 1.2em; }}
+summary {{ cursor: pointer; padding: 2px 0; }}
+.status {{ font-weight: bold; }}
+.entry {{ margin-left: 2.4em; font-family: monospace; white-space: pre-wrap; }}
+.entry.failed {{ color: {STATUS_COLORS['failed']}; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(document, encoding="utf-8")
+    return output_path
+
+
+def _html_entry(entry: Dict[str, Any], depth: int) -> str:
+    """Render a report node (plan, multitest, suite, testcase) or an assertion entry."""
+    if entry.get("type") not in ("TestReport", "TestGroupReport", "TestCaseReport"):
+        return _html_assertion(entry)
+
+    status = str(entry.get("status", "unknown"))
+    color = STATUS_COLORS.get(status, STATUS_COLORS["unknown"])
+    name = html.escape(str(entry.get("name", "")))
+    children = "".join(_html_entry(child, depth + 1) for child in entry.get("entries", []))
+    is_open = " open" if depth < 2 or status in ("failed", "error") else ""
+    return (
+        f'<details{is_open}><summary>{name} '
+        f'<span class="status" style="color: {color}">{status.upper()}</span></summary>'
+        f"{children}</details>"
+    )
+
+
+def _html_assertion(entry: Dict[str, Any]) -> str:
+    """Render a single serialized assertion or log entry."""
+    if entry.get("type") == "Group":
+        return "".join(_html_assertion(child) for child in entry.get("entries", []))
+
+    description = entry.get("description") or entry.get("type", "")
+    if entry.get("meta_type") == "assertion":
+        passed = entry.get("passed")
+        marker = "✅" if passed else "❌"
+        css = "entry" if passed else "entry failed"
+        detail = ""
+        if "first" in entry and "second" in entry:
+            detail = f" ({entry['first']!r} {entry.get('label', '==')} {entry['second']!r})"
+        return f'<div class="{css}">{marker} {html.escape(str(description) + detail)}</div>'
+
+    message = entry.get("message", "")
+    text = f"{description}: {message}" if message and message != description else str(description)
+    return f'<div class="entry">📝 {html.escape(text)}</div>'
@@ -0,0 +1,350 @@
+"""A result cache shared by the processes of a run.
+
+Every writer process owns one ring buffer in ``multiprocessing.shared_memory``
+holding fixed-size stage and run records, and one append-only payload file
+for what does not fit a record (stage result data, run metadata, long names).
+Publishing a run is a handful of ``pack_into`` calls and at most one file
+write: nothing is sent to the parent. The parent finds rings through small
+registration files in the cache directory and drains them on every read and,
+while :meth:`SharedTestCache.start_draining` is in effect, from a background
+thread, so ``SharedTestCache`` is a live view over all writers.
+
+Each ring has a single producer (guarded by an in-process lock) and a single
+consumer, the parent. A producer never waits for the consumer: a run that
+does not fit in its ring is dropped and counted right away.
+"""
+
+import atexit
+import json
+import os
+import pickle
+import secrets
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from thanos.cache import CacheSnapshot, ConcurrentTestCache, StageResult, TestRunResult
+
+SHARED_CACHE_ENV = "THANOS_SHARED_CACHE"
+
+_MAGIC = b"THSC"
+_VERSION = 1
+# magic, version, record size, capacity, write sequence, read sequence, dropped runs
+_HEADER = struct.Struct("<4sIIIQQQ")
+_HEADER_SIZE = 64
+_U64 = struct.Struct("<Q")
+_WRITE_SEQ_OFFSET = 16
+_READ_SEQ_OFFSET = 24
+_DROPPED_OFFSET = 32
+# sequence + 1, kind, status, flags, run id, name, start/timestamp us, end us, duration ms, payload offset, length
+_RECORD = struct.Struct("<QBBH36s64sqqdQI12x")
+
+_STAGE, _RUN = 1, 2
+_HAS_PAYLOAD = 1
+
+STATUS_CODES = {"PASSED": 0, "FAILED": 1, "SKIPPED": 2, "ERROR": 3, "IN_PROGRESS": 4}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+
+def _untrack(segment: shared_memory.SharedMemory):
+    # The resource tracker would unlink the segment when this process exits;
+    # its lifetime belongs to the SharedTestCache that owns the directory.
+    resource_tracker.unregister(segment._name, "shared_memory")
+
+
+def _micros(moment: datetime) -> int:
+    return int(moment.timestamp() * 1_000_000)
+
+
+def _from_micros(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1_000_000)
+
+
+def _fixed(text: str, size: int) -> Tuple[bytes, bool]:
+    """Encode text for a fixed-width field; False if it does not fit."""
+    encoded = text.encode("utf-8")
+    return (encoded, True) if len(encoded) <= size else (b"", False)
+
+
+class SharedRingWriter:
+    """Producer end of one process' ring. Thread-safe within the process."""
+
+    def __init__(self, directory: str, capacity: int = 65536):
+        self.directory = Path(directory)
+        self.capacity = capacity
+        token = f"{os.getpid()}-{secrets.token_hex(4)}"
+        self.segment = shared_memory.SharedMemory(name=f"thanos_{token}", create=True,
+                                                  size=_HEADER_SIZE + capacity * _RECORD.size)
+        _untrack(self.segment)
+        _HEADER.pack_into(self.segment.buf, 0, _MAGIC, _VERSION, _RECORD.size, capacity, 0, 0, 0)
+        self._payloads = open(self.directory / f"{token}.payloads", "ab", buffering=0)
+        self._write_seq = 0
+        self._lock = threading.Lock()
+
+        # Register last, once the ring is ready to be read
+        registration = self.directory / f"{token}.ring"
+        temporary = registration.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"segment": self.segment.name, "payloads": self._payloads.name,
+                                         "pid": os.getpid(), "capacity": capacity}))
+        os.replace(temporary, registration)
+
+    def _payload(self, payload: dict) -> Tuple[int, int]:
+        try:
+            data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            data = pickle.dumps({key: repr(value) for key, value in payload.items()})
+        offset = self._payloads.tell()
+        self._payloads.write(data)
+        return offset, len(data)
+
+    def _record(self, kind: int, run_id: str, name: str, status: str, start_us: int, end_us: int,
+                duration_ms: float, extra: dict) -> bytes:
+        run_id_field, run_id_fits = _fixed(run_id, 36)
+        name_field, name_fits = _fixed(name, 64)
+        payload = {key: value for key, value in extra.items() if value is not None}
+        if not run_id_fits:
+            payload["run_id"] = run_id
+        if not name_fits:
+            payload["name"] = name
+        offset, length = self._payload(payload) if payload else (0, 0)
+        return _RECORD.pack(0, kind, STATUS_CODES.get(status, 3), _HAS_PAYLOAD if payload else 0,
+                            run_id_field, name_field, start_us, end_us, duration_ms, offset, length)
+
+    def publish(self, run: TestRunResult) -> bool:
+        """Append the run's stage records and then its run record; False (and counted) if the ring is full."""
+        with self._lock:
+            records = [self._record(_STAGE, run.run_id, stage.name, stage.status, _micros(stage.start_time),
+                                    _micros(stage.end_time), stage.duration_ms, {"data": stage.result_data})
+                       for stage in run.stage_results]
+            records.append(self._record(_RUN, run.run_id, "", run.overall_status, _micros(run.timestamp), 0,
+                                        0.0, {"metadata": run.metadata or None}))
+
+            buf = self.segment.buf
+            if self._write_seq + len(records) - _U64.unpack_from(buf, _READ_SEQ_OFFSET)[0] > self.capacity:
+                dropped = _U64.unpack_from(buf, _DROPPED_OFFSET)[0]
+                _U64.pack_into(buf, _DROPPED_OFFSET, dropped + 1)
+                return False
+
+            for record in records:
+                offset = _HEADER_SIZE + (self._write_seq % self.capacity) * _RECORD.size
+                buf[offset:offset + _RECORD.size] = record
+                # The sequence stamp goes in last so the reader can tell a finished slot
+                _U64.pack_into(buf, offset, self._write_seq + 1)
+                self._write_seq += 1
+            _U64.pack_into(buf, _WRITE_SEQ_OFFSET, self._write_seq)
+            return True
+
+    def close(self):
+        with self._lock:
+            self._payloads.close()
+            self.segment.close()
+
+
+class _RingReader:
+    """Consumer end of one writer's ring, used by SharedTestCache."""
+
+    def __init__(self, registration: dict):
+        # Stays registered with the resource tracker: unlink() in close() releases it, and the
+        # tracker cleans up if this process dies first
+        self.segment = shared_memory.SharedMemory(name=registration["segment"])
+        magic, version, record_size, capacity, _, _, _ = _HEADER.unpack_from(self.segment.buf, 0)
+        if magic != _MAGIC or version != _VERSION or record_size != _RECORD.size:
+            raise ValueError(f"Shared memory segment {registration['segment']} is not a Thanos ring")
+        self.capacity = capacity
+        self.payloads = open(registration["payloads"], "rb")
+        self.read_seq = _U64.unpack_from(self.segment.buf, _READ_SEQ_OFFSET)[0]
+        # Stage records of runs whose run record has not arrived yet
+        self.pending: Dict[str, List[StageResult]] = {}
+
+    @property
+    def dropped(self) -> int:
+        return _U64.unpack_from(self.segment.buf, _DROPPED_OFFSET)[0]
+
+    def _payload(self, offset: int, length: int) -> dict:
+        return pickle.loads(os.pread(self.payloads.fileno(), length, offset))
+
+    def drain(self) -> Iterator[TestRunResult]:
+        buf = self.segment.buf
+        write_seq = _U64.unpack_from(buf, _WRITE_SEQ_OFFSET)[0]
+        while self.read_seq < write_seq:
+            offset = _HEADER_SIZE + (self.read_seq % self.capacity) * _RECORD.size
+            (stamp, kind, status, flags, run_id, name, start_us, end_us, duration_ms, payload_offset,
+             payload_length) = _RECORD.unpack_from(buf, offset)
+            if stamp != self.read_seq + 1:
+                # Published sequence ran ahead of the slot stamp; pick it up on the next drain
+                break
+            self.read_seq += 1
+            payload = self._payload(payload_offset, payload_length) if flags & _HAS_PAYLOAD else {}
+            run_id = payload.get("run_id") or run_id.rstrip(b"\0").decode("utf-8")
+            if kind == _STAGE:
+                self.pending.setdefault(run_id, []).append(StageResult(
+                    name=payload.get("name") or name.rstrip(b"\0").decode("utf-8"),
+                    status=STATUS_NAMES.get(status, "ERROR"),
+                    result_data=payload.get("data"),
+                    start_time=_from_micros(start_us),
+                    end_time=_from_micros(end_us),
+                    duration_ms=duration_ms,
+                ))
+            else:
+                yield TestRunResult(
+                    run_id=run_id,
+                    timestamp=_from_micros(start_us),
+                    overall_status=STATUS_NAMES.get(status, "ERROR"),
+                    stage_results=self.pending.pop(run_id, []),
+                    metadata=payload.get("metadata") or {},
+                )
+        # Hand the slots back to the producer
+        _U64.pack_into(buf, _READ_SEQ_OFFSET, self.read_seq)
+
+    def close(self, unlink: bool):
+        self.payloads.close()
+        self.segment.close()
+        if unlink:
+            try:
+                self.segment.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedTestCache(ConcurrentTestCache):
+    """
+    Live, merged view of the results published by every process attached to
+    ``directory`` (a fresh temporary directory by default).
+
+    Pass :attr:`directory` to the other processes, e.g. through
+    ``$THANOS_SHARED_CACHE``, and attach there with :func:`shared_cache_writer`.
+    Reads drain the rings first; runs added in this process directly are
+    kept alongside. Writers drop runs when their ring is full, so while
+    other processes publish, keep the rings drained every ``drain_interval``
+    seconds with :meth:`start_draining` (entering the cache as a context
+    manager does so). Closing the cache unlinks the shared memory segments.
+    """
+    def __init__(self, directory: Optional[str] = None, stripes: int = 16, drain_interval: float = 0.05):
+        super().__init__(stripes=stripes, log_writes=False)
+        self._owns_directory = directory is None
+        self.directory = Path(directory or tempfile.mkdtemp(prefix="thanos-shared-"))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.drain_interval = drain_interval
+        self._readers: Dict[str, _RingReader] = {}
+        self._drain_lock = threading.Lock()
+        self._drainer: Optional[threading.Thread] = None
+        self._stop_draining = threading.Event()
+
+    def refresh(self) -> int:
+        """Pick up new writers and the runs they published since the last read; returns the count."""
+        added = 0
+        with self._drain_lock:
+            for registration in sorted(self.directory.glob("*.ring")):
+                if registration.name not in self._readers:
+                    self._readers[registration.name] = _RingReader(json.loads(registration.read_text()))
+            for reader in self._readers.values():
+                for run in reader.drain():
+                    super().add_run_result(run)
+                    added += 1
+        return added
+
+    def _drain_loop(self):
+        while not self._stop_draining.wait(self.drain_interval):
+            self.refresh()
+
+    def start_draining(self) -> bool:
+        """Drain the rings from a daemon thread until :meth:`stop_draining` or :meth:`close`.
+
+        Returns False if the thread was already running.
+        """
+        if self._drainer is not None:
+            return False
+        self._stop_draining.clear()
+        self._drainer = threading.Thread(target=self._drain_loop, name="thanos-shared-cache-drain", daemon=True)
+        self._drainer.start()
+        return True
+
+    def stop_draining(self):
+        if self._drainer is None:
+            return
+        self._stop_draining.set()
+        self._drainer.join()
+        self._drainer = None
+
+    @property
+    def dropped(self) -> int:
+        """Runs writers dropped because their ring was full"""
+        self.refresh()
+        return sum(reader.dropped for reader in self._readers.values())
+
+    def get_run_result(self, run_id: str) -> TestRunResult | None:
+        self.refresh()
+        return super().get_run_result(run_id)
+
+    def snapshot(self) -> CacheSnapshot:
+        self.refresh()
+        return super().snapshot()
+
+    def __len__(self) -> int:
+        self.refresh()
+        return super().__len__()
+
+    def close(self):
+        """Drain what is left, then release and unlink every ring."""
+        self.stop_draining()
+        self.refresh()
+        with self._drain_lock:
+            for reader in self._readers.values():
+                reader.close(unlink=True)
+            self._readers.clear()
+        if self._owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> 'SharedTestCache':
+        self.start_draining()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PublishingTestCache(ConcurrentTestCache):
+    """A process-local cache that also publishes every run it receives to a shared ring."""
+    def __init__(self, writer: SharedRingWriter, stripes: int = 16):
+        super().__init__(stripes=stripes)
+        self.writer = writer
+
+    def add_run_result(self, run_result: TestRunResult):
+        super().add_run_result(run_result)
+        self.writer.publish(run_result)
+
+
+_writers: Dict[str, SharedRingWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def shared_cache_writer(directory: Optional[str] = None) -> Optional[SharedRingWriter]:
+    """This process' ring for ``directory`` (default ``$THANOS_SHARED_CACHE``), or None if unset."""
+    directory = directory or os.environ.get(SHARED_CACHE_ENV)
+    if not directory:
+        return None
+    with _writers_lock:
+        writer = _writers.get(directory)
+        if writer is None:
+            writer = _writers[directory] = SharedRingWriter(directory)
+            atexit.register(writer.close)
+    return writer
+
+
+def create_test_cache(wal_path: Optional[str] = None) -> ConcurrentTestCache:
+    """The cache a suite should record into.
+
+    Backed by a write-ahead log at ``wal_path`` if given, and publishing when
+    a shared cache is configured.
+    """
+    writer = shared_cache_writer()
+    if wal_path is not None:
+        from thanos.wal import DurableTestCache
+        return DurableTestCache(wal_path, writer=writer)
+    return PublishingTestCache(writer) if writer is not None else ConcurrentTestCache()
@@ -1,9 +1,12 @@
 # thanos/stage.py
 
 from dataclasses import dataclass
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Optional
 from rich import print as rprint
 
+from thanos.fixtures import FixtureScope
+from thanos.tracing import get_tracer
+
 @dataclass
 class TestStage:
     name: str
@@ -11,18 +14,30 @@ class TestStage:
     dependencies: list[str]
     result: Any = None
     status: str = "PENDING"
+    scope: str = FixtureScope.PER_RUN
+    teardown: Optional[Callable[[Any], None]] = None
+
+    def fixture_key(self) -> tuple:
+        """Identity of this stage's result when it is shared as a fixture."""
+        return (self.name, getattr(self.action, "__module__", None),
+                getattr(self.action, "__qualname__", repr(self.action)))
     
     def run(self, context: Dict[str, Any]):
         """
         Executes the action of the test stage and updates its status and result.
         """
-        rprint(f"\n[bold blue]🚀 Running stage:[/bold blue] [bold cyan]{self.name}[/bold cyan]")
+        tracer = get_tracer()
+        with tracer.span("print", "print"):
+            rprint(f"\n[bold blue]🚀 Running stage:[/bold blue] [bold cyan]{self.name}[/bold cyan]")
         try:
-            self.result = self.action(context)
+            with tracer.span("action", "action", stage=self.name):
+                self.result = self.action(context)
             self.status = "PASSED"
-            rprint(f"[bold green]✅ Stage '{self.name}' PASSED.[/bold green]")
+            with tracer.span("print", "print"):
+                rprint(f"[bold green]✅ Stage '{self.name}' PASSED.[/bold green]")
         except Exception as e:
             self.result = str(e)
             self.status = "FAILED"
-            rprint(f"[bold red]❌ Stage '{self.name}' FAILED: {e}[/bold red]")
+            with tracer.span("print", "print"):
+                rprint(f"[bold red]❌ Stage '{self.name}' FAILED: {e}[/bold red]")
             raise  # Re-raise to stop further dependent stages
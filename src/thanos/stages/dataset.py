@@ -0,0 +1,32 @@
+import threading
+from typing import Any, Dict
+
+from rich import print as rprint
+
+from thanos.dataset import DatasetFeeder
+
+
+class DatasetStage:
+    """
+    Stage action that returns a row of a dataset, e.g. the user a run signs up.
+
+    Every run gets the next row of the feeder. With ``per_user`` each thread
+    driving runs (a virtual user) draws one row and keeps it for all of its
+    runs. Later stages read the row from the context, for instance as
+    ``{user_row[username]}`` in an HttpStage template.
+    """
+    def __init__(self, feeder: DatasetFeeder, per_user: bool = False):
+        self.feeder = feeder
+        self.per_user = per_user
+        self._local = threading.local()
+        self.__name__ = "dataset_row"
+        self.__qualname__ = f"DatasetStage[{feeder.path}]"
+
+    def __call__(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.per_user:
+            return self.feeder.next_row()
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = self.feeder.next_row()
+            rprint(f"[magenta]🧾 Virtual user {threading.current_thread().name} got row {self.feeder.rows_served}[/magenta]")
+        return row
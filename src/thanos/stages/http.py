@@ -0,0 +1,248 @@
+import asyncio
+import atexit
+import json
+import select
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+from rich import print as rprint
+
+from thanos.tracing import get_tracer
+
+# Methods that may be sent again when a reused connection fails after the request went out
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+
+@dataclass
+class HttpTimings:
+    """Per-request timings in milliseconds"""
+    connect_ms: float
+    ttfb_ms: float
+    total_ms: float
+    reused_connection: bool
+
+
+class HostConnectionPool:
+    """
+    A bounded pool of keep-alive connections to a single host.
+    """
+    def __init__(self, scheme: str, host: str, port: int, max_size: int = 10, timeout: float = 10.0):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.max_size = max_size
+        self._idle: deque = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Tuple[HTTPConnection, bool]:
+        """Borrow a connection, blocking while max_size are in use. Returns (connection, reused)."""
+        self._slots.acquire()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection = self._idle.pop()
+            if not _is_dropped(connection):
+                return connection, True
+            connection.close()
+        connection_class = HTTPSConnection if self.scheme == "https" else HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout), False
+
+    def release(self, connection: HTTPConnection, reusable: bool = True):
+        """Return a borrowed connection; connections that cannot be reused are closed."""
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.append(connection)
+            else:
+                connection.close()
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+
+def _is_dropped(connection: HTTPConnection) -> bool:
+    """An idle keep-alive connection is readable only if the server closed it (or sent garbage)."""
+    if connection.sock is None:
+        return True
+    try:
+        return bool(select.select([connection.sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+
+class ConnectionPoolManager:
+    """
+    Hands out one shared HostConnectionPool per (scheme, host, port).
+    """
+    def __init__(self, max_connections_per_host: int = 10, timeout: float = 10.0):
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self._pools: Dict[Tuple[str, str, int], HostConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def get_pool(self, scheme: str, host: str, port: Optional[int]) -> HostConnectionPool:
+        port = port or (443 if scheme == "https" else 80)
+        key = (scheme, host, port)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = self._pools[key] = HostConnectionPool(
+                        scheme, host, port, self.max_connections_per_host, self.timeout
+                    )
+        return pool
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+
+default_pool_manager = ConnectionPoolManager()
+atexit.register(default_pool_manager.close_all)
+
+
+def _render(template: str, context: Dict[str, Any]) -> str:
+    """Fill str.format placeholders such as {create_user[user_id]} from the context"""
+    return template.format_map(context)
+
+
+class HttpStage:
+    """
+    Stage action that performs one HTTP request over a pooled keep-alive connection.
+
+    The URL and header values are templates filled from the workflow context,
+    e.g. ``"http://localhost:8080/users/{create_user[user_id]}"``. The body is
+    sent as given (dicts and lists as JSON); to build it from the context, pass
+    a callable taking the context. The action returns the status, headers,
+    decoded body and request timings, and raises if the status is not one of
+    the expected ones.
+
+    A reused keep-alive connection that turns out to be closed is retried once
+    on a fresh connection: always if the request could not be written, and
+    otherwise only for idempotent methods, so a POST is never sent twice.
+    """
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        expected_status: int | Tuple[int, ...] = 200,
+        headers: Optional[Dict[str, str]] = None,
+        body: Any = None,
+        pool_manager: Optional[ConnectionPoolManager] = None,
+    ):
+        self.method = method.upper()
+        self.url = url
+        self.expected_status = (expected_status,) if isinstance(expected_status, int) else tuple(expected_status)
+        self.headers = headers or {}
+        self.body = body
+        self.pool_manager = pool_manager or default_pool_manager
+        self.__name__ = f"http_{self.method.lower()}"
+        self.__qualname__ = f"HttpStage[{self.method} {self.url}]"
+
+    def __call__(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        url = _render(self.url, context)
+        headers = {name: _render(value, context) for name, value in self.headers.items()}
+        payload = self.body(context) if callable(self.body) else self.body
+
+        body_bytes = None
+        if payload is not None:
+            if isinstance(payload, (bytes, bytearray)):
+                body_bytes = bytes(payload)
+            elif isinstance(payload, str):
+                body_bytes = payload.encode("utf-8")
+            else:
+                body_bytes = json.dumps(payload).encode("utf-8")
+                headers.setdefault("Content-Type", "application/json")
+
+        rprint(f"[cyan]🌐 {self.method} {url}[/cyan]")
+        status, response_headers, raw_body, timings = self._request(url, headers, body_bytes)
+
+        if status not in self.expected_status:
+            raise AssertionError(f"{self.method} {url} returned {status}, expected {self.expected_status}")
+
+        return {
+            "status": status,
+            "headers": response_headers,
+            "body": self._decode(raw_body, response_headers),
+            "timings": asdict(timings),
+        }
+
+    async def arun(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Awaitable variant for use from asyncio code; the request runs on a worker thread."""
+        return await asyncio.to_thread(self, context)
+
+    def _request(self, url: str, headers: Dict[str, str], body: Optional[bytes]):
+        parts = urlsplit(url)
+        pool = self.pool_manager.get_pool(parts.scheme or "http", parts.hostname, parts.port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        # A reused keep-alive connection may have been closed by the server;
+        # retry once on a fresh connection in that case.
+        tracer = get_tracer()
+        for attempt in range(2):
+            with tracer.span("pool.acquire", "http"):
+                connection, reused = pool.acquire()
+            reusable = False
+            sent = False
+            try:
+                with tracer.span(f"{self.method} {target}", "http", attempt=attempt, reused=reused):
+                    start = time.perf_counter()
+                    if not reused:
+                        connection.connect()
+                        # Headers and body go out in separate writes; don't let Nagle hold the body back
+                        connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    connected = time.perf_counter()
+                    connection.request(self.method, target, body=body, headers=headers)
+                    sent = True
+                    response = connection.getresponse()
+                    first_byte = time.perf_counter()
+                    raw_body = response.read()
+                    end = time.perf_counter()
+                    reusable = not response.will_close
+            except (HTTPException, ConnectionError, OSError) as e:
+                # A timeout is a slow server, not a closed connection; a request that went out
+                # may have been processed, so only an idempotent one can be sent again
+                stale = reused and attempt == 0 and not isinstance(e, TimeoutError)
+                if stale and (not sent or self.method in IDEMPOTENT_METHODS):
+                    tracer.instant("retry", "http", reason=f"{type(e).__name__}: {e}")
+                    continue
+                raise
+            finally:
+                pool.release(connection, reusable)
+
+            timings = HttpTimings(
+                connect_ms=(connected - start) * 1000,
+                ttfb_ms=(first_byte - start) * 1000,
+                total_ms=(end - start) * 1000,
+                reused_connection=reused,
+            )
+            return response.status, dict(response.getheaders()), raw_body, timings
+
+    @staticmethod
+    def _decode(raw_body: bytes, headers: Dict[str, str]) -> Any:
+        content_type = next((value for key, value in headers.items() if key.lower() == "content-type"), "")
+        if "json" in content_type and raw_body:
+            return json.loads(raw_body)
+        try:
+            return raw_body.decode("utf-8")
+        except UnicodeDecodeError:
+            return raw_body
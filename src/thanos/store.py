@@ -0,0 +1,226 @@
+"""Persistent store of workflow run results as Parquet files.
+
+Each call to :meth:`ResultStore.append` writes one Parquet file holding one
+row per stage result, so concurrent processes (e.g. parallel engine runs)
+can write to the same directory without coordination. Reads scan all files
+lazily with polars, which keeps selecting a subset of runs cheap however
+large the store grows.
+
+Runs are grouped by a free-form ``label`` (a build number, a git sha,
+"baseline", ...) which defaults to ``$THANOS_RUN_LABEL``.
+
+Next to every Parquet file sits a small JSON index of the labels, suites,
+statuses, stages, parameters and time range it contains. Queries read the
+indexes first and only scan files that can hold matching rows.
+"""
+
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import polars as pl
+
+from thanos.cache import TestRunResult
+from thanos.query import FileIndex, RunQuery
+
+RUN_LABEL_ENV = "THANOS_RUN_LABEL"
+
+STAGE_SCHEMA = {
+    "run_id": pl.String,
+    "label": pl.String,
+    "suite": pl.String,
+    "testcase": pl.String,
+    "parameters": pl.String,
+    "run_timestamp": pl.Datetime("us"),
+    "overall_status": pl.String,
+    "machine_fingerprint": pl.String,
+    "stage": pl.String,
+    "stage_status": pl.String,
+    "start_time": pl.Datetime("us"),
+    "end_time": pl.Datetime("us"),
+    "duration_ms": pl.Float64,
+}
+
+
+def default_label() -> str:
+    return os.environ.get(RUN_LABEL_ENV, "unlabelled")
+
+
+def runs_to_frame(runs: Iterable[TestRunResult], label: Optional[str] = None,
+                  suite: Optional[str] = None) -> pl.DataFrame:
+    """Flatten run results into one row per stage result.
+
+    Suite, testcase and parameters are taken from the run metadata when the
+    runner recorded them; ``suite`` is used for runs that carry none.
+    """
+    label = label or default_label()
+    rows = {name: [] for name in STAGE_SCHEMA}
+    for run in runs:
+        metadata = run.metadata or {}
+        parameters = json.dumps(metadata.get("parameters", {}), sort_keys=True, default=str)
+        for stage in run.stage_results:
+            rows["run_id"].append(run.run_id)
+            rows["label"].append(label)
+            rows["suite"].append(metadata.get("suite", suite))
+            rows["testcase"].append(metadata.get("testcase"))
+            rows["parameters"].append(parameters)
+            rows["run_timestamp"].append(run.timestamp)
+            rows["overall_status"].append(run.overall_status)
+            rows["machine_fingerprint"].append(metadata.get("machine_fingerprint"))
+            rows["stage"].append(stage.name)
+            rows["stage_status"].append(stage.status)
+            rows["start_time"].append(stage.start_time)
+            rows["end_time"].append(stage.end_time)
+            rows["duration_ms"].append(stage.duration_ms)
+    return pl.DataFrame(rows, schema=STAGE_SCHEMA)
+
+
+@dataclass
+class RunSelector:
+    """Which stored runs to load; unset fields match everything."""
+    label: Optional[str] = None
+    suite: Optional[str] = None
+    testcase: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    run_ids: Optional[List[str]] = None
+
+    def apply(self, frame: pl.LazyFrame) -> pl.LazyFrame:
+        conditions = []
+        if self.label is not None:
+            conditions.append(pl.col("label") == self.label)
+        if self.suite is not None:
+            conditions.append(pl.col("suite") == self.suite)
+        if self.testcase is not None:
+            conditions.append(pl.col("testcase") == self.testcase)
+        if self.since is not None:
+            conditions.append(pl.col("run_timestamp") >= self.since)
+        if self.until is not None:
+            conditions.append(pl.col("run_timestamp") < self.until)
+        if self.run_ids is not None:
+            conditions.append(pl.col("run_id").is_in(self.run_ids))
+        return frame.filter(*conditions) if conditions else frame
+
+    def to_query(self) -> RunQuery:
+        """The indexed part of the selector, used to skip files"""
+        return RunQuery(label=self.label, suite=self.suite, testcase=self.testcase,
+                        since=self.since, until=self.until)
+
+
+def index_path(path: Path) -> Path:
+    """Location of the JSON index of a Parquet file"""
+    return path.with_name(path.name[:-len(".parquet")] + ".index.json")
+
+
+class ResultStore:
+    """A directory of Parquet files with one row per stage result."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        # Parquet files never change once written, so neither do their indexes
+        self._indexes: Dict[str, FileIndex] = {}
+        self._indexes_lock = threading.Lock()
+
+    def append(self, runs: Iterable[TestRunResult], label: Optional[str] = None,
+               suite: Optional[str] = None) -> Optional[Path]:
+        """Persist runs as a new Parquet file; returns its path, or None if there was nothing to write."""
+        frame = runs_to_frame(runs, label, suite)
+        if frame.is_empty():
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        path = self.directory / f"runs-{stamp}-{uuid.uuid4().hex[:8]}.parquet"
+        self._write_index(path, FileIndex.build(frame))
+        # Write under a temporary name so readers never see a partial file
+        partial = path.with_suffix(".parquet.tmp")
+        frame.write_parquet(partial)
+        os.replace(partial, path)
+        return path
+
+    def _write_index(self, path: Path, index: FileIndex):
+        target = index_path(path)
+        partial = target.with_suffix(".tmp")
+        partial.write_text(json.dumps(index.to_dict()), encoding="utf-8")
+        os.replace(partial, target)
+        with self._indexes_lock:
+            self._indexes[path.name] = index
+
+    def file_index(self, path: Path) -> FileIndex:
+        """The index of one Parquet file, built and saved if the file predates indexes."""
+        with self._indexes_lock:
+            index = self._indexes.get(path.name)
+        if index is not None:
+            return index
+        try:
+            index = FileIndex.from_dict(json.loads(index_path(path).read_text(encoding="utf-8")))
+            with self._indexes_lock:
+                self._indexes[path.name] = index
+        except (FileNotFoundError, ValueError, KeyError):
+            index = FileIndex.build(pl.read_parquet(path))
+            self._write_index(path, index)
+        return index
+
+    def reindex(self) -> int:
+        """Build the missing file indexes; returns how many files are indexed."""
+        return sum(1 for path in self.files() if self.file_index(path) is not None)
+
+    def candidate_files(self, query: RunQuery) -> List[Path]:
+        """Files whose index says they may hold rows matching query"""
+        return [path for path in self.files() if self.file_index(path).may_match(query)]
+
+    def _scan_files(self, files: List[Path]) -> pl.LazyFrame:
+        if not files:
+            return pl.LazyFrame(schema=STAGE_SCHEMA)
+        return pl.scan_parquet([str(path) for path in files])
+
+    def files(self) -> List[Path]:
+        return sorted(self.directory.glob("runs-*.parquet")) if self.directory.is_dir() else []
+
+    def scan(self) -> pl.LazyFrame:
+        """Lazy frame over every stored stage result."""
+        return self._scan_files(self.files())
+
+    def load(self, selector: Optional[RunSelector] = None) -> pl.DataFrame:
+        """Stage results of the runs matching selector."""
+        if selector is None:
+            return self.scan().collect()
+        return selector.apply(self._scan_files(self.candidate_files(selector.to_query()))).collect()
+
+    def scan_query(self, query: RunQuery) -> pl.LazyFrame:
+        """Lazy frame over the stage results matching a query, ignoring its limit."""
+        frame = self._scan_files(self.candidate_files(query))
+        conditions = query.to_polars()
+        return frame.filter(*conditions) if conditions else frame
+
+    def query(self, query: Optional[RunQuery] = None, **filters) -> pl.DataFrame:
+        """Stage results matching a RunQuery (or its fields as keyword arguments).
+
+        Stage filters select rows, the rest select runs. Rows come back newest
+        run first; ``limit`` keeps the rows of the newest ``limit`` runs.
+        """
+        query = query or RunQuery(**filters)
+        frame = self.scan_query(query)
+        if query.limit is not None:
+            newest = (frame.select("run_id", "run_timestamp").unique()
+                      .sort("run_timestamp", descending=True).head(query.limit).select("run_id"))
+            frame = frame.join(newest, on="run_id", how="semi")
+        return frame.sort(["run_timestamp", "run_id", "start_time"], descending=[True, False, False]).collect()
+
+    def labels(self) -> pl.DataFrame:
+        """Stored labels with their run counts and time range, newest first."""
+        return (
+            self.scan()
+            .group_by("label")
+            .agg(
+                pl.col("run_id").n_unique().alias("runs"),
+                pl.col("run_timestamp").min().alias("first_run"),
+                pl.col("run_timestamp").max().alias("last_run"),
+            )
+            .sort("last_run", descending=True)
+            .collect()
+        )
@@ -0,0 +1,291 @@
+"""Live metrics for long runs, served in Prometheus text format.
+
+Runners given a :class:`LiveMetrics` report runs started/completed, stage
+outcomes, in-flight stages and stage latencies while they execute. Writers
+only touch a shard owned by their own thread (a dict and a bounded deque),
+so recording takes no lock; the HTTP endpoint merges the shards when it is
+scraped. When a thread ends its shard is folded into a single retired
+shard, so short-lived worker threads do not pile up shards. Latency
+percentiles are computed over a rolling time window.
+
+Start the endpoint with :func:`start_metrics_server`; one server and one
+metrics registry exist per process, shared by all suites in it.
+"""
+
+import math
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from thanos.percentiles import nearest_rank
+
+METRICS_PORT_ENV = "THANOS_METRICS_PORT"
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class _Shard:
+    """Metrics written by a single thread"""
+
+    __slots__ = ("counters", "latencies", "in_flight")
+
+    def __init__(self, window_size: int):
+        self.counters: Dict[tuple, float] = {}
+        # (monotonic time, suite, stage, duration_ms)
+        self.latencies: deque = deque(maxlen=window_size)
+        self.in_flight = 0
+
+    def absorb(self, other: '_Shard'):
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        self.latencies.extend(other.latencies)
+        self.in_flight += other.in_flight
+
+
+class LiveMetrics:
+    """Lock-free-on-write counters, gauges and a rolling latency window."""
+
+    def __init__(self, window_s: float = 60.0, window_size: int = 10_000):
+        self.window_s = window_s
+        self.window_size = window_size
+        self.started_at = time.time()
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        # What threads that have ended recorded
+        self._retired = _Shard(window_size)
+        self._shards_lock = threading.Lock()
+
+    @property
+    def active_shards(self) -> int:
+        """Threads currently holding a shard of their own."""
+        with self._shards_lock:
+            return len(self._shards)
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard(self.window_size)
+            # The thread-local owner is dropped when the thread ends, which retires the shard
+            self._local.owner = owner = _ShardOwner()
+            weakref.finalize(owner, _retire_shard, weakref.ref(self), shard)
+            # Only taken once per thread
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _retire(self, shard: _Shard):
+        with self._shards_lock:
+            self._shards.remove(shard)
+            self._retired.absorb(shard)
+
+    def _inc(self, key: tuple, amount: float = 1):
+        counters = self._shard().counters
+        counters[key] = counters.get(key, 0) + amount
+
+    def run_started(self, suite: Optional[str] = None):
+        self._inc(("runs_started", suite or ""))
+
+    def run_completed(self, status: str, suite: Optional[str] = None):
+        self._inc(("runs_completed", suite or "", status))
+
+    def stage_started(self):
+        self._shard().in_flight += 1
+
+    def stage_finished(self, stage: str, status: str, duration_ms: float, suite: Optional[str] = None,
+                       executed: bool = True):
+        shard = self._shard()
+        if executed:
+            shard.in_flight -= 1
+        suite = suite or ""
+        counters = shard.counters
+        key = ("stage_results", suite, stage, status)
+        counters[key] = counters.get(key, 0) + 1
+        if status != "SKIPPED":
+            sum_key = ("stage_latency_sum", suite, stage)
+            counters[sum_key] = counters.get(sum_key, 0) + duration_ms
+            shard.latencies.append((time.monotonic(), suite, stage, duration_ms))
+
+    def snapshot(self) -> Tuple[Dict[tuple, float], int, List[tuple]]:
+        """Merged counters, in-flight stages and latencies inside the window."""
+        counters: Dict[tuple, float] = {}
+        in_flight = 0
+        latencies = []
+        cutoff = time.monotonic() - self.window_s
+        # Held throughout so that a shard being retired is counted exactly once
+        with self._shards_lock:
+            for shard in [self._retired] + self._shards:
+                # dict.copy() and list(deque) run without releasing the GIL, so they see a consistent shard
+                for key, value in shard.counters.copy().items():
+                    counters[key] = counters.get(key, 0) + value
+                in_flight += shard.in_flight
+                latencies.extend(entry for entry in list(shard.latencies) if entry[0] >= cutoff)
+        return counters, in_flight, latencies
+
+    def render_prometheus(self) -> str:
+        """The current metrics in Prometheus text exposition format 0.0.4."""
+        counters, in_flight, latencies = self.snapshot()
+        lines = [
+            "# HELP thanos_uptime_seconds Seconds since metrics collection started.",
+            "# TYPE thanos_uptime_seconds gauge",
+            f"thanos_uptime_seconds {time.time() - self.started_at:.3f}",
+            "# HELP thanos_stages_in_flight Stages currently executing.",
+            "# TYPE thanos_stages_in_flight gauge",
+            f"thanos_stages_in_flight {in_flight}",
+        ]
+
+        def section(name: str, kind: str, help_text: str, kind_key: str, label_names: tuple):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted((k, v) for k, v in counters.items() if k[0] == kind_key):
+                lines.append(f"{name}{_labels(zip(label_names, key[1:]))} {_number(value)}")
+
+        section("thanos_runs_started_total", "counter", "Workflow runs started.", "runs_started", ("suite",))
+        section("thanos_runs_completed_total", "counter", "Workflow runs completed, by overall status.",
+                "runs_completed", ("suite", "status"))
+        section("thanos_stage_results_total", "counter", "Stage outcomes (PASSED, FAILED, SKIPPED).",
+                "stage_results", ("suite", "stage", "status"))
+
+        # Summary: quantiles over the rolling window, sum and count since start
+        grouped: Dict[tuple, List[float]] = {}
+        for _, suite, stage, duration in latencies:
+            grouped.setdefault((suite, stage), []).append(duration)
+        counts: Dict[tuple, float] = {}
+        for key, value in counters.items():
+            if key[0] == "stage_results" and key[3] != "SKIPPED":
+                counts[key[1:3]] = counts.get(key[1:3], 0) + value
+
+        lines.append(f"# HELP thanos_stage_latency_ms Stage latency; quantiles over the last {self.window_s:g}s.")
+        lines.append("# TYPE thanos_stage_latency_ms summary")
+        for suite, stage in sorted(counts):
+            base = (("suite", suite), ("stage", stage))
+            values = sorted(grouped.get((suite, stage), ()))
+            for quantile in QUANTILES:
+                observed = nearest_rank(values, quantile)
+                observed = float("nan") if observed is None else observed
+                lines.append(f"thanos_stage_latency_ms{_labels(base + (('quantile', str(quantile)),))} "
+                             f"{_number(observed)}")
+            lines.append(f"thanos_stage_latency_ms_sum{_labels(base)} "
+                         f"{_number(counters.get(('stage_latency_sum', suite, stage), 0))}")
+            lines.append(f"thanos_stage_latency_ms_count{_labels(base)} {_number(counts[(suite, stage)])}")
+        return "\n".join(lines) + "\n"
+
+
+class _ShardOwner:
+    """Lives in a thread's local storage only, so it dies with the thread"""
+
+    __slots__ = ("__weakref__",)
+
+
+def _retire_shard(metrics_ref, shard: _Shard):
+    metrics = metrics_ref()
+    if metrics is not None:
+        metrics._retire(shard)
+
+
+def _labels(pairs) -> str:
+    rendered = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return f"{{{rendered}}}" if rendered else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        return repr(value)
+    return str(value)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics: LiveMetrics = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body = self.metrics.render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+            status = 200
+        elif self.path == "/healthz":
+            body, content_type, status = b"ok\n", "text/plain", 200
+        else:
+            body, content_type, status = b"not found\n", "text/plain", 404
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the test output
+        pass
+
+
+class MetricsServer:
+    """Serves /metrics from a daemon thread."""
+
+    def __init__(self, metrics: LiveMetrics, host: str = "127.0.0.1", port: int = 9464):
+        handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.metrics = metrics
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="thanos-metrics", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> 'MetricsServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_live_metrics: Optional[LiveMetrics] = None
+_server: Optional[MetricsServer] = None
+_server_lock = threading.Lock()
+
+
+def get_live_metrics() -> LiveMetrics:
+    """The process-wide metrics registry."""
+    global _live_metrics
+    if _live_metrics is None:
+        with _server_lock:
+            if _live_metrics is None:
+                _live_metrics = LiveMetrics()
+    return _live_metrics
+
+
+def configured_metrics_port(port: Optional[int] = None) -> Optional[int]:
+    """Port from configuration, else from $THANOS_METRICS_PORT; None when metrics are off."""
+    if port is not None:
+        return port
+    value = os.environ.get(METRICS_PORT_ENV)
+    return int(value) if value else None
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> MetricsServer:
+    """Start the process-wide metrics endpoint, or return it if it is already running."""
+    global _server
+    metrics = get_live_metrics()
+    with _server_lock:
+        if _server is None:
+            _server = MetricsServer(metrics, host, port).start()
+    return _server
+
+
+def stop_metrics_server():
+    global _server
+    with _server_lock:
+        if _server is not None:
+            _server.stop()
+            _server = None
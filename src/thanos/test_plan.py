@@ -7,6 +7,24 @@ from testplan.report.testing.styles import Style, StyleEnum
 
 from thanos.tests.test_suite_basic import BasicSuite
 from thanos.tests.test_suite_performance import PerformanceTestSuite
+from thanos.tests.test_suite_http import HttpStageSuite
+from thanos.tests.test_suite_wal import WriteAheadLogSuite
+from thanos.tests.test_suite_distributed import DistributedSuite
+from thanos.tests.test_suite_cache import ConcurrentCacheSuite
+from thanos.tests.test_suite_shared_cache import SharedCacheSuite
+from thanos.tests.test_suite_query import RunQuerySuite
+from thanos.tests.test_suite_blobs import BlobStoreSuite
+from thanos.tests.test_suite_context import WorkflowContextSuite
+from thanos.tests.test_suite_fixtures import FixtureScopeSuite
+from thanos.tests.test_suite_memory import MemoryProfilerSuite
+from thanos.tests.test_suite_mock import MockServiceSuite
+from thanos.tests.test_suite_telemetry import LiveMetricsSuite
+from thanos.tests.test_suite_sla import SLASuite
+from thanos.tests.test_suite_compare import BaselineComparisonSuite
+from thanos.tests.test_suite_matrix import MatrixExecutionSuite
+from thanos.tests.test_suite_discovery import DiscoveryIndexSuite
+from thanos.tests.test_suite_dataset import DatasetFeederSuite
+from thanos.tests.test_suite_analytics import RunAnalyticsSuite
 from thanos.engine.eu.app_one.test_suite_one import PerfTestSuite
 
 
@@ -15,8 +33,9 @@ from thanos.engine.eu.app_one.test_suite_one import PerfTestSuite
     # stdout_style=Style("testcase", "testcase")
     # stdout_style=Style(passing=StyleEnum.TESTCASE, failing=StyleEnum.ASSERTION)
     stdout_style=Style(passing="testcase", failing="assertion-detail"),
-    pdf_path=os.path.join(os.path.dirname(__file__), "report.pdf"),
-    pdf_style=Style(passing="testcase", failing="assertion-detail"),
+    # Only the compact JSON report is written during the run; render documents
+    # afterwards with `thanos report render report.json --format pdf|html`.
+    json_path=os.path.join(os.path.dirname(__file__), "report.json"),
 )
 def main(plan: Testplan):
     test = MultiTest(
@@ -33,9 +52,32 @@ def main(plan: Testplan):
         suites=[PerfTestSuite(name='PerfTestSuite')]
     )
     
+    framework_test = MultiTest(
+        name='Framework Tests',
+        suites=[HttpStageSuite(name='HttpStageSuite'),
+                WriteAheadLogSuite(name='WriteAheadLogSuite'),
+                DistributedSuite(name='DistributedSuite'),
+                ConcurrentCacheSuite(name='ConcurrentCacheSuite'),
+                SharedCacheSuite(name='SharedCacheSuite'),
+                RunQuerySuite(name='RunQuerySuite'),
+                BlobStoreSuite(name='BlobStoreSuite'),
+                WorkflowContextSuite(name='WorkflowContextSuite'),
+                FixtureScopeSuite(name='FixtureScopeSuite'),
+                MemoryProfilerSuite(name='MemoryProfilerSuite'),
+                MockServiceSuite(name='MockServiceSuite'),
+                LiveMetricsSuite(name='LiveMetricsSuite'),
+                SLASuite(name='SLASuite'),
+                BaselineComparisonSuite(name='BaselineComparisonSuite'),
+                MatrixExecutionSuite(name='MatrixExecutionSuite'),
+                DiscoveryIndexSuite(name='DiscoveryIndexSuite'),
+                DatasetFeederSuite(name='DatasetFeederSuite'),
+                RunAnalyticsSuite(name='RunAnalyticsSuite')]
+    )
+    
     plan.add(test)
     plan.add(performance_test)
     plan.add(perf_test_mt)
+    plan.add(framework_test)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Union
 from dataclasses import dataclass
 from rich import print as rprint
 from testplan.testing.multitest import testcase, testsuite
@@ -7,8 +7,21 @@ from testplan.common.utils import helper
 
 from thanos.stage import TestStage
 from thanos.workflow import WorkflowRunner
+from thanos.blobs import BlobStore
 from thanos.cache import TestCache
+from thanos.clock import VirtualClock
+from thanos.context import WorkflowContext
+from thanos.environment import log_environment_snapshot
+from thanos.fixtures import FixtureManager, FixtureScope
 from thanos.helpers import report_workflow_results
+from thanos.memory import MemoryProfiler
+from thanos.shared_cache import create_test_cache
+from thanos.store import ResultStore, default_label, runs_to_frame
+from thanos.telemetry import configured_metrics_port, get_live_metrics, start_metrics_server
+from thanos.tracing import Tracer
+from thanos.wal import DurableTestCache
+from thanos.testing.matrix import MatrixExecutor, format_parameters
+from thanos.testing.sla import SLA, evaluate_slas, normalize_slas
 
 
 @dataclass
@@ -19,6 +32,32 @@ class TestConfiguration:
     parameters: Dict[str, tuple]
     failure_conditions: Optional[Dict[str, Callable]] = None
     custom_assertions: Optional[Dict[str, Callable]] = None
+    # Number of parameter combinations run concurrently; 1 keeps testplan's sequential parametrization
+    max_workers: int = 1
+    # Run stages on a virtual clock so thanos.clock.sleep returns instantly
+    simulate: bool = False
+    # Write a Chrome trace (open in Perfetto) of all workflows in the suite to this path
+    trace_path: Optional[str] = None
+    # Measure tracemalloc/RSS deltas and retained result sizes around every stage
+    profile_memory: bool = False
+    # Persist every run to this thanos.store.ResultStore directory in teardown
+    result_store: Optional[str] = None
+    # Label of the stored runs; defaults to $THANOS_RUN_LABEL
+    result_label: Optional[str] = None
+    # SLAs checked over all runs of the suite, e.g. "p99(create_user) < threshold" (see thanos.testing.sla)
+    slas: Optional[List[Union[SLA, str]]] = None
+    # Serve live Prometheus metrics on this local port while the suite runs (0 picks a free port);
+    # falls back to $THANOS_METRICS_PORT
+    metrics_port: Optional[int] = None
+    # Log every run to this write-ahead log so a crashed suite's runs are recovered (and stored) on the next setup
+    wal_path: Optional[str] = None
+    # Keep stage results larger than blob_threshold_kb in this content-addressed blob store
+    blob_store: Optional[str] = None
+    blob_threshold_kb: int = 64
+    # Give each stage a read-only snapshot of just the stages it depends on (see thanos.context);
+    # bytes-like results of at least shared_memory_threshold_kb are moved into shared memory
+    scoped_context: bool = False
+    shared_memory_threshold_kb: Optional[int] = None
 
 
 @dataclass
@@ -28,6 +67,10 @@ class StageDefinition:
     action: Callable
     dependencies: List[str]
     failure_condition: Optional[Callable] = None
+    # Share the stage result across runs: per-run, per-testcase, per-suite or per-process
+    scope: str = FixtureScope.PER_RUN
+    # Called with the shared result when its scope ends
+    teardown: Optional[Callable[[Any], None]] = None
 
 
 class TestSuiteTemplate(ABC):
@@ -40,18 +83,28 @@ class TestSuiteTemplate(ABC):
         self.run_ids = []
         self.test_cache = None
         self.runner = None
+        self.fixtures = None
+        self.tracer = None
+        self.memory_profiler = None
+        self.metrics = None
+        self.blob_store = None
     
     def setup(self, env, result):
         """Template method for setup - can be overridden for custom setup"""
         rprint(f"[bold cyan]Setting up Test Suite: {self.name}[/bold cyan]")
         result.log(f"Setting up Test Suite: {self.name}")
         
-        self.test_cache = TestCache()
-        self.runner = WorkflowRunner(cache=self.test_cache)
+        self.test_cache = create_test_cache(self.get_test_configuration().wal_path)
+        self._store_recovered_runs(result)
+        self.fixtures = FixtureManager()
+        self.tracer = Tracer() if self.get_test_configuration().trace_path else None
+        self.memory_profiler = MemoryProfiler() if self.get_test_configuration().profile_memory else None
+        self.blob_store = self._create_blob_store()
+        self._start_live_metrics(result)
+        self.runner = self.create_runner(self.test_cache)
         
         # Common setup operations
-        helper.log_environment(result)
-        helper.log_hardware(result)
+        log_environment_snapshot(result)
         
         # Allow subclasses to add custom setup
         self.custom_setup(env, result)
@@ -64,23 +117,24 @@ class TestSuiteTemplate(ABC):
         self.custom_teardown(env, result)
         
         # Common teardown operations
+        self.fixtures.teardown()
         self.runner.upload_to_db()
+        self._store_results(result)
+        if isinstance(self.test_cache, DurableTestCache):
+            # Everything is uploaded and stored now; the log only guards the next run
+            self.test_cache.checkpoint()
+            self.test_cache.close()
+        if self.memory_profiler is not None:
+            self.memory_profiler.stop()
+        if self.tracer is not None:
+            trace_path = self.tracer.save(self.get_test_configuration().trace_path)
+            result.log(f"Chrome trace written to {trace_path}")
+            result.attach(str(trace_path), description="Chrome trace (open in Perfetto)")
         helper.attach_log(result)
     
     def execute_workflow_test(self, env, result, **test_params):
         """Template method for workflow execution"""
-        self.runner.clear_stages()
-        
-        # Get stage definitions from subclass
-        stage_definitions = self.get_stage_definitions()
-        
-        # Build and add stages
-        stages = self._build_stages(stage_definitions, test_params)
-        for stage in stages:
-            self.runner.add_stage(stage)
-        
-        # Apply failure conditions if any
-        self._apply_failure_conditions(stages, test_params)
+        self.prepare_workflow(self.runner, test_params)
         
         # Execute workflow
         run_id = self.runner.execute_workflow()
@@ -91,12 +145,81 @@ class TestSuiteTemplate(ABC):
         
         # Perform assertions
         self._perform_assertions(result, test_params)
+        self._log_memory_profile(result, run_id)
         
         # Handle cache results
         self._handle_cache_results(run_id)
         
+        # Per-testcase fixtures end with the testcase
+        self.fixtures.teardown_testcase(self.runner.testcase)
+        
         return run_id
     
+    def execute_workflow_matrix(self, env, result, parameters: Optional[Dict[str, tuple]] = None,
+                                max_workers: Optional[int] = None) -> List[str]:
+        """Template method for running every parameter combination concurrently
+        
+        Each combination runs on its own runner and cache; run results are then
+        merged into the suite cache and asserted in a group per combination.
+        """
+        config = self.get_test_configuration()
+        parameters = parameters if parameters is not None else config.parameters
+        executor = MatrixExecutor(self, max_workers=max_workers or config.max_workers)
+        
+        run_ids = []
+        combinations = executor.run(parameters)
+        for combination in combinations:
+            description = f"{config.name} <{format_parameters(combination.test_params)}>"
+            with result.group(description=description) as group:
+                if combination.error:
+                    group.fail(f"Workflow raised {combination.error}")
+                    continue
+                
+                report_workflow_results(combination.runner)
+                self.test_cache.add_run_result(combination.run_result)
+                group.log(f"Test '{self.name}' executed with parameters: {combination.test_params} "
+                          f"in {combination.duration_s:.2f}s")
+                self._perform_assertions(group, combination.test_params, combination.runner)
+                self._log_memory_profile(group, combination.run_id)
+                self._handle_cache_results(combination.run_id)
+                run_ids.append(combination.run_id)
+        
+        for combination in combinations:
+            self.fixtures.teardown_testcase(combination.runner.testcase)
+        
+        return run_ids
+    
+    def create_runner(self, cache: TestCache) -> WorkflowRunner:
+        """Create a workflow runner bound to this suite's fixtures"""
+        clock = VirtualClock() if self.get_test_configuration().simulate else None
+        runner = WorkflowRunner(cache=cache, fixtures=self.fixtures, clock=clock, tracer=self.tracer,
+                                memory_profiler=self.memory_profiler, metrics=self.metrics,
+                                blob_store=self.blob_store, context=self._create_context())
+        runner.testcase = self.get_test_configuration().name
+        runner.suite_cache = self.test_cache
+        return runner
+    
+    def prepare_workflow(self, runner: WorkflowRunner, test_params: Dict):
+        """Load fresh stages for one parameter combination into a runner"""
+        config = self.get_test_configuration()
+        runner.clear_stages()
+        # Each parameter combination is a testcase of its own, with its own per-testcase fixtures
+        runner.testcase = f"{config.name} <{format_parameters(test_params)}>" if test_params else config.name
+        # The label travels with the run so that runs recovered from a write-ahead log are stored under it
+        runner.metadata = {"suite": self.name, "testcase": config.name, "parameters": dict(test_params),
+                           "label": config.result_label or default_label()}
+        
+        # Get stage definitions from subclass
+        stage_definitions = self.get_stage_definitions()
+        
+        # Build and add stages
+        stages = self._build_stages(stage_definitions, test_params)
+        for stage in stages:
+            runner.add_stage(stage)
+        
+        # Apply failure conditions if any
+        self._apply_failure_conditions(stages, test_params)
+    
     @abstractmethod
     def get_stage_definitions(self) -> List[StageDefinition]:
         """Abstract method - subclasses must define their stages"""
@@ -122,7 +245,9 @@ class TestSuiteTemplate(ABC):
             stage = TestStage(
                 name=stage_def.name,
                 action=stage_def.action,
-                dependencies=stage_def.dependencies
+                dependencies=stage_def.dependencies,
+                scope=stage_def.scope,
+                teardown=stage_def.teardown
             )
             stages.append(stage)
         return stages
@@ -134,26 +259,32 @@ class TestSuiteTemplate(ABC):
         for stage, stage_def in zip(stages, stage_definitions):
             if stage_def.failure_condition and stage_def.failure_condition(test_params):
                 # Create failure action
-                original_action = stage.action
-                def failing_action(context):
-                    rprint(f"[red]👤 Simulating failure in {stage.name}[/red]")
-                    raise Exception(f"Simulated failure for {stage.name}")
+                def failing_action(context, stage_name=stage.name):
+                    rprint(f"[red]👤 Simulating failure in {stage_name}[/red]")
+                    raise Exception(f"Simulated failure for {stage_name}")
                 stage.action = failing_action
     
-    def _perform_assertions(self, result, test_params: Dict):
+    def _perform_assertions(self, result, test_params: Dict, runner: Optional[WorkflowRunner] = None):
         """Perform test assertions based on configuration"""
         config = self.get_test_configuration()
+        runner = runner or self.runner
         
         # Default assertions
-        self._default_assertions(result, test_params)
+        self._default_assertions(result, test_params, runner)
         
         # Custom assertions if defined
         if config.custom_assertions:
             for assertion_name, assertion_func in config.custom_assertions.items():
-                assertion_func(result, self.runner, test_params)
+                assertion_func(result, runner, test_params)
+        
+        # SLAs are judged on every run of the suite so far, not just this one
+        if config.slas:
+            stages = runs_to_frame(self.test_cache.get_all_results(), suite=self.name)
+            evaluate_slas(result, normalize_slas(config.slas), stages, test_params)
     
-    def _default_assertions(self, result, test_params: Dict):
+    def _default_assertions(self, result, test_params: Dict, runner: Optional[WorkflowRunner] = None):
         """Default assertion logic - can be overridden"""
+        runner = runner or self.runner
         # Check if any failure conditions were met
         stage_definitions = self.get_stage_definitions()
         expected_failures = any(
@@ -167,14 +298,14 @@ class TestSuiteTemplate(ABC):
                 if stage_def.failure_condition and stage_def.failure_condition(test_params):
                     result.fail(f"Expected failure for {stage_def.name}")
                     result.equal(
-                        self.runner.stages[stage_def.name].status, 
+                        runner.stages[stage_def.name].status, 
                         "FAILED", 
                         description=f"{stage_def.name} should fail"
                     )
                     break
         else:
             # All stages should pass
-            for stage_name, stage in self.runner.stages.items():
+            for stage_name, stage in runner.stages.items():
                 if stage.status not in ["SKIPPED"]:
                     result.equal(
                         stage.status, 
@@ -183,6 +314,93 @@ class TestSuiteTemplate(ABC):
                     )
             result.log("Workflow test completed successfully.")
     
+    def _create_context(self) -> Optional[WorkflowContext]:
+        """Scoped workflow context for a new runner, when configured"""
+        config = self.get_test_configuration()
+        if not config.scoped_context:
+            return None
+        threshold = config.shared_memory_threshold_kb
+        return WorkflowContext(shared_memory_threshold=threshold * 1024 if threshold is not None else None)
+    
+    def _create_blob_store(self) -> Optional[BlobStore]:
+        """Blob store for large stage results, when configured"""
+        config = self.get_test_configuration()
+        if not config.blob_store:
+            return None
+        return BlobStore(config.blob_store, threshold=config.blob_threshold_kb * 1024)
+    
+    def _start_live_metrics(self, result):
+        """Start (or join) the process-wide metrics endpoint when a port is configured"""
+        port = configured_metrics_port(self.get_test_configuration().metrics_port)
+        if port is None:
+            return
+        server = start_metrics_server(port)
+        self.metrics = get_live_metrics()
+        rprint(f"[bold blue]📡 Live metrics at {server.url}[/bold blue]")
+        result.log(f"Live metrics served at {server.url}")
+    
+    def _store_results(self, result):
+        """Persist the suite's runs to the configured result store"""
+        config = self.get_test_configuration()
+        if not config.result_store:
+            return
+        path = ResultStore(config.result_store).append(self.test_cache.get_all_results(),
+                                                        label=config.result_label, suite=self.name)
+        if path is not None:
+            result.log(f"Stored {len(self.test_cache.get_all_results())} runs in {path}")
+    
+    def _store_recovered_runs(self, result):
+        """Store the runs a crashed earlier session left in the write-ahead log, under their own labels
+        
+        They are kept out of this session's cache, SLAs and uploads. Without a
+        result store they stay in the log for a later session to store.
+        """
+        if not isinstance(self.test_cache, DurableTestCache) or not self.test_cache.recovered_runs:
+            return
+        config = self.get_test_configuration()
+        runs = self.test_cache.recovered_runs
+        if not config.result_store:
+            result.log(f"{len(runs)} runs of an earlier session were recovered from {config.wal_path}; "
+                       f"they stay in the log until a result store is configured")
+            return
+        by_label: Dict[Optional[str], List] = {}
+        for run in runs:
+            by_label.setdefault((run.metadata or {}).get("label"), []).append(run)
+        store = ResultStore(config.result_store)
+        for label, label_runs in by_label.items():
+            store.append(label_runs, label=label, suite=self.name)
+        self.test_cache.release_recovered()
+        result.log(f"Stored {len(runs)} runs recovered from {config.wal_path} under their original labels "
+                   f"({', '.join(str(label) for label in by_label)})")
+    
+    def _log_memory_profile(self, result, run_id: str):
+        """Print and log the memory profile of a run when memory profiling is on"""
+        if self.memory_profiler is None:
+            return
+        # Once logged, the profile is only in the report
+        run = self.memory_profiler.take(run_id)
+        if run is None:
+            return
+        self.memory_profiler.report(run)
+        result.table.log(
+            [
+                {
+                    "stage": profile.stage,
+                    "traced_delta_kb": round(profile.traced_delta_kb, 1),
+                    "traced_peak_kb": round(profile.traced_peak_kb, 1),
+                    "rss_delta_mb": round(profile.rss_delta_mb, 2),
+                    "result_size_kb": round(profile.result_size_kb, 1),
+                    "top_site": profile.top_sites[0].location if profile.top_sites else "",
+                }
+                for profile in run.stages
+            ],
+            description="Memory per stage",
+        )
+        result.dict.log(
+            {name: round(size, 1) for name, size in run.context_sizes_kb.items()},
+            description="Retained context entry sizes (KiB)",
+        )
+    
     def _handle_cache_results(self, run_id: str):
         """Handle cached results display"""
         retrieved_result = self.test_cache.get_run_result(run_id)
@@ -195,6 +413,21 @@ class TestSuiteTemplate(ABC):
 def create_test_suite_class(base_class: type, config: TestConfiguration):
     """Factory function to create test suite classes dynamically"""
     
+    if config.max_workers > 1:
+        @testsuite
+        class DynamicTestSuite(base_class):
+            def __init__(self, name: str):
+                super().__init__(name)
+            
+            @testcase(
+                name=config.name,
+                tags=config.tags
+            )
+            def test_workflow(self, env, result):
+                return self.execute_workflow_matrix(env, result)
+        
+        return DynamicTestSuite
+    
     @testsuite
     class DynamicTestSuite(base_class):
         def __init__(self, name: str):
@@ -208,4 +441,4 @@ def create_test_suite_class(base_class: type, config: TestConfiguration):
         def test_workflow(self, env, result, **test_params):
             return self.execute_workflow_test(env, result, **test_params)
     
-    return DynamicTestSuite
\ No newline at end of file
+    return DynamicTestSuite
@@ -0,0 +1,69 @@
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from thanos.cache import TestCache, TestRunResult
+from thanos.workflow import WorkflowRunner
+
+
+def expand_parameters(parameters: Dict[str, tuple]) -> List[Dict[str, Any]]:
+    """Expand a testplan-style parameter dict into its Cartesian product"""
+    if not parameters:
+        return [{}]
+    names = list(parameters.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*(parameters[name] for name in names))]
+
+
+def format_parameters(test_params: Dict[str, Any]) -> str:
+    """Render parameters the way testplan names parametrized testcases"""
+    return ", ".join(f"{name}={value}" for name, value in test_params.items())
+
+
+@dataclass
+class MatrixCombinationResult:
+    """Outcome of one parameter combination run on its own runner"""
+    test_params: Dict[str, Any]
+    runner: WorkflowRunner
+    run_id: Optional[str] = None
+    run_result: Optional[TestRunResult] = None
+    error: Optional[str] = None
+    duration_s: float = 0.0
+
+
+class MatrixExecutor:
+    """Runs each parameter combination of a suite concurrently on an isolated runner.
+
+    Every combination gets a fresh ``WorkflowRunner`` with its own stages,
+    context and ``TestCache``, so combinations never share mutable workflow
+    state. Fixture stores of the suite are shared, since they are thread-safe.
+    Results come back in parameter order regardless of completion order.
+    """
+
+    def __init__(self, suite, max_workers: int = 4):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.suite = suite
+        self.max_workers = max_workers
+
+    def run(self, parameters: Dict[str, tuple]) -> List[MatrixCombinationResult]:
+        """Execute all combinations, at most ``max_workers`` at a time"""
+        combinations = expand_parameters(parameters)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="thanos-matrix") as pool:
+            futures = [pool.submit(self._run_combination, test_params) for test_params in combinations]
+            return [future.result() for future in futures]
+
+    def _run_combination(self, test_params: Dict[str, Any]) -> MatrixCombinationResult:
+        """Build an isolated runner for one combination and execute its workflow"""
+        runner = self.suite.create_runner(TestCache())
+        combination = MatrixCombinationResult(test_params=test_params, runner=runner)
+        start = time.perf_counter()
+        try:
+            self.suite.prepare_workflow(runner, test_params)
+            combination.run_id = runner.execute_workflow()
+            combination.run_result = runner.cache.get_run_result(combination.run_id)
+        except Exception as e:
+            combination.error = f"{type(e).__name__}: {e}"
+        combination.duration_s = time.perf_counter() - start
+        return combination
@@ -0,0 +1,240 @@
+"""Service level assertions over the aggregated runs of a suite.
+
+SLAs are declared on ``TestConfiguration.slas`` either as objects or as
+short specs::
+
+    "p99(create_user) < threshold"     # ms; limit taken from the testcase parameter
+    "p95 < 250"                        # every stage
+    "error_rate < 0.1%"                # failed runs / runs
+    "error_rate(login) < 1%"           # failed login stages / executed login stages
+    "throughput >= rate"               # completed runs per second of wall time
+
+A limit is either a number or the name of a testcase parameter. Each SLA is
+evaluated over all runs the suite has executed so far (or only those with the
+current parameters when ``match_parameters`` is set), with the data flattened
+into a polars frame of stage results.
+"""
+
+import json
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+import polars as pl
+
+from thanos.percentiles import LATENCY_STATUSES, nearest_rank_expr
+
+Limit = Union[float, str]
+
+PERCENTILES = (50, 90, 95, 99)
+
+_OPERATORS = {
+    "<": lambda observed, limit: observed < limit,
+    "<=": lambda observed, limit: observed <= limit,
+    ">": lambda observed, limit: observed > limit,
+    ">=": lambda observed, limit: observed >= limit,
+}
+
+_SPEC = re.compile(
+    r"^\s*(?P<metric>p\d+(?:\.\d+)?|error_rate|throughput)\s*(?:\(\s*(?P<stage>[\w.-]+)\s*\))?"
+    r"\s*(?P<op><=|>=|<|>)\s*(?P<limit>\d+(?:\.\d+)?|[A-Za-z_]\w*)\s*(?P<unit>%|ms)?\s*$"
+)
+
+
+@dataclass
+class SLAOutcome:
+    """Result of evaluating one SLA"""
+    sla: 'SLA'
+    observed: Optional[float]
+    limit: float
+    passed: bool
+    samples: int
+
+    @property
+    def description(self) -> str:
+        return self.sla.describe(self.limit)
+
+
+@dataclass
+class SLA(ABC):
+    """Base class: a metric compared against a limit with an operator."""
+    limit: Limit
+    stage: Optional[str] = None
+    operator: str = "<"
+    match_parameters: bool = False
+
+    metric = "metric"
+    unit = ""
+
+    def resolve_limit(self, test_params: Dict[str, Any]) -> float:
+        if isinstance(self.limit, str):
+            if self.limit not in test_params:
+                raise KeyError(f"SLA limit '{self.limit}' is not a parameter of this testcase: {sorted(test_params)}")
+            return float(test_params[self.limit])
+        return float(self.limit)
+
+    def label(self) -> str:
+        return f"{self.metric}({self.stage})" if self.stage else self.metric
+
+    def describe(self, limit: float) -> str:
+        source = f" [{self.limit}]" if isinstance(self.limit, str) else ""
+        return f"{self.label()} {self.operator} {limit:g}{self.unit}{source}"
+
+    @abstractmethod
+    def measure(self, stages: pl.DataFrame) -> tuple:
+        """Return (observed value or None, number of samples)."""
+        pass
+
+    def evaluate(self, stages: pl.DataFrame, test_params: Dict[str, Any]) -> SLAOutcome:
+        limit = self.resolve_limit(test_params)
+        observed, samples = self.measure(stages)
+        passed = observed is not None and _OPERATORS[self.operator](observed, limit)
+        return SLAOutcome(sla=self, observed=observed, limit=limit, passed=passed, samples=samples)
+
+
+@dataclass
+class LatencySLA(SLA):
+    """A nearest-rank latency percentile (ms) of one stage, or of every stage when stage is None.
+
+    Latencies are of executed (passed and failed) stages, as everywhere else
+    in thanos (see :mod:`thanos.percentiles`).
+    """
+    percentile: float = 99
+
+    unit = "ms"
+
+    @property
+    def metric(self) -> str:
+        return f"p{self.percentile:g}"
+
+    def measure(self, stages: pl.DataFrame) -> tuple:
+        executed = stages.filter(pl.col("stage_status").is_in(LATENCY_STATUSES))
+        if self.stage:
+            executed = executed.filter(pl.col("stage") == self.stage)
+        if executed.is_empty():
+            return None, 0
+        observed = executed.select(nearest_rank_expr(pl.col("duration_ms"), self.percentile / 100)).item()
+        return observed, executed.height
+
+    def evaluate(self, stages: pl.DataFrame, test_params: Dict[str, Any]) -> SLAOutcome:
+        if self.stage is not None:
+            return super().evaluate(stages, test_params)
+        # Without a stage every stage has to meet the limit; report the worst one
+        limit = self.resolve_limit(test_params)
+        outcomes = [
+            LatencySLA(limit=limit, stage=stage, operator=self.operator, percentile=self.percentile)
+            .evaluate(stages, test_params)
+            for stage in stages["stage"].unique().sort()
+        ]
+        outcomes = [outcome for outcome in outcomes if outcome.observed is not None]
+        if not outcomes:
+            return SLAOutcome(sla=self, observed=None, limit=limit, passed=False, samples=0)
+        failing = [outcome for outcome in outcomes if not outcome.passed]
+        worst = max(failing or outcomes, key=lambda outcome: outcome.observed)
+        return SLAOutcome(sla=self, observed=worst.observed, limit=limit, passed=not failing, samples=worst.samples)
+
+
+@dataclass
+class ErrorRateSLA(SLA):
+    """Fraction of failed runs, or of failed executions of one stage. Limits are fractions (0.001 = 0.1%)."""
+
+    metric = "error_rate"
+
+    def describe(self, limit: float) -> str:
+        source = f" [{self.limit}]" if isinstance(self.limit, str) else ""
+        return f"{self.label()} {self.operator} {limit:.3%}{source}"
+
+    def measure(self, stages: pl.DataFrame) -> tuple:
+        if self.stage:
+            executed = stages.filter((pl.col("stage") == self.stage) & (pl.col("stage_status") != "SKIPPED"))
+            if executed.is_empty():
+                return None, 0
+            return executed.select((pl.col("stage_status") == "FAILED").mean()).item(), executed.height
+        runs = stages.unique("run_id")
+        if runs.is_empty():
+            return None, 0
+        return runs.select((pl.col("overall_status") != "PASSED").mean()).item(), runs.height
+
+
+@dataclass
+class ThroughputSLA(SLA):
+    """Completed runs (or executions of one stage) per second of wall time spanned by the runs."""
+    operator: str = ">="
+
+    metric = "throughput"
+    unit = "/s"
+
+    def measure(self, stages: pl.DataFrame) -> tuple:
+        frame = stages.filter(pl.col("stage") == self.stage) if self.stage else stages
+        if frame.is_empty():
+            return None, 0
+        count = frame.height if self.stage else frame["run_id"].n_unique()
+        span = frame.select((pl.col("end_time").max() - pl.col("start_time").min()).dt.total_microseconds()).item()
+        if not span:
+            return None, count
+        return count / (span / 1e6), count
+
+
+def parse_sla(spec: str) -> SLA:
+    """Build an SLA from a spec such as ``"p99(create_user) < threshold"``."""
+    match = _SPEC.match(spec)
+    if not match:
+        raise ValueError(f"Cannot parse SLA '{spec}'; expected e.g. 'p99(create_user) < threshold', "
+                         f"'error_rate < 0.1%' or 'throughput >= rate'")
+    metric, stage, operator, limit, unit = match.group("metric", "stage", "op", "limit", "unit")
+    try:
+        limit = float(limit)
+        if unit == "%":
+            limit /= 100
+    except ValueError:
+        if unit == "%":
+            raise ValueError(f"A '%' unit needs a numeric limit in SLA '{spec}'")
+
+    if metric == "error_rate":
+        return ErrorRateSLA(limit=limit, stage=stage, operator=operator)
+    if metric == "throughput":
+        return ThroughputSLA(limit=limit, stage=stage, operator=operator)
+    return LatencySLA(limit=limit, stage=stage, operator=operator, percentile=float(metric[1:]))
+
+
+def normalize_slas(slas: Optional[List[Union[SLA, str]]]) -> List[SLA]:
+    return [parse_sla(sla) if isinstance(sla, str) else sla for sla in slas or []]
+
+
+def percentile_table(stages: pl.DataFrame) -> List[Dict[str, Any]]:
+    """Nearest-rank latency percentiles, error counts and sample sizes per executed stage, for the report."""
+    executed = stages.filter(pl.col("stage_status").is_in(LATENCY_STATUSES))
+    summary = (
+        executed.group_by("stage", maintain_order=True)
+        .agg(
+            pl.len().alias("samples"),
+            (pl.col("stage_status") == "FAILED").sum().alias("failed"),
+            *[nearest_rank_expr(pl.col("duration_ms"), p / 100).round(2).alias(f"p{p} (ms)") for p in PERCENTILES],
+            pl.col("duration_ms").max().round(2).alias("max (ms)"),
+        )
+    )
+    return summary.to_dicts()
+
+
+def evaluate_slas(result, slas: List[SLA], stages: pl.DataFrame, test_params: Dict[str, Any]) -> List[SLAOutcome]:
+    """Evaluate SLAs and record them in a testplan result, with the percentiles they were judged on."""
+    if not slas:
+        return []
+    parameters = json.dumps(test_params, sort_keys=True, default=str)
+    outcomes = []
+    for sla in slas:
+        frame = stages.filter(pl.col("parameters") == parameters) if sla.match_parameters else stages
+        outcome = sla.evaluate(frame, test_params)
+        outcomes.append(outcome)
+        description = f"SLA {outcome.description} over {outcome.samples} samples"
+        if outcome.observed is None:
+            result.fail(f"{description}: no data")
+        else:
+            assertion = {"<": result.less, "<=": result.less_equal,
+                         ">": result.greater, ">=": result.greater_equal}[sla.operator]
+            assertion(outcome.observed, outcome.limit, description=description)
+
+    if stages.height:
+        result.table.log(percentile_table(stages), description="Stage latency percentiles (all suite runs)")
+    return outcomes
@@ -1,9 +1,13 @@
-from typing import Dict, List, Callable
+from typing import Any, Dict, List, Callable, Optional, Tuple
 from dataclasses import dataclass
 
 from thanos.stages.login import login_to_service
 from thanos.stages.user import create_user, check_user_profile
 from thanos.stages.cleanup import cleanup_data
+from thanos.stages.http import HttpStage, ConnectionPoolManager
+from thanos.stages.dataset import DatasetStage
+from thanos.dataset import DatasetFeeder
+from thanos.fixtures import FixtureScope
 from .base_test_suite import StageDefinition
 
 
@@ -11,12 +15,13 @@ class StageFactory:
     """Factory for creating common stage definitions"""
     
     @staticmethod
-    def create_login_stage() -> StageDefinition:
-        """Create login stage definition"""
+    def create_login_stage(scope: str = FixtureScope.PER_RUN) -> StageDefinition:
+        """Create login stage definition; pass a wider scope to share the session between runs"""
         return StageDefinition(
             name="login_to_service",
             action=login_to_service,
-            dependencies=[]
+            dependencies=[],
+            scope=scope
         )
     
     @staticmethod
@@ -47,6 +52,74 @@ class StageFactory:
             dependencies=["create_user"]
         )
     
+    @staticmethod
+    def create_http_stage(
+        name: str,
+        method: str,
+        url: str,
+        dependencies: Optional[List[str]] = None,
+        expected_status: int | Tuple[int, ...] = 200,
+        headers: Optional[Dict[str, str]] = None,
+        body: Any = None,
+        pool_manager: Optional[ConnectionPoolManager] = None,
+        **stage_options
+    ) -> StageDefinition:
+        """Create a stage that sends an HTTP request templated from the workflow context"""
+        return StageDefinition(
+            name=name,
+            action=HttpStage(
+                method=method,
+                url=url,
+                expected_status=expected_status,
+                headers=headers,
+                body=body,
+                pool_manager=pool_manager
+            ),
+            dependencies=dependencies or [],
+            **stage_options
+        )
+    
+    @staticmethod
+    def create_dataset_stage(
+        name: str,
+        path: str,
+        dependencies: Optional[List[str]] = None,
+        per_user: bool = False,
+        **feeder_options
+    ) -> StageDefinition:
+        """Create a stage that hands each run (or, with per_user, each virtual user) its own dataset row
+
+        ``feeder_options`` (loop, batch_size, columns, shard_index, shard_count, ...) go to DatasetFeeder.
+        """
+        return StageDefinition(
+            name=name,
+            action=DatasetStage(DatasetFeeder(path, **feeder_options), per_user=per_user),
+            dependencies=dependencies or []
+        )
+    
+    @staticmethod
+    def create_http_workflow(base_url: str, pool_manager: Optional[ConnectionPoolManager] = None) -> List[StageDefinition]:
+        """Create the standard workflow against a live service such as `thanos mock-server`"""
+        return [
+            StageFactory.create_http_stage(
+                "login_to_service", "POST", f"{base_url}/login",
+                pool_manager=pool_manager, scope=FixtureScope.PER_SUITE
+            ),
+            StageFactory.create_http_stage(
+                "create_user", "POST", f"{base_url}/users", ["login_to_service"], expected_status=201,
+                headers={"X-Session-Id": "{login_to_service[body][session_id]}"},
+                body={"username": "test_user"}, pool_manager=pool_manager
+            ),
+            StageFactory.create_http_stage(
+                "check_user_profile", "GET", f"{base_url}/users/{{create_user[body][user_id]}}", ["create_user"],
+                pool_manager=pool_manager
+            ),
+            StageFactory.create_http_stage(
+                "cleanup_data", "DELETE", f"{base_url}/users/{{create_user[body][user_id]}}", ["create_user"],
+                pool_manager=pool_manager
+            )
+        ]
+    
     @staticmethod
     def create_standard_workflow() -> List[StageDefinition]:
         """Create the standard workflow used by most test suites"""
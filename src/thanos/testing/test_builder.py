@@ -14,6 +14,19 @@ class TestConfigurationBuilder:
         self._parameters: Dict[str, tuple] = {"rate": (2, 4), "duration": (3, 5), "threshold": (6, 20)}
         self._failure_conditions: Optional[Dict[str, Callable]] = None
         self._custom_assertions: Optional[Dict[str, Callable]] = None
+        self._max_workers: int = 1
+        self._simulate: bool = False
+        self._trace_path: Optional[str] = None
+        self._profile_memory: bool = False
+        self._result_store: Optional[str] = None
+        self._result_label: Optional[str] = None
+        self._slas: List = []
+        self._metrics_port: Optional[int] = None
+        self._wal_path: Optional[str] = None
+        self._blob_store: Optional[str] = None
+        self._blob_threshold_kb: int = 64
+        self._scoped_context: bool = False
+        self._shared_memory_threshold_kb: Optional[int] = None
     
     def with_name(self, name: str) -> 'TestConfigurationBuilder':
         """Set test name"""
@@ -40,6 +53,61 @@ class TestConfigurationBuilder:
         self._custom_assertions = assertions
         return self
     
+    def with_max_workers(self, max_workers: int) -> 'TestConfigurationBuilder':
+        """Run up to max_workers parameter combinations concurrently"""
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self._max_workers = max_workers
+        return self
+    
+    def with_simulation(self, simulate: bool = True) -> 'TestConfigurationBuilder':
+        """Run workflows on a virtual clock for fast dry runs"""
+        self._simulate = simulate
+        return self
+    
+    def with_tracing(self, trace_path: str) -> 'TestConfigurationBuilder':
+        """Write a Chrome trace of the suite's workflows to trace_path"""
+        self._trace_path = trace_path
+        return self
+    
+    def with_memory_profiling(self, enabled: bool = True) -> 'TestConfigurationBuilder':
+        """Profile memory around every stage (slow; for leak hunting)"""
+        self._profile_memory = enabled
+        return self
+    
+    def with_result_store(self, directory: str, label: Optional[str] = None) -> 'TestConfigurationBuilder':
+        """Persist runs to a result store for later comparison"""
+        self._result_store = directory
+        self._result_label = label
+        return self
+    
+    def with_slas(self, *slas) -> 'TestConfigurationBuilder':
+        """Assert SLAs such as "p99(create_user) < threshold" over all runs of the suite"""
+        self._slas.extend(slas)
+        return self
+    
+    def with_live_metrics(self, port: int = 9464) -> 'TestConfigurationBuilder':
+        """Serve live Prometheus metrics on a local port while the suite runs"""
+        self._metrics_port = port
+        return self
+    
+    def with_wal(self, path: str) -> 'TestConfigurationBuilder':
+        """Log runs to a write-ahead log so they survive a crash before teardown"""
+        self._wal_path = path
+        return self
+    
+    def with_blob_store(self, directory: str, threshold_kb: int = 64) -> 'TestConfigurationBuilder':
+        """Spill stage results larger than threshold_kb to a content-addressed blob store"""
+        self._blob_store = directory
+        self._blob_threshold_kb = threshold_kb
+        return self
+    
+    def with_scoped_context(self, shared_memory_threshold_kb: Optional[int] = None) -> 'TestConfigurationBuilder':
+        """Limit each stage to the results of its dependencies, optionally sharing large bytes results via shared memory"""
+        self._scoped_context = True
+        self._shared_memory_threshold_kb = shared_memory_threshold_kb
+        return self
+    
     def add_parameter(self, name: str, values: tuple) -> 'TestConfigurationBuilder':
         """Add a single parameter"""
         self._parameters[name] = values
@@ -58,7 +126,20 @@ class TestConfigurationBuilder:
             tags=self._tags,
             parameters=self._parameters,
             failure_conditions=self._failure_conditions,
-            custom_assertions=self._custom_assertions
+            custom_assertions=self._custom_assertions,
+            max_workers=self._max_workers,
+            simulate=self._simulate,
+            trace_path=self._trace_path,
+            profile_memory=self._profile_memory,
+            result_store=self._result_store,
+            result_label=self._result_label,
+            slas=list(self._slas) or None,
+            metrics_port=self._metrics_port,
+            wal_path=self._wal_path,
+            blob_store=self._blob_store,
+            blob_threshold_kb=self._blob_threshold_kb,
+            scoped_context=self._scoped_context,
+            shared_memory_threshold_kb=self._shared_memory_threshold_kb
         )
 
 
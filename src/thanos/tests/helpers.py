@@ -0,0 +1,54 @@
+"""Builders shared by the framework test suites."""
+
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from rich import print as rprint
+
+from thanos.cache import ConcurrentTestCache, StageResult, TestRunResult
+from thanos.fixtures import FixtureManager
+from thanos.testing.base_test_suite import TestSuiteTemplate
+
+
+def prepare_suite(suite: TestSuiteTemplate) -> TestSuiteTemplate:
+    """Give a TestSuiteTemplate the cache, fixtures and runner its setup would, without the reporting side effects."""
+    suite.test_cache = ConcurrentTestCache(log_writes=False)
+    suite.fixtures = FixtureManager()
+    suite.runner = suite.create_runner(suite.test_cache)
+    return suite
+
+
+def make_stage(name: str, status: str = "PASSED", start: Optional[datetime] = None, duration_ms: float = 0.0,
+               result_data: Any = None) -> StageResult:
+    start = start or datetime.now()
+    return StageResult(name=name, status=status, result_data=result_data, start_time=start,
+                       end_time=start + timedelta(milliseconds=duration_ms), duration_ms=duration_ms)
+
+
+def make_run(run_id: str, status: str = "PASSED", timestamp: Optional[datetime] = None,
+             stages: Iterable[StageResult] = (), metadata: Optional[Dict[str, Any]] = None) -> TestRunResult:
+    return TestRunResult(run_id=run_id, timestamp=timestamp or datetime.now(), overall_status=status,
+                         stage_results=list(stages), metadata=metadata or {})
+
+
+class ScratchDirectorySuite(object):
+    """Base of suites that write files: a fresh directory per suite, removed on teardown."""
+
+    prefix = "thanos-test-"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.directory: Optional[Path] = None
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+        self.directory = Path(tempfile.mkdtemp(prefix=self.prefix))
+
+    def teardown(self, env, result):
+        # setup may have failed before the directory existed
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
@@ -0,0 +1,128 @@
+import json
+from datetime import datetime, timedelta
+
+import polars as pl
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.analytics import analyze, analyze_runs, bucket_seconds
+from thanos.store import STAGE_SCHEMA, runs_to_frame
+from thanos.tests.helpers import ScratchDirectorySuite, make_run, make_stage
+
+START = datetime(2026, 1, 5, 12, 0)
+FAILING = (4, 9, 14, 19)
+
+
+def analytics_runs():
+    """20 runs, half a second apart, alternating rate 1 and 2.
+
+    Run n logs in for n+1 ms and creates a user for 10(n+1) ms, which fails
+    in runs 4, 9, 14 and 19; cleanup then is skipped, otherwise it takes 5 ms.
+    """
+    runs = []
+    for n in range(20):
+        start = START + timedelta(milliseconds=500 * n)
+        failed = n in FAILING
+        login = make_stage("login", "PASSED", start, float(n + 1))
+        create = make_stage("create_user", "FAILED" if failed else "PASSED", login.end_time, float(10 * (n + 1)))
+        cleanup = make_stage("cleanup", "SKIPPED" if failed else "PASSED", create.end_time, 0.0 if failed else 5.0)
+        runs.append(make_run(f"run-{n}", "FAILED" if failed else "PASSED", start, [login, create, cleanup],
+                             metadata={"testcase": "Workflow", "parameters": {"rate": 1 + n % 2, "region": "eu"}}))
+    return runs
+
+
+def by_stage(frame: pl.DataFrame, *keys) -> dict:
+    return {tuple(row[key] for key in keys) if len(keys) > 1 else row[keys[0]]: row for row in frame.to_dicts()}
+
+
+@testsuite
+class RunAnalyticsSuite(ScratchDirectorySuite):
+    """The overview, stage, timeline and parameter tables of thanos analyze."""
+
+    prefix = "thanos-analytics-test-"
+
+    @testcase(name="BucketSeconds", tags=["analytics"])
+    def bucket_seconds_parse(self, env, result):
+        result.equal([bucket_seconds(every) for every in ("500ms", "10s", "1m30s", "2h", "1d")],
+                     [0.5, 10, 90, 7200, 86400], description="Polars durations convert to seconds")
+        for every in ("", "10", "1.5s", "10 s", "5w", "s10", "10s!"):
+            with result.raises(ValueError, description=f"'{every}' is rejected"):
+                bucket_seconds(every)
+        with result.raises(ValueError, description="analyze rejects an unsupported bucket before reading anything"):
+            analyze(runs_to_frame(analytics_runs()), bucket="1 minute")
+
+    @testcase(name="Overview", tags=["analytics"])
+    def overview(self, env, result):
+        overview = analyze(runs_to_frame(analytics_runs())).overview.row(0, named=True)
+        result.equal((overview["runs"], overview["failed_runs"], overview["stage_records"]), (20, 4, 60),
+                     description="Runs, failed runs and stage records are counted")
+        last_end = START + timedelta(milliseconds=500 * 19 + 20 + 200)
+        result.equal((overview["first_start"], overview["last_end"]), (START, last_end),
+                     description="The span runs from the first stage start to the last stage end")
+        result.equal((overview["span_s"], overview["failure_rate"], round(overview["runs_per_s"], 6)),
+                     (9.72, 0.2, round(20 / 9.72, 6)), description="Failure rate and run throughput")
+
+    @testcase(name="Stages", tags=["analytics"])
+    def stages(self, env, result):
+        stages = by_stage(analyze(runs_to_frame(analytics_runs())).stages, "stage")
+        result.equal(list(stages), ["cleanup", "create_user", "login"], description="One row per stage, sorted")
+
+        login, create, cleanup = stages["login"], stages["create_user"], stages["cleanup"]
+        result.equal((login["p50_ms"], login["p90_ms"], login["p95_ms"], login["p99_ms"], login["max_ms"]),
+                     (10.0, 18.0, 19.0, 20.0, 20.0), description="Percentiles of 1..20 ms are nearest-rank")
+        result.equal((login["mean_ms"], login["error_rate"], round(login["throughput_per_s"], 6)),
+                     (10.5, 0.0, round(20 / 9.52, 6)), description="Mean, error rate and throughput over the stage span")
+        result.equal((create["executed"], create["failed"], create["error_rate"]), (20, 4, 0.2),
+                     description="The error rate is failed over executed stages")
+        result.equal((create["p50_ms"], create["p95_ms"]), (100.0, 190.0),
+                     description="Failed stages are latency samples too")
+        result.equal((cleanup["passed"], cleanup["skipped"], cleanup["executed"], cleanup["error_rate"]),
+                     (16, 4, 16, 0.0), description="Skipped stages are counted but not executed")
+        result.equal((cleanup["p50_ms"], cleanup["max_ms"]), (5.0, 5.0), description="and carry no latency")
+
+        custom = analyze(runs_to_frame(analytics_runs()), percentiles=(0.25,)).stages
+        result.equal(by_stage(custom, "stage")["login"]["p25_ms"], 5.0, description="Other percentiles can be asked for")
+        result.false("p50_ms" in custom.columns, description="and replace the default ones")
+
+    @testcase(name="Timeline", tags=["analytics"])
+    def timeline(self, env, result):
+        timeline = analyze(runs_to_frame(analytics_runs()), bucket="2s").timeline
+        result.equal(timeline.height, 15, description="5 two-second buckets of 4 runs, 3 stages each")
+        rows = by_stage(timeline, "bucket", "stage")
+        first = rows[(START, "login")]
+        result.equal((first["executed"], first["p50_ms"], first["p90_ms"], first["max_ms"]), (4, 2.0, 4.0, 4.0),
+                     description="A bucket's percentiles are of its own latencies")
+        result.equal(first["throughput_per_s"], 2.0, description="Bucket throughput is per bucket length")
+        second = rows[(START + timedelta(seconds=2), "create_user")]
+        result.equal((second["failed"], second["error_rate"]), (1, 0.25), description="So are error rates")
+        result.equal(timeline.filter(pl.col("stage") == "create_user")["failed"].to_list(), [0, 1, 1, 1, 1],
+                     description="Runs 4, 9, 14 and 19 fail in buckets 2 to 5, in bucket order")
+
+    @testcase(name="Parameters", tags=["analytics"])
+    def parameters(self, env, result):
+        table = analyze(runs_to_frame(analytics_runs())).parameters
+        rows = by_stage(table, "parameter", "value", "stage")
+        result.equal(sorted({key[:2] for key in rows}), [("rate", "1"), ("rate", "2"), ("region", "eu")],
+                     description="Every parameter value recorded in the runs is broken down")
+        odd, even = rows[("rate", "1", "login")], rows[("rate", "2", "login")]
+        result.equal((odd["executed"], odd["p50_ms"], odd["p90_ms"]), (10, 9.0, 17.0),
+                     description="rate=1 logs in for 1, 3, .. 19 ms")
+        result.equal((even["p50_ms"], even["max_ms"]), (10.0, 20.0), description="rate=2 for 2, 4, .. 20 ms")
+        result.equal([rows[("rate", value, "create_user")]["error_rate"] for value in ("1", "2")], [0.2, 0.2],
+                     description="Two failures on each side")
+        everyone = analyze(runs_to_frame(analytics_runs())).stages.drop("stage")
+        result.equal(table.filter(pl.col("parameter") == "region").drop("parameter", "value", "stage").to_dicts(),
+                     everyone.to_dicts(), description="A value shared by every run matches the stage table")
+
+        limited = analyze(runs_to_frame(analytics_runs()), parameters=["rate"]).parameters
+        result.equal(limited["parameter"].unique().to_list(), ["rate"], description="parameters limits the breakdown")
+        empty = analyze(pl.DataFrame(schema=STAGE_SCHEMA))
+        result.equal((empty.overview["runs"].item(), empty.stages.height, empty.parameters.height), (0, 0, 0),
+                     description="No runs give empty tables")
+
+    @testcase(name="WriteJson", tags=["analytics"])
+    def write_json(self, env, result):
+        analytics = analyze_runs(analytics_runs(), bucket="5s")
+        path = analytics.write_json(self.directory / "report" / "analytics.json")
+        written = json.loads(path.read_text(encoding="utf-8"))
+        result.equal((written["bucket"], len(written["stages"]), len(written["timeline"])), ("5s", 3, 6),
+                     description="The tables are written as JSON")
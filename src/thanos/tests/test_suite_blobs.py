@@ -0,0 +1,76 @@
+import os
+import pickle
+import threading
+from pathlib import Path
+
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.blobs import BlobRef, BlobStore
+from thanos.cache import ConcurrentTestCache
+from thanos.stage import TestStage
+from thanos.tests.helpers import ScratchDirectorySuite
+from thanos.workflow import WorkflowRunner
+
+
+@testsuite
+class BlobStoreSuite(ScratchDirectorySuite):
+    """Spilling stage results to the content-addressed blob store."""
+
+    prefix = "thanos-blob-test-"
+
+    @testcase(name="SpillThresholdAndRoundTrip", tags=["blobs"])
+    def spill_threshold_and_round_trip(self, env, result):
+        store = BlobStore(str(self.directory / "roundtrip"), threshold=1024)
+        result.equal(store.spill("small"), "small", description="Values under the threshold are kept inline")
+        result.equal(store.spill(42), 42, description="Scalars are never spilled")
+
+        for value in (b"\x00\x01" * 4096, "é" * 4096, {"rows": list(range(2000))}, os.urandom(8192)):
+            ref = store.spill(value)
+            result.true(isinstance(ref, BlobRef), description=f"A large {ref.kind} value is spilled")
+            result.equal(ref.load(), value, description=f"A {ref.kind} blob ({ref.codec}) reads back unchanged")
+            result.equal(pickle.loads(pickle.dumps(ref)), ref, description="A BlobRef survives pickling")
+
+        random_ref = store.put(os.urandom(8192))
+        result.equal(random_ref.codec, "raw", description="Incompressible data is stored raw")
+        result.equal(len(store.open(random_ref)), 8192, description="A raw blob is readable through mmap")
+
+    @testcase(name="ConcurrentWritersStoreOneCopy", tags=["blobs", "concurrency"])
+    def concurrent_writers_store_one_copy(self, env, result):
+        root = str(self.directory / "concurrent")
+        payload = "response body " * 10000
+        refs = []
+        refs_lock = threading.Lock()
+
+        def write():
+            # A store per thread, as separate processes would have: nothing is shared but the directory
+            ref = BlobStore(root, threshold=1024).spill(payload)
+            with refs_lock:
+                refs.append(ref)
+
+        threads = [threading.Thread(target=write) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        result.equal(len({ref.digest for ref in refs}), 1, description="Every writer got the same digest")
+        files = [path for path in Path(root).rglob("*") if path.is_file()]
+        result.equal(len(files), 1, description="The blob is stored once, with no temporary files left")
+        result.equal(BlobStore(root).get(refs[0]), payload, description="The stored blob is intact")
+
+    @testcase(name="RunnerSpillsLargeResults", tags=["blobs", "workflow"])
+    def runner_spills_large_results(self, env, result):
+        store = BlobStore(str(self.directory / "runner"), threshold=1024)
+        runner = WorkflowRunner(cache=ConcurrentTestCache(log_writes=False), blob_store=store)
+        runner.add_stage(TestStage(name="fetch", action=lambda context: {"body": "x" * 50000}, dependencies=[]))
+        runner.add_stage(TestStage(name="parse", action=lambda context: len(context["fetch"]["body"]),
+                                   dependencies=["fetch"]))
+        run = runner.cache.get_run_result(runner.execute_workflow())
+
+        stages = {stage.name: stage for stage in run.stage_results}
+        result.equal(stages["parse"].result_data, 50000, description="Later stages see the full result")
+        result.true(isinstance(stages["fetch"].result_data, BlobRef),
+                    description="The run keeps a BlobRef for the large result")
+        result.less(len(pickle.dumps(run)), 2048, description="The cached run stays small")
+        result.equal(stages["fetch"].result_data.load(), {"body": "x" * 50000},
+                     description="The spilled result loads back")
@@ -0,0 +1,80 @@
+import threading
+
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.cache import ConcurrentTestCache
+from thanos.tests.helpers import make_run
+
+
+def run_threads(target, count: int):
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@testsuite
+class ConcurrentCacheSuite(object):
+    """ConcurrentTestCache under many writer threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+
+    @testcase(name="ConcurrentWritersLoseNothing", tags=["cache", "concurrency"])
+    def concurrent_writers_lose_nothing(self, env, result):
+        cache = ConcurrentTestCache(stripes=4, log_writes=False)
+
+        def write(index):
+            for n in range(500):
+                cache.add_run_result(make_run(f"{index}-{n}"))
+
+        run_threads(write, 8)
+        result.equal(len(cache), 4000, description="Every run added by 8 threads is cached")
+        result.equal(len({run.run_id for run in cache.get_all_results()}), 4000,
+                     description="A snapshot yields each run exactly once")
+
+    @testcase(name="TransitionStatusIsCompareAndSet", tags=["cache", "concurrency"])
+    def transition_status_is_compare_and_set(self, env, result):
+        cache = ConcurrentTestCache(stripes=1, log_writes=False)
+        cache.add_run_result(make_run("counter", status="0"))
+        successes = [0] * 8
+
+        def increment(index):
+            for _ in range(300):
+                current = cache.get_run_result("counter").overall_status
+                if cache.transition_status("counter", current, str(int(current) + 1)):
+                    successes[index] += 1
+
+        run_threads(increment, 8)
+        result.equal(int(cache.get_run_result("counter").overall_status), sum(successes),
+                     description="Exactly one of the racing transitions from each status wins")
+        result.false(cache.transition_status("counter", "0", "x"),
+                     description="A transition from a stale status is refused")
+        result.false(cache.transition_status("missing", None, "x"), description="An unknown run is not created")
+
+    @testcase(name="SnapshotsIgnoreLaterWrites", tags=["cache", "concurrency"])
+    def snapshots_ignore_later_writes(self, env, result):
+        cache = ConcurrentTestCache(stripes=4, log_writes=False)
+        for n in range(100):
+            cache.add_run_result(make_run(f"r{n}"))
+        snapshot = cache.snapshot()
+
+        def churn(index):
+            for n in range(index, 100, 4):
+                cache.transition_status(f"r{n}", "PASSED", "FAILED")
+                cache.add_run_result(make_run(f"new-{index}-{n}"))
+
+        run_threads(churn, 4)
+        cache.clear()
+        runs = list(snapshot)
+        result.equal(len(runs), 100, description="The snapshot keeps its 100 runs through replacements and clear")
+        result.equal({run.overall_status for run in runs}, {"PASSED"},
+                     description="The snapshot shows statuses as they were when it was taken")
+        result.equal([run.run_id for run in runs], [f"r{n}" for n in range(100)],
+                     description="Runs come back in insertion order across stripes")
+        result.equal(len(cache), 0, description="clear() empties the live cache")
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+
+import polars as pl
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.compare import compare_stage_latencies
+from thanos.store import STAGE_SCHEMA, ResultStore, RunSelector, runs_to_frame
+from thanos.tests.helpers import ScratchDirectorySuite, make_run, make_stage
+
+START = datetime(2026, 1, 5, 12, 0)
+
+
+def latency_runs(prefix: str, durations, stage: str = "login", status: str = "PASSED", start: datetime = START):
+    """One run per duration, each with a single stage of that latency."""
+    return [make_run(f"{prefix}-{n}", status, start + timedelta(seconds=n),
+                     [make_stage(stage, status, start + timedelta(seconds=n), float(duration))],
+                     metadata={"testcase": "Workflow", "parameters": {"rate": 2}})
+            for n, duration in enumerate(durations)]
+
+
+def latency_frame(durations, **options) -> pl.DataFrame:
+    return runs_to_frame(latency_runs("run", durations, **options))
+
+
+@testsuite
+class BaselineComparisonSuite(ScratchDirectorySuite):
+    """Stage latency comparisons against a baseline and the result store they read it from."""
+
+    prefix = "thanos-compare-test-"
+
+    @testcase(name="RegressionIsFlagged", tags=["compare"])
+    def regression_is_flagged(self, env, result):
+        baseline = latency_frame(range(10, 30))
+        comparison, = compare_stage_latencies(baseline, latency_frame(range(20, 40)))
+        result.equal(comparison.verdict, "regression", description="20..39 ms against 10..29 ms is a regression")
+        result.equal((comparison.baseline_p50_ms, comparison.candidate_p50_ms), (19.0, 29.0),
+                     description="Medians are nearest-rank: the 10th of 20 sorted latencies")
+        result.equal((comparison.baseline_p95_ms, comparison.candidate_p95_ms), (28.0, 38.0),
+                     description="p95s are nearest-rank: the 19th of 20 sorted latencies")
+        result.equal(round(comparison.relative_change, 4), round(29 / 19 - 1, 4),
+                     description="The relative change is that of the medians")
+        result.less(comparison.p_value, 0.05, description="The slowdown is significant")
+        result.equal(comparison.cliffs_delta, 0.75, description="Cliff's delta: (345 slower - 45 faster pairs) / 400")
+
+        improvement, = compare_stage_latencies(latency_frame(range(20, 40)), baseline)
+        result.equal(improvement.verdict, "improvement", description="The reverse comparison is an improvement")
+
+    @testcase(name="UnchangedLatencies", tags=["compare"])
+    def unchanged_latencies(self, env, result):
+        baseline = latency_frame(range(10, 30))
+        comparison, = compare_stage_latencies(baseline, latency_frame(range(29, 9, -1)))
+        result.equal((comparison.verdict, comparison.relative_change, comparison.cliffs_delta),
+                     ("unchanged", 0.0, 0.0), description="The same latencies in another order are unchanged")
+        small, = compare_stage_latencies(baseline, latency_frame(range(11, 31)))
+        result.equal(small.verdict, "unchanged", description="A 1 ms shift is too small an effect to flag")
+
+    @testcase(name="InsufficientData", tags=["compare"])
+    def insufficient_data(self, env, result):
+        comparison, = compare_stage_latencies(latency_frame(range(10, 30)), latency_frame([50, 60, 70]))
+        result.equal((comparison.verdict, comparison.candidate_n, comparison.p_value),
+                     ("insufficient data", 3, None), description="Fewer than min_samples runs are not tested")
+
+        failed = latency_frame(range(50, 70), status="FAILED")
+        comparison, = compare_stage_latencies(latency_frame(range(10, 30)), pl.concat([latency_frame([20] * 4), failed]))
+        result.equal((comparison.verdict, comparison.candidate_n), ("insufficient data", 4),
+                     description="Failed stages are not latency samples by default")
+
+        other = latency_frame(range(10, 30), stage="create_user")
+        result.equal(compare_stage_latencies(latency_frame(range(10, 30)), other), [],
+                     description="A stage on only one side is not compared")
+        with result.raises(ValueError, description="An unknown method is rejected"):
+            compare_stage_latencies(other, other, method="ttest")
+
+    @testcase(name="BootstrapIsSeeded", tags=["compare"])
+    def bootstrap_is_seeded(self, env, result):
+        baseline, candidate = latency_frame(range(10, 30)), latency_frame(range(20, 40))
+        first, = compare_stage_latencies(baseline, candidate, method="bootstrap", seed=7, bootstrap_samples=500)
+        again, = compare_stage_latencies(baseline, candidate, method="bootstrap", seed=7, bootstrap_samples=500)
+        result.equal(first.verdict, "regression", description="The bootstrap flags the regression too")
+        result.true(0 < first.ci_low < first.relative_change < first.ci_high,
+                    description="Its interval excludes zero and contains the observed change")
+        result.equal((first.ci_low, first.ci_high), (again.ci_low, again.ci_high),
+                     description="A fixed seed reproduces the interval")
+        result.true(first.p_value is None, description="The bootstrap reports an interval, not a p-value")
+
+        unchanged, = compare_stage_latencies(baseline, latency_frame(range(29, 9, -1)), method="bootstrap", seed=7,
+                                             bootstrap_samples=500)
+        result.true(unchanged.ci_low <= 0 <= unchanged.ci_high and unchanged.verdict == "unchanged",
+                    description="Identical samples give an interval around zero")
+
+    @testcase(name="StoreRoundTrip", tags=["compare", "store"])
+    def store_round_trip(self, env, result):
+        store = ResultStore(self.directory)
+        result.true(store.append([], label="empty") is None, description="Appending no runs writes no file")
+        result.equal(store.load().height, 0, description="An empty store loads an empty frame")
+
+        baseline = latency_runs("base", range(10, 30))
+        candidate = latency_runs("cand", range(20, 40), start=START + timedelta(hours=1))
+        store.append(baseline, label="v1", suite="ny")
+        store.append(candidate, label="v2", suite="ny")
+
+        loaded = store.load(RunSelector(label="v1", suite="ny"))
+        result.equal(loaded.schema, pl.Schema(STAGE_SCHEMA), description="Loaded frames keep the stage schema")
+        result.equal(loaded.sort("run_id").to_dicts(), runs_to_frame(baseline, "v1", "ny").sort("run_id").to_dicts(),
+                     description="The stored rows load back unchanged")
+        result.equal(loaded["parameters"].unique().to_list(), ['{"rate": 2}'],
+                     description="Parameters are stored as canonical JSON")
+
+        labels = store.labels()
+        result.equal(labels.select("label", "runs").to_dicts(), [{"label": "v2", "runs": 20}, {"label": "v1", "runs": 20}],
+                     description="Labels come back with their run counts, newest first")
+        result.equal(labels["first_run"].to_list()[1], START, description="and the time range they cover")
+
+        comparison, = compare_stage_latencies(store.load(RunSelector(label="v1")),
+                                              store.load(RunSelector(label="v2")))
+        result.equal(comparison.verdict, "regression", description="Stored baselines compare like in-memory ones")
@@ -0,0 +1,129 @@
+import hashlib
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+import threading
+
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.cache import ConcurrentTestCache
+from thanos.context import SharedBytes, WorkflowContext
+from thanos.stage import TestStage
+from thanos.workflow import WorkflowRunner
+
+READER = """
+import hashlib, pickle, sys
+shared = pickle.loads(bytes.fromhex(sys.argv[1]))
+print(hashlib.sha256(shared.view()).hexdigest())
+shared.release()
+"""
+
+
+def digest_shared_bytes(shared: SharedBytes) -> str:
+    """Entry point of a worker process: hash bytes it received as a shared memory name."""
+    digest = hashlib.sha256(shared.view()).hexdigest()
+    shared.release()
+    return digest
+
+
+@testsuite
+class WorkflowContextSuite(object):
+    """Scoped, snapshot-based workflow contexts and their shared memory."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+
+    @testcase(name="StagesOnlySeeTheirDependencies", tags=["context", "workflow"])
+    def stages_only_see_their_dependencies(self, env, result):
+        def run_workflow(audit_dependencies):
+            runner = WorkflowRunner(cache=ConcurrentTestCache(log_writes=False), context=WorkflowContext())
+            runner.add_stage(TestStage(name="login", action=lambda context: "token", dependencies=[]))
+            runner.add_stage(TestStage(name="create_user", action=lambda context: {"token": context["login"]},
+                                       dependencies=["login"]))
+            runner.add_stage(TestStage(name="audit", action=lambda context: context["login"],
+                                       dependencies=audit_dependencies))
+            run = runner.cache.get_run_result(runner.execute_workflow())
+            return {stage.name: stage.status for stage in run.stage_results}
+
+        result.equal(run_workflow(["create_user"])["audit"], "PASSED",
+                     description="A transitive dependency is readable")
+        result.equal(run_workflow([])["audit"], "FAILED",
+                     description="Reading an undeclared dependency fails the stage")
+
+    @testcase(name="SnapshotsAreStableUnderWrites", tags=["context", "concurrency"])
+    def snapshots_are_stable_under_writes(self, env, result):
+        context = WorkflowContext()
+        context["base"] = 0
+        changed = []
+        stop = threading.Event()
+
+        def read():
+            # Each reader holds one snapshot while the writer keeps replacing the context's
+            snapshot = context.view_for("reader", ["base", "late"])
+            before = dict(snapshot)
+            while not stop.is_set():
+                if dict(snapshot) != before:
+                    changed.append(before)
+                    return
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for n in range(5000):
+            context["late"] = n
+            context["base"] = n
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+        result.equal(changed, [], description="No reader saw its snapshot change")
+        result.equal(dict(context.view_for("reader", ["base", "late"])), {"base": 4999, "late": 4999},
+                     description="A new snapshot sees the latest writes")
+
+    @testcase(name="BytesAreSharedWithoutCopies", tags=["context", "shared-memory"])
+    def bytes_are_shared_without_copies(self, env, result):
+        context = WorkflowContext(shared_memory_threshold=1024)
+        body = bytearray(b"0123456789" * 100000)
+        context["small"] = bytearray(b"tiny")
+        context["body"] = body
+
+        view = context["body"]
+        result.true(isinstance(view, memoryview) and view.readonly, description="Results are read-only views")
+        with result.raises(TypeError, description="A consumer cannot write through the view"):
+            view[0] = 0
+        body[0] = ord("x")
+        result.equal(bytes(view[:1]), b"0", description="Later changes to the producer's bytearray do not leak in")
+        result.equal(bytes(context["small"]), b"tiny", description="Small results stay in process memory")
+
+        result.equal(context.shared_segments, 1, description="Only the large result moved to shared memory")
+
+        del view
+        context.clear()
+        result.equal(context.shared_segments, 0, description="clear() frees the run's shared memory")
+
+    @testcase(name="SegmentsOutliveTheProcessesReadingThem", tags=["context", "shared-memory"])
+    def segments_outlive_readers(self, env, result):
+        data = b"0123456789" * 100000
+        shared = SharedBytes.copy_of(data)
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            digest = pool.apply(digest_shared_bytes, (shared,))
+        result.equal(digest, hashlib.sha256(data).hexdigest(),
+                     description="Another process reads the segment it received by name")
+
+        # A process with a resource tracker of its own attaches and exits
+        reader = subprocess.run([sys.executable, "-c", READER, pickle.dumps(shared).hex()],
+                                env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+                                capture_output=True, text=True)
+        result.equal(reader.stdout.strip(), hashlib.sha256(data).hexdigest(),
+                     description="An unrelated process reads the segment too")
+        attached = pickle.loads(pickle.dumps(shared))
+        result.equal(bytes(attached.view()[:10]), b"0123456789",
+                     description="Readers exiting do not unlink a segment they only attached to")
+        attached.release()
+        result.true(shared.release(), description="The owner frees the segment")
@@ -0,0 +1,133 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import polars as pl
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.dataset import SHARD_COUNT_ENV, SHARD_INDEX_ENV, DatasetExhausted, DatasetFeeder, shard_range
+from thanos.stages.dataset import DatasetStage
+from thanos.testing.stage_factory import StageFactory
+from thanos.tests.helpers import ScratchDirectorySuite
+
+ROWS = 1000
+
+
+@testsuite
+class DatasetFeederSuite(ScratchDirectorySuite):
+    """Sharded dataset feeders and the stage handing their rows to runs."""
+
+    prefix = "thanos-dataset-test-"
+
+    def setup(self, env, result):
+        super().setup(env, result)
+        frame = pl.DataFrame({"id": range(ROWS), "username": [f"user{n}" for n in range(ROWS)]})
+        self.parquet = self.directory / "users.parquet"
+        self.csv = self.directory / "users.csv"
+        # Small row groups so a shard's slices span several of them
+        frame.write_parquet(self.parquet, row_group_size=100)
+        frame.write_csv(self.csv)
+
+    @staticmethod
+    def _ids(feeder: DatasetFeeder):
+        return [row["id"] for row in feeder]
+
+    def _check_shards(self, result, path, count: int, batch_size: int):
+        shards = [self._ids(DatasetFeeder(str(path), shard_index=index, shard_count=count, batch_size=batch_size))
+                  for index in range(count)]
+        ids = [row_id for shard in shards for row_id in shard]
+        result.equal(len(ids), len(set(ids)), description=f"{count} shards of {path.suffix} share no row")
+        result.equal(sorted(ids), list(range(ROWS)), description="and together hold every row")
+        result.less(max(map(len, shards)) - min(map(len, shards)), 2, description="Shard sizes differ by at most one")
+        return shards
+
+    @testcase(name="ParquetShardsAreDisjointAndComplete", tags=["dataset", "parquet"])
+    def parquet_shards(self, env, result):
+        result.equal([shard_range(10, index, 3) for index in range(3)], [(0, 3), (3, 6), (6, 10)],
+                     description="Shard ranges are contiguous and cover every row")
+        shards = self._check_shards(result, self.parquet, 3, batch_size=64)
+        result.equal([(shard[0], shard[-1]) for shard in shards], [(0, 332), (333, 665), (666, 999)],
+                     description="Parquet shards are contiguous row ranges, in file order")
+        self._check_shards(result, self.parquet, 7, batch_size=1000)
+
+        feeder = DatasetFeeder(str(self.parquet), columns=["username"], batch_size=10)
+        result.equal(feeder.next_row(), {"username": "user0"}, description="columns limits what is read")
+
+    @testcase(name="CsvShardsAreDisjointAndComplete", tags=["dataset", "csv"])
+    def csv_shards(self, env, result):
+        # A batch size that is not a multiple of the shard count deals rows across batch boundaries
+        shards = self._check_shards(result, self.csv, 3, batch_size=7)
+        result.equal([shard[:3] for shard in shards], [[0, 3, 6], [1, 4, 7], [2, 5, 8]],
+                     description="CSV rows are dealt out round-robin")
+        result.true(all(all(row_id % 3 == index for row_id in shard) for index, shard in enumerate(shards)),
+                    description="in every batch")
+        self._check_shards(result, self.csv, 4, batch_size=1000)
+
+    @testcase(name="ShardsDefaultToTheEnvironment", tags=["dataset"])
+    def shards_default_to_the_environment(self, env, result):
+        saved = {key: os.environ.get(key) for key in (SHARD_INDEX_ENV, SHARD_COUNT_ENV)}
+        feeder = DatasetFeeder(str(self.parquet))
+        try:
+            os.environ.update({SHARD_INDEX_ENV: "1", SHARD_COUNT_ENV: "4"})
+            result.equal(feeder.next_row()["id"], 250, description="The shard is resolved on the first read")
+            os.environ[SHARD_INDEX_ENV] = "4"
+            with result.raises(ValueError, description="A shard index outside the count is rejected"):
+                DatasetFeeder(str(self.parquet)).next_row()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+        with result.raises(ValueError, description="Only Parquet and CSV are supported"):
+            DatasetFeeder(str(self.directory / "users.json"))
+
+    @testcase(name="ExhaustedVersusLooping", tags=["dataset"])
+    def exhausted_versus_looping(self, env, result):
+        for path in (self.parquet, self.csv):
+            feeder = DatasetFeeder(str(path), shard_index=3, shard_count=4, batch_size=100)
+            result.equal(len(feeder.take(300)), 250, description=f"take stops at the end of a {path.suffix} shard")
+            with result.raises(DatasetExhausted, description="then a non-looping feeder is exhausted"):
+                feeder.next_row()
+
+            looping = DatasetFeeder(str(path), shard_index=3, shard_count=4, batch_size=100, loop=True)
+            rows = looping.take(300)
+            result.equal(([row["id"] for row in rows[:250]] * 2)[:300], [row["id"] for row in rows],
+                         description="A looping feeder starts its shard over")
+            result.equal((looping.epoch, looping.rows_served), (1, 300), description="and counts the restarts")
+            looping.reset()
+            result.equal((looping.next_row(), looping.epoch), (rows[0], 0), description="reset starts from the top")
+
+        empty = DatasetFeeder(str(self.parquet), shard_index=0, shard_count=ROWS + 1, loop=True)
+        with result.raises(DatasetExhausted, description="An empty shard cannot loop forever"):
+            empty.next_row()
+
+    @testcase(name="ConcurrentRunsGetDistinctRows", tags=["dataset", "concurrency"])
+    def concurrent_runs_get_distinct_rows(self, env, result):
+        feeder = DatasetFeeder(str(self.csv), batch_size=50)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda _: feeder.next_row()["id"], range(ROWS)))
+        result.equal(sorted(ids), list(range(ROWS)), description="Every row is handed out exactly once")
+
+    @testcase(name="PerUserRowsStick", tags=["dataset", "stage"])
+    def per_user_rows_stick(self, env, result):
+        stage = StageFactory.create_dataset_stage("user_row", str(self.parquet), per_user=True, batch_size=10)
+        seen = {}
+
+        def virtual_user():
+            seen[threading.current_thread().name] = [stage.action({})["id"] for _ in range(5)]
+
+        users = [threading.Thread(target=virtual_user, name=f"user-{n}") for n in range(4)]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        result.true(all(len(set(ids)) == 1 for ids in seen.values()),
+                    description="A virtual user keeps its row for all of its runs")
+        result.equal(sorted(ids[0] for ids in seen.values()), [0, 1, 2, 3],
+                     description="Virtual users each draw a row of their own")
+        result.equal(stage.action.feeder.rows_served, 4, description="Rows are drawn once per user, not per run")
+
+        shared = DatasetStage(DatasetFeeder(str(self.parquet)))
+        result.equal([shared({})["id"] for _ in range(3)], [0, 1, 2],
+                     description="Without per_user every run gets the next row")
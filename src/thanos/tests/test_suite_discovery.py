@@ -0,0 +1,155 @@
+import textwrap
+import threading
+import time
+
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.cli.watch import EngineWatcher
+from thanos.discovery import ASTTestSuiteParser, DiscoveryIndex
+from thanos.tests.helpers import ScratchDirectorySuite
+
+SUITE = """
+from testplan.testing.multitest import testsuite
+{imports}
+
+@testsuite
+class {name}(object):
+    def test_one(self, env, result):
+        pass
+"""
+
+# A package with two helper chains and three engines:
+# alpha -> helpers.client -> helpers.base, beta -> helpers.base and beta.shared, gamma -> nothing
+PACKAGE = {
+    "__init__.py": "",
+    "helpers/__init__.py": "",
+    "helpers/base.py": "VALUE = 1\n",
+    "helpers/client.py": "from .base import VALUE\n",
+    "helpers/unused.py": "import os\n",
+    "engine/__init__.py": "",
+    "engine/alpha/__init__.py": "",
+    "engine/alpha/test_suite_one.py": SUITE.format(imports="from pkg.helpers.client import VALUE", name="Alpha"),
+    "engine/beta/__init__.py": "",
+    "engine/beta/shared.py": "",
+    "engine/beta/test_suite_one.py": SUITE.format(imports="from ...helpers import base\nfrom . import shared",
+                                                  name="Beta"),
+    "engine/gamma/__init__.py": "",
+    "engine/gamma/test_suite_one.py": SUITE.format(imports="import os", name="Gamma"),
+}
+
+
+@testsuite
+class DiscoveryIndexSuite(ScratchDirectorySuite):
+    """Import parsing, incremental indexing and the suites an edit affects."""
+
+    prefix = "thanos-discovery-test-"
+
+    def _package(self, name: str):
+        root = self.directory / name / "pkg"
+        for relative, content in PACKAGE.items():
+            path = root / relative
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+        return root
+
+    @staticmethod
+    def _names(suites):
+        return sorted(suite.class_name for suite in suites)
+
+    @testcase(name="ImportStringsArePinned", tags=["discovery"])
+    def import_strings_are_pinned(self, env, result):
+        path = self.directory / "imports.py"
+        path.write_text(textwrap.dedent("""
+            import os, json as j
+            import pkg.helpers.base
+            from pkg.helpers.client import VALUE, other as o
+            from . import shared
+            from .shared import thing
+            from ..helpers import base
+            from ... import top
+            from testplan.testing import multitest
+
+            @multitest.testsuite
+            class Suite(object):
+                def first(self):
+                    pass
+
+                def second(self):
+                    pass
+
+            class NotASuite(object):
+                pass
+        """))
+        suites, imports = ASTTestSuiteParser().parse_module(path)
+        result.equal(imports, ["os", "json", "pkg.helpers.base", "pkg.helpers.client.VALUE",
+                               "pkg.helpers.client.other", ".shared", ".shared.thing", "..helpers.base", "...top",
+                               "testplan.testing.multitest"],
+                     description="Imports are recorded by their full name; relative ones keep their dots")
+        result.equal([(suite.class_name, suite.decorator_name, suite.methods) for suite in suites],
+                     [("Suite", "testsuite", ["first", "second"])],
+                     description="Only decorated classes are suites, whatever module the decorator comes from")
+
+        path.write_text("class Broken(:\n")
+        result.equal(ASTTestSuiteParser().parse_module(path), ([], []), description="A syntax error yields nothing")
+
+    @testcase(name="RefreshDetectsChanges", tags=["discovery"])
+    def refresh_detects_changes(self, env, result):
+        root = self._package("changes")
+        index = DiscoveryIndex(root, suite_root=root / "engine")
+        first = index.refresh()
+        result.equal((len(first.added), first.modified, first.removed), (len(PACKAGE), [], []),
+                     description="The first refresh adds every file")
+        result.equal(self._names(index.suites()), ["Alpha", "Beta", "Gamma"], description="and finds every suite")
+        result.false(index.refresh(), description="Nothing changed, nothing is reported")
+
+        alpha = root / "engine/alpha/test_suite_one.py"
+        alpha.write_text(alpha.read_text() + SUITE.format(imports="", name="AlphaTwo"))
+        (root / "engine/alpha/test_suite_two.py").write_text(SUITE.format(imports="", name="AlphaThree"))
+        (root / "helpers/unused.py").unlink()
+        (root / "helpers/suites.py").write_text(SUITE.format(imports="", name="NotAnEngineSuite"))
+        changes = index.refresh()
+        result.equal(changes.modified, [alpha.resolve()], description="An edited file is modified")
+        result.equal(sorted(path.name for path in changes.added), ["suites.py", "test_suite_two.py"],
+                     description="New files are added")
+        result.equal(changes.removed, [(root / "helpers/unused.py").resolve()], description="Deleted files are removed")
+        result.equal(self._names(index.suites()), ["Alpha", "AlphaThree", "AlphaTwo", "Beta", "Gamma"],
+                     description="Suites follow the edits, outside suite_root or the pattern they are ignored")
+
+    @testcase(name="AffectedSuitesFollowImports", tags=["discovery"])
+    def affected_suites_follow_imports(self, env, result):
+        root = self._package("affected")
+        index = DiscoveryIndex(root, suite_root=root / "engine")
+        index.refresh()
+
+        def affected(*relative):
+            return self._names(index.affected_suites([root / path for path in relative]))
+
+        result.equal(affected("helpers/base.py"), ["Alpha", "Beta"],
+                     description="A module's suites include those importing it through another module")
+        result.equal(affected("helpers/client.py"), ["Alpha"], description="Only suites downstream are affected")
+        result.equal(affected("engine/beta/shared.py"), ["Beta"], description="'from . import x' is a dependency")
+        result.equal(affected("engine/gamma/test_suite_one.py"), ["Gamma"], description="A suite file affects itself")
+        result.equal(affected("helpers/unused.py", "README.md"), [], description="Unused modules affect nothing")
+
+        (root / "helpers/client.py").unlink()
+        index.refresh()
+        result.equal(affected("helpers/client.py"), ["Alpha"], description="Deleting a module affects its importers")
+
+    @testcase(name="HelperEditRerunsOnlyItsDependents", tags=["discovery", "watch"])
+    def helper_edit_reruns_only_dependents(self, env, result):
+        root = self._package("watch")
+        watcher = EngineWatcher(interval=0.01, package_root=root, engine_root=root / "engine")
+        result.equal([engine.name for engine in watcher.start()], ["alpha", "beta", "gamma"],
+                     description="The watcher indexes every engine")
+
+        def edit():
+            time.sleep(0.05)
+            (root / "helpers/client.py").write_text("from .base import VALUE\nOTHER = 2\n")
+
+        editor = threading.Thread(target=edit)
+        editor.start()
+        changed = watcher.wait_for_changes()
+        editor.join()
+        result.equal(changed, {(root / "helpers/client.py").resolve()}, description="The watcher sees the edit")
+        result.equal([engine.name for engine in watcher.affected_engines(changed)], ["alpha"],
+                     description="Only the engine importing the helper is re-run")
@@ -0,0 +1,93 @@
+import socket
+import threading
+
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.distributed import Coordinator, DistributedJob, Worker
+
+
+def start_workers(port: int, concurrencies, errors: list):
+    """Run one in-process Worker per entry of concurrencies, collecting what they raise."""
+    def serve(worker):
+        try:
+            worker.run()
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+
+    threads = []
+    for index, concurrency in enumerate(concurrencies):
+        worker = Worker("127.0.0.1", port, concurrency=concurrency, worker_id=f"worker-{index}", batch_size=5)
+        thread = threading.Thread(target=serve, args=(worker,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+@testsuite
+class DistributedSuite(object):
+    """A Coordinator driving two in-process Workers over loopback."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+
+    @testcase(name="QuotaAndMergedHistograms", tags=["distributed"])
+    def quota_and_merged_histograms(self, env, result):
+        job = DistributedJob(workflow="standard_user_workflow", runs=20, simulate=True)
+        coordinator = Coordinator(job, expected_workers=2, host="127.0.0.1", port=0, connect_timeout=30)
+        errors = []
+        threads = start_workers(coordinator.port, [1, 3], errors)
+        summary = coordinator.run()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        result.equal(errors, [], description="Both workers finished cleanly")
+        assigned = {worker.worker_id: worker.assigned_runs for worker in summary.workers}
+        result.equal(assigned, {"worker-0": 5, "worker-1": 15}, description="Runs are split by worker concurrency")
+        result.equal({worker.worker_id: worker.runs for worker in summary.workers}, assigned,
+                     description="Each worker ran its quota")
+        result.equal(len(summary.runs), 20, description="Every run was streamed back to the coordinator")
+
+        executed = {}
+        for run in summary.runs:
+            for stage in run.stage_results:
+                if stage.status != "SKIPPED":
+                    executed[stage.name] = executed.get(stage.name, 0) + 1
+        merged = {stage: histogram.count for stage, histogram in summary.histograms.items()}
+        result.equal(merged, executed, description="Merged histograms count every executed stage of every worker")
+
+    @testcase(name="WorkerErrorIsReported", tags=["distributed"])
+    def worker_error_is_reported(self, env, result):
+        job = DistributedJob(workflow="no_such_workflow", runs=4)
+        coordinator = Coordinator(job, expected_workers=2, host="127.0.0.1", port=0, connect_timeout=30)
+        errors = []
+        threads = start_workers(coordinator.port, [1, 1], errors)
+        summary = coordinator.run()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        result.equal(len(errors), 2, description="Each worker raised after sending ERROR")
+        result.true(all("no_such_workflow" in (worker.error or "") for worker in summary.workers),
+                    description="The coordinator records each worker's error")
+        result.false(summary.passed, description="A run with a failed worker does not pass")
+
+    @testcase(name="SilentClientIsDropped", tags=["distributed"])
+    def silent_client_is_dropped(self, env, result):
+        job = DistributedJob(workflow="standard_user_workflow", runs=2, simulate=True)
+        coordinator = Coordinator(job, expected_workers=1, host="127.0.0.1", port=0, connect_timeout=30,
+                                  handshake_timeout=0.2)
+        # Connects first and never says HELLO
+        silent = socket.create_connection(("127.0.0.1", coordinator.port))
+        errors = []
+        threads = start_workers(coordinator.port, [1], errors)
+        summary = coordinator.run()
+        for thread in threads:
+            thread.join(timeout=30)
+        silent.close()
+
+        result.equal([worker.worker_id for worker in summary.workers], ["worker-0"],
+                     description="The silent connection was dropped after the handshake timeout")
+        result.equal(len(summary.runs), 2, description="The real worker still ran the job")
@@ -0,0 +1,139 @@
+import threading
+from collections import Counter
+
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+from testplan.testing.result import Result
+
+from thanos.fixtures import FixtureScope, FixtureStore
+from thanos.testing.base_test_suite import StageDefinition, TestConfiguration, TestSuiteTemplate
+from thanos.testing.stage_factory import StageFactory
+from thanos.tests.helpers import prepare_suite
+
+
+class ScopedSuite(TestSuiteTemplate):
+    """One stage per fixture scope, counting how often each is created and torn down."""
+
+    def __init__(self, name: str, max_workers: int = 1):
+        super().__init__(name)
+        self.max_workers = max_workers
+        self.created = Counter()
+        self.released = []
+        self._lock = threading.Lock()
+
+    def _stage(self, name: str, scope: str, dependencies):
+        def action(context):
+            with self._lock:
+                self.created[name] += 1
+            return f"{name}-{self.created[name]}"
+
+        def teardown(value):
+            with self._lock:
+                self.released.append(value)
+
+        return StageDefinition(name=name, action=action, dependencies=dependencies, scope=scope, teardown=teardown)
+
+    def get_stage_definitions(self):
+        return [self._stage("session", FixtureScope.PER_SUITE, []),
+                self._stage("account", FixtureScope.PER_TESTCASE, ["session"]),
+                self._stage("request", FixtureScope.PER_RUN, ["account"])]
+
+    def get_test_configuration(self):
+        return TestConfiguration(name="Scoped", tags=[], parameters={"rate": (1, 2)}, max_workers=self.max_workers)
+
+
+@testsuite
+class FixtureScopeSuite(object):
+    """Fixture reuse across runs, testcases and suites, and teardown order."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+
+    @testcase(name="StoreComputesOnce", tags=["fixtures", "concurrency"])
+    def store_computes_once(self, env, result):
+        store = FixtureStore("test")
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return "value"
+
+        threads = [threading.Thread(target=store.get_or_create, args=("key", factory)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result.equal(len(calls), 1, description="Concurrent callers compute a fixture once")
+
+        def failing():
+            raise RuntimeError("boom")
+
+        with result.raises(RuntimeError, description="A failing factory raises to its caller"):
+            store.get_or_create("other", failing)
+        result.equal(store.get_or_create("other", lambda: "retried"), ("retried", True),
+                     description="A failed fixture is computed again by the next caller")
+
+    @testcase(name="TeardownInReverseOrder", tags=["fixtures"])
+    def teardown_in_reverse_order(self, env, result):
+        store = FixtureStore("test")
+        released = []
+
+        def broken(value):
+            raise RuntimeError("teardown failed")
+
+        for key in ("a", "b", "c"):
+            store.get_or_create(key, lambda key=key: key, released.append)
+        store.get_or_create("broken", lambda: "x", broken)
+        store.teardown()
+        result.equal(released, ["c", "b", "a"], description="Fixtures are released newest first, "
+                                                              "past a teardown that fails")
+        result.equal(len(store), 0, description="Teardown forgets every value")
+
+    @testcase(name="ScopesAcrossTestcases", tags=["fixtures", "workflow"])
+    def scopes_across_testcases(self, env, result):
+        suite = prepare_suite(ScopedSuite("scoped"))
+        for rate in (1, 1, 2):
+            suite.execute_workflow_test(None, Result(), rate=rate)
+
+        result.equal(suite.created["session"], 1, description="A per-suite fixture is created once")
+        result.equal(suite.created["account"], 3, description="Each testcase gets its own per-testcase fixture")
+        result.equal(suite.created["request"], 3, description="A per-run stage runs every time")
+        result.equal(suite.released, ["account-1", "account-2", "account-3"],
+                     description="Per-testcase fixtures are released as each testcase ends")
+
+        suite.fixtures.teardown()
+        result.equal(suite.released[-1], "session-1", description="Per-suite fixtures are released with the suite")
+
+    @testcase(name="TestcaseFixtureSharedByItsRuns", tags=["fixtures", "workflow"])
+    def testcase_fixture_shared_by_its_runs(self, env, result):
+        suite = prepare_suite(ScopedSuite("scoped"))
+        for _ in range(3):
+            suite.prepare_workflow(suite.runner, {"rate": 1})
+            suite.runner.execute_workflow()
+        result.equal(suite.created["account"], 1, description="Runs of one testcase share its fixture")
+
+        suite.prepare_workflow(suite.runner, {"rate": 2})
+        suite.runner.execute_workflow()
+        result.equal(suite.created["account"], 2, description="Another parameter combination gets a fixture of its own")
+
+        suite.fixtures.teardown_testcase("Scoped <rate=1>")
+        result.equal(suite.released, ["account-1"], description="Tearing down a testcase releases only its fixtures")
+        suite.fixtures.teardown()
+
+    @testcase(name="MatrixCombinationsAreTestcases", tags=["fixtures", "matrix"])
+    def matrix_combinations_are_testcases(self, env, result):
+        suite = prepare_suite(ScopedSuite("scoped", max_workers=2))
+        suite.execute_workflow_matrix(None, Result())
+        result.equal(suite.created["session"], 1, description="Concurrent combinations share the suite fixture")
+        result.equal(suite.created["account"], 2, description="Each combination gets its own testcase fixture")
+        result.equal(sorted(suite.released), ["account-1", "account-2"],
+                     description="Testcase fixtures are released once the matrix is done")
+        suite.fixtures.teardown()
+
+    @testcase(name="LoginIsPerRunByDefault", tags=["fixtures"])
+    def login_is_per_run_by_default(self, env, result):
+        result.equal(StageFactory.create_login_stage().scope, FixtureScope.PER_RUN,
+                     description="The standard login stage is not shared unless asked")
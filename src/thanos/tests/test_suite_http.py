@@ -0,0 +1,149 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.mock import LatencyDistribution, MockServiceConfig, MockServiceThread
+from thanos.stages.http import ConnectionPoolManager, HttpStage
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler whose path picks how it misbehaves.
+
+    ``/drop-second`` closes the connection without answering its second
+    request, as a server does with an idle keep-alive connection it has just
+    timed out. ``/close-idle`` answers and then closes the connection
+    without announcing it.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.received.append(self.command)
+        self.requests_on_connection = getattr(self, "requests_on_connection", 0) + 1
+        if self.path == "/drop-second" and self.requests_on_connection > 1:
+            self.close_connection = True
+            return
+
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.path == "/close-idle":
+            self.close_connection = True
+
+    do_GET = do_POST = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+@testsuite
+class HttpStageSuite(object):
+    """HttpStage against the bundled mock service and a misbehaving http.server."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+        config = MockServiceConfig(port=0, endpoint_latency={"login": LatencyDistribution("constant", value=20)})
+        self.mock = MockServiceThread(config).start()
+        self.flaky = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        self.flaky.daemon_threads = True
+        self.flaky.received = []
+        threading.Thread(target=self.flaky.serve_forever, daemon=True).start()
+        self.flaky_url = f"http://127.0.0.1:{self.flaky.server_address[1]}"
+        result.log(f"Mock service at {self.mock.base_url}, flaky server at {self.flaky_url}")
+
+    @testcase(name="PooledConnectionsAreReused", tags=["http"])
+    def pooled_connections_are_reused(self, env, result):
+        pools = ConnectionPoolManager(max_connections_per_host=2)
+        stage = HttpStage("GET", f"{self.mock.base_url}/health", pool_manager=pools)
+        reused = [stage({})["timings"]["reused_connection"] for _ in range(3)]
+        result.equal(reused, [False, True, True], description="Only the first request opens a connection")
+
+        pool = pools.get_pool("http", "127.0.0.1", self.mock.config.port)
+        result.equal(len(pool._idle), 1, description="One idle keep-alive connection stays pooled")
+        pools.close_all()
+
+    @testcase(name="ExpectedStatus", tags=["http"])
+    def expected_status(self, env, result):
+        pools = ConnectionPoolManager()
+        created = HttpStage("POST", f"{self.mock.base_url}/users", expected_status=201, body={"username": "ada"},
+                            pool_manager=pools)({})
+        result.equal(created["status"], 201, description="POST /users returns 201")
+        result.equal(created["body"]["username"], "ada", description="A dict body is sent as JSON")
+
+        missing = HttpStage("GET", f"{self.mock.base_url}/users/nobody", pool_manager=pools)
+        with result.raises(AssertionError, description="An unexpected status fails the stage"):
+            missing({})
+        result.equal(HttpStage("GET", f"{self.mock.base_url}/users/nobody", expected_status=(200, 404),
+                               pool_manager=pools)({})["status"], 404,
+                     description="Any of several expected statuses passes")
+        pools.close_all()
+
+    @testcase(name="TemplatesAndLiteralBodies", tags=["http"])
+    def templates_and_literal_bodies(self, env, result):
+        pools = ConnectionPoolManager()
+        context = {"create_user": {"body": {"user_id": "u1"}}, "login": {"body": {"session_id": "s1"}}}
+        created = HttpStage("POST", f"{self.mock.base_url}/users", expected_status=201,
+                            body='{"user_id": "u1", "username": "{not a template}"}', pool_manager=pools)({})
+        result.equal(created["body"]["username"], "{not a template}",
+                     description="A str body is sent literally, braces included")
+
+        profile = HttpStage("GET", f"{self.mock.base_url}/users/{{create_user[body][user_id]}}",
+                            headers={"X-Session-Id": "{login[body][session_id]}"}, pool_manager=pools)(context)
+        result.equal(profile["body"]["user_id"], "u1", description="The URL is filled from the context")
+
+        built = HttpStage("POST", f"{self.mock.base_url}/users", expected_status=201, pool_manager=pools,
+                          body=lambda ctx: {"username": ctx["login"]["body"]["session_id"]})(context)
+        result.equal(built["body"]["username"], "s1", description="A callable body is built from the context")
+        pools.close_all()
+
+    @testcase(name="Timings", tags=["http"])
+    def timings(self, env, result):
+        pools = ConnectionPoolManager()
+        timings = HttpStage("POST", f"{self.mock.base_url}/login", pool_manager=pools)({})["timings"]
+        result.greater_equal(timings["connect_ms"], 0, description="Connect time is measured")
+        result.greater_equal(timings["ttfb_ms"], 20, description="Time to first byte includes the 20 ms server latency")
+        result.greater_equal(timings["total_ms"], timings["ttfb_ms"], description="Total time covers the body read")
+        result.false(timings["reused_connection"], description="The first request uses a new connection")
+        pools.close_all()
+
+    @testcase(name="StaleConnectionRetry", tags=["http"])
+    def stale_connection_retry(self, env, result):
+        # A fresh pool per scenario, so each starts from a connection that has served one request
+        received = self.flaky.received
+
+        received.clear()
+        stage = HttpStage("GET", f"{self.flaky_url}/drop-second", pool_manager=ConnectionPoolManager())
+        stage({})
+        retried = stage({})
+        result.false(retried["timings"]["reused_connection"], description="The GET was retried on a new connection")
+        result.equal(received, ["GET", "GET", "GET"], description="The dropped GET was sent again")
+
+        received.clear()
+        stage = HttpStage("POST", f"{self.flaky_url}/drop-second", body={"n": 1}, pool_manager=ConnectionPoolManager())
+        stage({})
+        with result.raises(ConnectionError, description="A POST dropped after it was sent is not retried"):
+            stage({})
+        result.equal(received, ["POST", "POST"], description="The POST reached the server only once")
+
+        received.clear()
+        stage = HttpStage("POST", f"{self.flaky_url}/close-idle", body={"n": 1}, pool_manager=ConnectionPoolManager())
+        stage({})
+        time.sleep(0.1)
+        second = stage({})
+        result.false(second["timings"]["reused_connection"],
+                     description="An idle connection the server closed is not reused")
+        result.equal(received, ["POST", "POST"], description="No request was sent on the closed connection")
+
+    def teardown(self, env, result):
+        self.mock.stop()
+        self.flaky.shutdown()
+        self.flaky.server_close()
@@ -0,0 +1,110 @@
+import threading
+import time
+
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+from testplan.testing.result import Result
+
+from thanos.testing.base_test_suite import StageDefinition, TestConfiguration, TestSuiteTemplate
+from thanos.testing.matrix import MatrixExecutor
+from thanos.tests.helpers import prepare_suite
+
+
+class ConcurrencySuite(TestSuiteTemplate):
+    """A two-stage workflow that records how many combinations run at once; rate=4 fails."""
+
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(name)
+        self.max_workers = max_workers
+        self.running = 0
+        self.peak = 0
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def _measure(self, context):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            self.threads.add(threading.current_thread().name)
+        # The first combination is the slowest, so completion order differs from parameter order
+        time.sleep(0.4 if context["start"] == 1 else 0.1)
+        with self._lock:
+            self.running -= 1
+        return context["start"]
+
+    def get_stage_definitions(self):
+        return [StageDefinition(name="start", action=lambda context: None, dependencies=[]),
+                StageDefinition(name="measure", action=self._measure, dependencies=["start"],
+                                failure_condition=lambda params: params.get("rate") == 4)]
+
+    def prepare_workflow(self, runner, test_params):
+        super().prepare_workflow(runner, test_params)
+        # Hand the combination's rate to its own start stage
+        runner.stages["start"].action = lambda context, rate=test_params["rate"]: rate
+
+    def get_test_configuration(self):
+        return TestConfiguration(name="Matrix", tags=[], parameters={"rate": (1, 2, 3, 4)},
+                                 max_workers=self.max_workers)
+
+
+@testsuite
+class MatrixExecutionSuite(object):
+    """Parameter combinations run concurrently, each on its own runner."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+
+    @testcase(name="CombinationsRunConcurrently", tags=["matrix", "concurrency"])
+    def combinations_run_concurrently(self, env, result):
+        suite = prepare_suite(ConcurrencySuite("matrix", max_workers=2))
+        start = time.perf_counter()
+        suite.execute_workflow_matrix(None, Result())
+        elapsed = time.perf_counter() - start
+        result.equal(suite.peak, 2, description="max_workers combinations run at the same time, and no more")
+        result.equal(len(suite.threads), 2, description="on as many matrix threads")
+        result.less(elapsed, 0.4 + 0.1 * 2, description="Faster than sleeping through the combinations one by one")
+
+        serial = prepare_suite(ConcurrencySuite("serial", max_workers=1))
+        serial.execute_workflow_matrix(None, Result())
+        result.equal(serial.peak, 1, description="max_workers=1 runs one combination at a time")
+        with result.raises(ValueError, description="max_workers below 1 is rejected"):
+            MatrixExecutor(serial, max_workers=0)
+
+    @testcase(name="RunsMergeIntoTheSuiteCache", tags=["matrix", "cache"])
+    def runs_merge_into_the_suite_cache(self, env, result):
+        suite = prepare_suite(ConcurrencySuite("matrix", max_workers=4))
+        run_ids = suite.execute_workflow_matrix(None, Result())
+        runs = [suite.test_cache.get_run_result(run_id) for run_id in run_ids]
+
+        result.equal(len(suite.test_cache), 4, description="Every combination's run is in the suite cache")
+        result.equal([run.metadata["parameters"] for run in runs], [{"rate": rate} for rate in (1, 2, 3, 4)],
+                     description="Run ids come back in parameter order, not completion order")
+        result.equal([run.stage_results[0].result_data for run in runs], [1, 2, 3, 4],
+                     description="Each combination ran with its own parameters")
+        result.equal([run.overall_status for run in runs], ["PASSED"] * 3 + ["FAILED"],
+                     description="Only the combination with a failure condition failed")
+
+        combinations = MatrixExecutor(suite, max_workers=4).run({"rate": (1, 2)})
+        result.equal([len(combination.runner.cache) for combination in combinations], [1, 1],
+                     description="A combination's runner only caches its own run")
+        result.true(all(combination.runner.suite_cache is suite.test_cache for combination in combinations),
+                    description="and sees the whole suite's runs through suite_cache")
+
+    @testcase(name="OneGroupPerCombination", tags=["matrix", "report"])
+    def one_group_per_combination(self, env, result):
+        suite = prepare_suite(ConcurrencySuite("matrix", max_workers=4))
+        inner = Result()
+        suite.execute_workflow_matrix(None, inner)
+        groups = {group.description: group.passed for group in inner.entries}
+        result.equal(groups, {"Matrix <rate=1>": True, "Matrix <rate=2>": True, "Matrix <rate=3>": True,
+                              "Matrix <rate=4>": False},
+                     description="Each combination is asserted in a group of its own")
+
+        inner = Result()
+        suite.execute_workflow_matrix(None, inner, parameters={"rate": (2,), "unused": ("a", "b")})
+        result.equal([group.description for group in inner.entries],
+                     ["Matrix <rate=2, unused=a>", "Matrix <rate=2, unused=b>"],
+                     description="Explicit parameters replace the configured matrix")
@@ -0,0 +1,45 @@
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.cache import ConcurrentTestCache
+from thanos.memory import MemoryProfiler
+from thanos.stage import TestStage
+from thanos.workflow import WorkflowRunner
+
+
+@testsuite
+class MemoryProfilerSuite(object):
+    """Memory profiles stay bounded however many runs are profiled."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+
+    @testcase(name="ProfilesAreBounded", tags=["memory"])
+    def profiles_are_bounded(self, env, result):
+        profiler = MemoryProfiler(top_n=2, keep_runs=3)
+        runner = WorkflowRunner(cache=ConcurrentTestCache(log_writes=False), memory_profiler=profiler)
+        run_ids = []
+        try:
+            for _ in range(5):
+                runner.clear_stages()
+                runner.add_stage(TestStage(name="allocate", action=lambda context: list(range(10000)),
+                                           dependencies=[]))
+                run_ids.append(runner.execute_workflow())
+        finally:
+            profiler.stop()
+
+        result.equal([run.run_id for run in profiler.runs], run_ids[-3:],
+                     description="Only the latest keep_runs profiles are kept")
+        taken = profiler.take(run_ids[-1])
+        result.equal(taken.run_id, run_ids[-1], description="take() hands a profile over")
+        result.equal(len(profiler.runs), 2, description="A profile that was taken is no longer kept")
+        result.true(profiler.take(run_ids[0]) is None, description="An evicted profile cannot be taken")
+
+        metadata = runner.cache.get_run_result(run_ids[-1]).metadata["memory"]
+        result.equal(sorted(metadata), ["largest_stage", "rss_end_mb", "rss_start_mb", "traced_delta_kb",
+                                        "traced_peak_kb"],
+                     description="Run metadata only carries a summary of the profile")
+        result.equal(metadata["largest_stage"], "allocate", description="The summary names the largest stage")
@@ -0,0 +1,97 @@
+import socket
+import time
+
+from click.testing import CliRunner
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.cli import main
+from thanos.mock import LatencyDistribution, MockServiceConfig, MockServiceThread
+
+
+def read_response(reader):
+    """Status, body and headers of the next HTTP response on a connection's file object."""
+    status = int(reader.readline().split(b" ")[1])
+    headers = {}
+    for line in iter(reader.readline, b"\r\n"):
+        name, _, value = line.decode("ascii").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, reader.read(int(headers["content-length"])), headers
+
+
+@testsuite
+class MockServiceSuite(object):
+    """Latency specs, CLI validation and the HTTP handling of the mock service."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.mock = None
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+        config = MockServiceConfig(port=0, endpoint_latency={"login": LatencyDistribution.parse("constant:50")})
+        self.mock = MockServiceThread(config).start()
+
+    def _connect(self) -> socket.socket:
+        return socket.create_connection((self.mock.config.host, self.mock.config.port), timeout=5)
+
+    @testcase(name="LatencySpecsParse", tags=["mock"])
+    def latency_specs_parse(self, env, result):
+        result.equal(repr(LatencyDistribution.parse("uniform:2,10")), "uniform:low=2,high=10",
+                     description="Positional parameters follow the distribution's order")
+        result.equal(LatencyDistribution.parse(" LogNormal : sigma=0.5, median=5 ").params,
+                     {"sigma": 0.5, "median": 5.0}, description="Named parameters in any order, case and spacing")
+        result.true(LatencyDistribution.parse("constant").is_zero, description="Missing parameters default to zero")
+        result.equal(LatencyDistribution.parse("constant:7").sample(), 7.0, description="constant always samples its value")
+        samples = [LatencyDistribution.parse("uniform:2,3").sample() for _ in range(200)]
+        result.true(all(2 <= sample <= 3 for sample in samples), description="uniform samples stay within its bounds")
+
+        for spec in ("gamma:1", "constant:1,2", "normal:mean=5,sd=1", "uniform:low=a"):
+            with result.raises(ValueError, description=f"'{spec}' is rejected"):
+                LatencyDistribution.parse(spec)
+
+    @testcase(name="CliValidatesLatencyEndpoints", tags=["mock", "cli"])
+    def cli_validates_latency_endpoints(self, env, result):
+        for spec, message in (("create_usr=constant:5", "unknown endpoint 'create_usr'"),
+                              ("login=constant:1,2", "Too many parameters")):
+            outcome = CliRunner().invoke(main, ["mock-server", "--latency", spec])
+            result.equal(outcome.exit_code, 2, description=f"'{spec}' is a usage error")
+            result.contain(message, outcome.output, description="The error names the problem")
+
+    @testcase(name="KeepAliveServesManyRequests", tags=["mock", "http"])
+    def keep_alive_serves_many_requests(self, env, result):
+        with self._connect() as connection, connection.makefile("rb") as reader:
+            statuses = []
+            for _ in range(3):
+                connection.sendall(b"GET /health HTTP/1.1\r\nHost: mock\r\n\r\n")
+                statuses.append(read_response(reader)[0])
+            result.equal(statuses, [200, 200, 200], description="One connection answers request after request")
+
+            connection.sendall(b"GET /health HTTP/1.1\r\nHost: mock\r\nConnection: close\r\n\r\n")
+            _, _, headers = read_response(reader)
+            result.equal(headers.get("connection"), "close", description="Connection: close is acknowledged")
+            result.equal(reader.read(), b"", description="and the server closes the connection")
+
+    @testcase(name="PipelinedResponsesKeepRequestOrder", tags=["mock", "http"])
+    def pipelined_responses_keep_order(self, env, result):
+        body = b'{"user_id": "pipelined"}'
+        requests = (b"POST /login HTTP/1.1\r\nContent-Length: 0\r\n\r\n"
+                    b"POST /users HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s"
+                    b"GET /users/pipelined HTTP/1.1\r\n\r\n" % (len(body), body))
+        with self._connect() as connection, connection.makefile("rb") as reader:
+            start = time.perf_counter()
+            # Split mid-request, as TCP may deliver it
+            connection.sendall(requests[:40])
+            connection.sendall(requests[40:])
+            responses = [read_response(reader) for _ in range(3)]
+            elapsed = time.perf_counter() - start
+
+        result.equal([status for status, _, _ in responses], [200, 201, 200],
+                     description="Responses come back in request order behind the slow login")
+        result.contain(b'"session_id"', responses[0][1], description="The first response answers the login")
+        result.contain(b'"pipelined"', responses[2][1], description="A later request sees an earlier one's effect")
+        result.greater_equal(elapsed, 0.05, description="The login's injected latency was applied")
+
+    def teardown(self, env, result):
+        if self.mock is not None:
+            self.mock.stop()
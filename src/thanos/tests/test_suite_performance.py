@@ -4,7 +4,8 @@ from testplan.common.utils import helper
 
 from thanos.stage import TestStage
 from thanos.workflow import WorkflowRunner
-from thanos.cache import TestCache
+from thanos.shared_cache import create_test_cache
+from thanos.environment import log_environment_snapshot
 from thanos.stages.login import login_to_service
 from thanos.stages.user import create_user, check_user_profile
 from thanos.stages.cleanup import cleanup_data
@@ -24,14 +25,11 @@ class PerformanceTestSuite(object):
         rprint(f"[bold cyan]Setting up Performance Test Suite: {self.name}[/bold cyan]")
         result.log(f"Setting up Performance Test Suite: {self.name}")
         # Here you can add any setup code if necessary
-        self.test_cache = TestCache()
+        self.test_cache = create_test_cache()
         self.runner = WorkflowRunner(cache=self.test_cache)
 
-        # Save host environment variable in report.
-        helper.log_environment(result)
-
-        # Save host hardware information in report.
-        helper.log_hardware(result)
+        # Reference the process-wide environment and hardware snapshot in report.
+        log_environment_snapshot(result)
 
 
     @testcase(
@@ -0,0 +1,100 @@
+import threading
+from datetime import datetime, timedelta
+
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.cache import ConcurrentTestCache, TestRunResult
+from thanos.query import RunQuery
+from thanos.store import ResultStore
+from thanos.tests.helpers import ScratchDirectorySuite, make_run, make_stage
+
+START = datetime(2026, 1, 5, 12, 0)
+
+QUERIES = [
+    RunQuery(status="FAILED"),
+    RunQuery(stage="create_user", stage_status="FAILED"),
+    RunQuery(stage_status="SKIPPED"),
+    RunQuery(suite="ny", parameters={"rate": 4}),
+    RunQuery(testcase="WorkflowTest", since=START + timedelta(minutes=10), until=START + timedelta(minutes=30)),
+    RunQuery(status="PASSED", limit=5),
+    RunQuery(label="rc", suite="eu"),
+]
+
+
+def query_run(n: int) -> TestRunResult:
+    """Run n of a deterministic mix of suites, parameters, statuses and timestamps."""
+    timestamp = START + timedelta(minutes=n % 60, seconds=n)
+    failed = n % 7 == 0
+    stages = [make_stage("login", start=timestamp, duration_ms=1.0),
+              make_stage("create_user", "FAILED" if failed else "PASSED", timestamp, 2.0),
+              make_stage("cleanup", "SKIPPED" if failed else "PASSED", timestamp, 0.0 if failed else 1.0)]
+    return make_run(f"run-{n:04d}", "FAILED" if failed else "PASSED", timestamp, stages,
+                    metadata={"suite": ("ny", "eu")[n % 2], "testcase": "WorkflowTest",
+                              "label": ("nightly", "rc")[n % 5 == 0],
+                              "parameters": {"rate": (2, 4)[n % 3 == 0]}})
+
+
+def brute_force(runs, query: RunQuery):
+    return [run.run_id for run in query.finish(run for run in runs if query.matches(run))]
+
+
+@testsuite
+class RunQuerySuite(ScratchDirectorySuite):
+    """Indexed queries over cached and stored runs agree with a full scan."""
+
+    prefix = "thanos-query-test-"
+
+    @testcase(name="CacheIndexesMatchFullScan", tags=["query"])
+    def cache_indexes_match_full_scan(self, env, result):
+        cache = ConcurrentTestCache(stripes=4, log_writes=False)
+        runs = [query_run(n) for n in range(300)]
+        for run in runs:
+            cache.add_run_result(run)
+        for query in QUERIES:
+            result.equal([run.run_id for run in cache.query(query)], brute_force(runs, query),
+                         description=f"Indexed query matches a full scan: {query}")
+        result.equal(len(cache.query(RunQuery(label="rc"))), 60, description="Cache queries select runs by label")
+
+    @testcase(name="IndexesFollowConcurrentTransitions", tags=["query", "concurrency"])
+    def indexes_follow_concurrent_transitions(self, env, result):
+        cache = ConcurrentTestCache(stripes=4, log_writes=False)
+        for n in range(300):
+            cache.add_run_result(query_run(n))
+
+        def fail_some(index):
+            for n in range(index, 300, 4):
+                if n % 5 == 0:
+                    cache.transition_status(f"run-{n:04d}", None, "FAILED")
+
+        threads = [threading.Thread(target=fail_some, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        runs = cache.get_all_results()
+        for query in (RunQuery(status="FAILED"), RunQuery(status="PASSED")):
+            result.equal([run.run_id for run in cache.query(query)], brute_force(runs, query),
+                         description=f"Status postings were moved with each transition: {query}")
+
+    @testcase(name="StoreSkipsFilesThatCannotMatch", tags=["query", "store"])
+    def store_skips_files(self, env, result):
+        store = ResultStore(self.directory)
+        store.append([query_run(n) for n in range(0, 100)], label="monday", suite="ny")
+        store.append([query_run(n) for n in range(100, 200)], label="tuesday", suite="eu")
+
+        result.equal(len(store.candidate_files(RunQuery(label="tuesday"))), 1,
+                     description="A label present in one file only reads that file")
+        result.equal(store.candidate_files(RunQuery(label="wednesday")), [],
+                     description="An unknown label reads no file")
+        stored = store.query(RunQuery(label="monday", stage="create_user", stage_status="FAILED"))
+        expected = sorted(f"run-{n:04d}" for n in range(0, 100, 7))
+        result.equal(sorted(stored["run_id"].unique().to_list()), expected,
+                     description="Stored query returns the failed create_user stages of the labelled runs")
+        newest = store.query(RunQuery(label="tuesday", limit=3))
+        result.equal(newest["run_id"].n_unique(), 3, description="limit keeps the rows of the newest runs")
+
+        # Indexes written with the files are rebuilt if they go missing
+        for path in store.files():
+            path.with_name(path.name[:-len(".parquet")] + ".index.json").unlink()
+        result.equal(ResultStore(self.directory).reindex(), 2, description="Missing file indexes are rebuilt")
@@ -0,0 +1,92 @@
+import multiprocessing
+import time
+from datetime import datetime
+
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.cache import TestRunResult
+from thanos.shared_cache import SharedRingWriter, SharedTestCache
+from thanos.tests.helpers import make_run, make_stage
+
+
+def writer_run(run_id: str, stages: int = 1) -> TestRunResult:
+    start = datetime.now()
+    return make_run(run_id, timestamp=start, metadata={"writer": run_id.split("-")[0]},
+                    stages=[make_stage(f"stage_{n}", start=start, duration_ms=float(n), result_data={"n": n})
+                            for n in range(stages)])
+
+
+def publish_runs(directory: str, writer_id: str, count: int):
+    """Entry point of a writer process."""
+    writer = SharedRingWriter(directory)
+    for n in range(count):
+        writer.publish(writer_run(f"{writer_id}-{n}", stages=3))
+    writer.close()
+
+
+@testsuite
+class SharedCacheSuite(object):
+    """Shared-memory rings written by several processes and drained by one."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+
+    @testcase(name="RunsFromSeveralProcesses", tags=["shared-cache", "concurrency"])
+    def runs_from_several_processes(self, env, result):
+        with SharedTestCache() as cache:
+            context = multiprocessing.get_context("spawn")
+            processes = [context.Process(target=publish_runs, args=(str(cache.directory), f"w{index}", 200))
+                         for index in range(3)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(timeout=60)
+
+            result.equal([process.exitcode for process in processes], [0, 0, 0], description="Every writer exited")
+            result.equal(len(cache), 600, description="The parent sees every run of every process")
+            result.equal(cache.dropped, 0, description="No run was dropped")
+            run = cache.get_run_result("w1-7")
+            result.equal([stage.name for stage in run.stage_results], ["stage_0", "stage_1", "stage_2"],
+                         description="Stage records come back with their run")
+            result.equal(run.stage_results[2].result_data, {"n": 2}, description="Stage result data is preserved")
+            result.equal(run.metadata, {"writer": "w1"}, description="Run metadata is preserved")
+
+    @testcase(name="FullRingDropsWithoutBlocking", tags=["shared-cache"])
+    def full_ring_drops_without_blocking(self, env, result):
+        cache = SharedTestCache()
+        writer = SharedRingWriter(str(cache.directory), capacity=8)
+        published = [writer.publish(writer_run(f"r-{n}")) for n in range(4)]
+        start = time.perf_counter()
+        refused = writer.publish(writer_run("r-4"))
+        elapsed = time.perf_counter() - start
+
+        result.equal(published, [True] * 4, description="Runs that fit the ring are published")
+        result.false(refused, description="A run that does not fit is refused")
+        result.less(elapsed, 0.05, description="The producer does not wait for the consumer")
+        result.equal(cache.dropped, 1, description="The dropped run is counted")
+        result.equal(len(cache), 4, description="Draining frees the ring")
+        result.true(writer.publish(writer_run("r-5")), description="Publishing resumes once drained")
+        writer.close()
+        cache.close()
+
+    @testcase(name="BackgroundDrainKeepsUp", tags=["shared-cache", "concurrency"])
+    def background_drain_keeps_up(self, env, result):
+        cache = SharedTestCache(drain_interval=0.005)
+        result.true(cache.start_draining(), description="The drain thread starts")
+        result.false(cache.start_draining(), description="A second start is a no-op")
+        # 2,000 runs through a ring that holds 128 of them, with nobody reading the cache meanwhile
+        writer = SharedRingWriter(str(cache.directory), capacity=256)
+        for n in range(2000):
+            writer.publish(writer_run(f"r-{n}"))
+            if n % 50 == 0:
+                time.sleep(0.01)
+        writer.close()
+        cache.stop_draining()
+
+        result.equal(cache.dropped, 0, description="The background drain kept the ring from filling")
+        result.equal(len(cache), 2000, description="Every run arrived")
+        cache.close()
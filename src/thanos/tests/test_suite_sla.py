@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+from testplan.testing.result import Result
+
+from thanos.store import runs_to_frame
+from thanos.testing.sla import ErrorRateSLA, LatencySLA, ThroughputSLA, evaluate_slas, parse_sla
+from thanos.tests.helpers import make_run, make_stage
+
+START = datetime(2026, 1, 5, 12, 0)
+FAILED_RUNS = (3, 7)
+
+
+def sla_runs():
+    """Runs 1..10: login takes n ms, create_user 10n ms and fails in runs 3 and 7, whose cleanup is skipped."""
+    runs = []
+    for n in range(1, 11):
+        failed = n in FAILED_RUNS
+        login = make_stage("login", start=START + timedelta(seconds=n), duration_ms=float(n))
+        create = make_stage("create_user", "FAILED" if failed else "PASSED", login.end_time, 10.0 * n)
+        cleanup = make_stage("cleanup", "SKIPPED" if failed else "PASSED", create.end_time, 0.0 if failed else 0.5)
+        runs.append(make_run(f"run-{n}", "FAILED" if failed else "PASSED", login.start_time,
+                             [login, create, cleanup], metadata={"parameters": {"threshold": 8}}))
+    return runs
+
+
+@testsuite
+class SLASuite(object):
+    """Parsing and evaluating SLAs against runs with known latencies and failures."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+        self.stages = runs_to_frame(sla_runs(), suite="sla")
+
+    @testcase(name="SpecsParse", tags=["sla"])
+    def specs_parse(self, env, result):
+        sla = parse_sla("p99(create_user) < threshold")
+        result.true(isinstance(sla, LatencySLA), description="pNN specs are latency SLAs")
+        result.equal((sla.percentile, sla.stage, sla.operator, sla.limit), (99.0, "create_user", "<", "threshold"),
+                     description="Percentile, stage, operator and parameter limit are read from the spec")
+        sla = parse_sla(" p99.9<=250ms ")
+        result.equal((sla.percentile, sla.stage, sla.operator, sla.limit), (99.9, None, "<=", 250.0),
+                     description="Fractional percentiles, an ms unit and no spacing")
+        sla = parse_sla("error_rate(login) < 1%")
+        result.true(isinstance(sla, ErrorRateSLA) and sla.stage == "login", description="Per-stage error rates")
+        result.equal(parse_sla("error_rate < 0.1%").describe(parse_sla("error_rate < 0.1%").limit),
+                     "error_rate < 0.100%", description="A % limit is a fraction, described as a percentage")
+        sla = parse_sla("throughput >= rate")
+        result.true(isinstance(sla, ThroughputSLA), description="throughput specs are throughput SLAs")
+        result.equal((sla.operator, sla.limit), (">=", "rate"), description="with a parameter limit")
+
+        for spec in ("p99 ~ 5", "latency < 5", "p99(create user) < 5", "p99 < 5s", "", "error_rate < rate%"):
+            with result.raises(ValueError, description=f"'{spec}' is rejected"):
+                parse_sla(spec)
+
+    @testcase(name="ParameterLimits", tags=["sla"])
+    def parameter_limits(self, env, result):
+        sla = parse_sla("p90(login) < threshold")
+        result.equal(sla.resolve_limit({"threshold": "8"}), 8.0, description="The limit is read from the parameters")
+        with result.raises(KeyError, description="A limit naming no parameter of the testcase is an error"):
+            sla.resolve_limit({"rate": 5})
+
+        outcome = sla.evaluate(self.stages, {"threshold": 8})
+        result.equal((outcome.observed, outcome.limit, outcome.passed), (9.0, 8.0, False),
+                     description="p90 of 1..10 ms is 9, which misses a limit of 8")
+        result.equal(outcome.description, "p90(login) < 8ms [threshold]",
+                     description="The description names the parameter the limit came from")
+
+    @testcase(name="NearestRankLatencies", tags=["sla", "percentiles"])
+    def nearest_rank_latencies(self, env, result):
+        observed = {(stage, p): LatencySLA(limit=1000, stage=stage, percentile=p).measure(self.stages)
+                    for stage in ("login", "create_user", "cleanup") for p in (50, 90, 100)}
+        result.equal(observed[("login", 50)], (5.0, 10), description="p50 of 1..10 ms is 5")
+        result.equal(observed[("login", 90)], (9.0, 10), description="p90 of 1..10 ms is 9")
+        result.equal(observed[("create_user", 90)], (90.0, 10), description="Failed stages count as latencies")
+        result.equal(observed[("cleanup", 100)], (0.5, 8), description="Skipped stages do not")
+        result.equal(LatencySLA(limit=1, stage="missing").measure(self.stages), (None, 0),
+                     description="A stage without runs has no latency")
+
+    @testcase(name="LatencyWithoutStageReportsTheWorst", tags=["sla"])
+    def latency_without_stage(self, env, result):
+        passing = LatencySLA(limit=95, percentile=90).evaluate(self.stages, {})
+        result.equal((passing.passed, passing.observed, passing.samples), (True, 90.0, 10),
+                     description="When every stage passes the slowest one is reported")
+        failing = LatencySLA(limit=5, percentile=90).evaluate(self.stages, {})
+        result.equal((failing.passed, failing.observed), (False, 90.0),
+                     description="One stage over the limit fails the SLA; the worst offender is reported")
+        failing = LatencySLA(limit=9, operator=">", percentile=50).evaluate(self.stages, {})
+        result.equal((failing.passed, failing.observed), (False, 5.0),
+                     description="The worst offender depends on the operator's direction")
+        empty = LatencySLA(limit=5, percentile=90).evaluate(self.stages.clear(), {})
+        result.equal((empty.passed, empty.observed, empty.samples), (False, None, 0),
+                     description="No data fails the SLA")
+
+    @testcase(name="ErrorRates", tags=["sla"])
+    def error_rates(self, env, result):
+        result.equal(ErrorRateSLA(limit=0.1).measure(self.stages), (0.2, 10),
+                     description="2 of 10 runs failed")
+        result.equal(ErrorRateSLA(limit=0.1, stage="create_user").measure(self.stages), (0.2, 10),
+                     description="2 of 10 create_user stages failed")
+        result.equal(ErrorRateSLA(limit=0.1, stage="cleanup").measure(self.stages), (0.0, 8),
+                     description="Skipped stages are not executions")
+        result.false(parse_sla("error_rate < 20%").evaluate(self.stages, {}).passed,
+                     description="A 20% error rate misses a limit of < 20%")
+        result.true(parse_sla("error_rate <= 20%").evaluate(self.stages, {}).passed,
+                    description="and meets one of <= 20%")
+
+    @testcase(name="Throughput", tags=["sla"])
+    def throughput(self, env, result):
+        # Run 1 starts at 1s, run 10 ends after 10s + 10 + 100 + 0.5 ms
+        observed, samples = ThroughputSLA(limit=1).measure(self.stages)
+        result.equal((round(observed, 6), samples), (round(10 / 9.1105, 6), 10),
+                     description="Completed runs per second of the span they cover")
+        observed, samples = ThroughputSLA(limit=1, stage="login").measure(self.stages)
+        result.equal((round(observed, 6), samples), (round(10 / 9.010, 6), 10),
+                     description="Stage executions per second of the span the stage covers")
+        result.false(ThroughputSLA(limit=1.2).evaluate(self.stages, {}).passed,
+                     description="About 1.1 runs/s misses a floor of 1.2")
+        single = runs_to_frame([make_run("only", stages=[make_stage("login", start=START)])])
+        result.equal(ThroughputSLA(limit=1).measure(single), (None, 1), description="No time span, no throughput")
+
+    @testcase(name="EvaluateRecordsAssertions", tags=["sla"])
+    def evaluate_records_assertions(self, env, result):
+        inner = Result()
+        outcomes = evaluate_slas(inner, [parse_sla("p50(login) < 6"), parse_sla("error_rate < 25%")],
+                                 self.stages, {"threshold": 8})
+        result.equal([outcome.passed for outcome in outcomes], [True, True], description="Both SLAs are met")
+        result.true(inner.passed, description="and recorded as passing assertions")
+
+        inner = Result()
+        evaluate_slas(inner, [parse_sla("p50(missing) < 6")], self.stages, {})
+        result.false(inner.passed, description="An SLA without data fails the testcase")
+
+        inner = Result()
+        sla = LatencySLA(limit="threshold", stage="login", percentile=50, match_parameters=True)
+        outcome, = evaluate_slas(inner, [sla], self.stages, {"threshold": 4})
+        result.equal((outcome.samples, outcome.passed), (0, False),
+                     description="match_parameters only judges runs recorded with the same parameters")
@@ -0,0 +1,90 @@
+import re
+import threading
+import urllib.request
+
+from rich import print as rprint
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.cache import ConcurrentTestCache
+from thanos.stage import TestStage
+from thanos.telemetry import LiveMetrics, MetricsServer
+from thanos.workflow import WorkflowRunner
+
+
+def sample(exposition: str, name: str) -> float:
+    """Value of the one sample called name (labels included) in a Prometheus exposition."""
+    match = re.search(rf"^{re.escape(name)} (\S+)$", exposition, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+@testsuite
+class LiveMetricsSuite(object):
+    """Thread-sharded live metrics and the /metrics endpoint."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def setup(self, env, result):
+        rprint(f"Setting up {self.name}...")
+
+    @testcase(name="EndedThreadsRetireTheirShards", tags=["telemetry", "concurrency"])
+    def ended_threads_retire_their_shards(self, env, result):
+        metrics = LiveMetrics()
+
+        def record():
+            for _ in range(10):
+                metrics.run_started("suite")
+                metrics.stage_started()
+                metrics.stage_finished("login", "PASSED", 1.0, "suite")
+
+        for _ in range(50):
+            threads = [threading.Thread(target=record) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        result.equal(metrics.active_shards, 0, description="200 ended threads leave no shard behind")
+        counters, in_flight, latencies = metrics.snapshot()
+        result.equal(counters[("runs_started", "suite")], 2000, description="Their counts are kept")
+        result.equal(counters[("stage_latency_sum", "suite", "login")], 2000.0, description="So are latency sums")
+        result.equal((in_flight, len(latencies)), (0, 2000), description="And their windowed latencies")
+
+    @testcase(name="ScrapeWhileRunnerExecutes", tags=["telemetry", "workflow"])
+    def scrape_while_runner_executes(self, env, result):
+        metrics = LiveMetrics()
+        server = MetricsServer(metrics, port=0).start()
+        entered, release = threading.Event(), threading.Event()
+
+        def slow(context):
+            entered.set()
+            release.wait(timeout=10)
+            return "done"
+
+        runner = WorkflowRunner(cache=ConcurrentTestCache(log_writes=False), metrics=metrics)
+        runner.metadata = {"suite": "scrape"}
+        runner.add_stage(TestStage(name="login", action=lambda context: "token", dependencies=[]))
+        runner.add_stage(TestStage(name="slow", action=slow, dependencies=["login"]))
+        worker = threading.Thread(target=runner.execute_workflow)
+        try:
+            worker.start()
+            entered.wait(timeout=10)
+            during = urllib.request.urlopen(server.url, timeout=5).read().decode("utf-8")
+            release.set()
+            worker.join()
+            after = urllib.request.urlopen(server.url, timeout=5).read().decode("utf-8")
+        finally:
+            release.set()
+            server.stop()
+
+        result.equal(sample(during, "thanos_stages_in_flight"), 1.0, description="A scrape sees the running stage")
+        result.equal(sample(during, 'thanos_stage_results_total{suite="scrape",stage="login",status="PASSED"}'), 1.0,
+                     description="and the stage that already finished")
+        result.true(sample(during, 'thanos_runs_completed_total{suite="scrape",status="PASSED"}') is None,
+                    description="but no completed run yet")
+        result.equal(sample(after, "thanos_stages_in_flight"), 0.0, description="Nothing is in flight afterwards")
+        result.equal(sample(after, 'thanos_runs_completed_total{suite="scrape",status="PASSED"}'), 1.0,
+                     description="The run is counted once its thread has ended and its shard retired")
+        result.equal(sample(after, 'thanos_stage_latency_ms_count{suite="scrape",stage="slow"}'), 1.0,
+                     description="as is the slow stage's latency")
+        result.equal(metrics.active_shards, 0, description="The runner's thread no longer holds a shard")
@@ -0,0 +1,123 @@
+import threading
+import time
+from pathlib import Path
+
+from testplan.testing.multitest import testcase, testsuite
+
+from thanos.cache import TestRunResult
+from thanos.tests.helpers import ScratchDirectorySuite, make_run
+from thanos.wal import DurableTestCache, WriteAheadLog
+
+
+def nightly_run(run_id: str, status: str = "PASSED") -> TestRunResult:
+    return make_run(run_id, status, metadata={"label": "nightly"})
+
+
+@testsuite
+class WriteAheadLogSuite(ScratchDirectorySuite):
+    """Crash recovery and compaction of the durable test cache."""
+
+    prefix = "thanos-wal-test-"
+
+    def _crashed_log(self, name: str, runs) -> str:
+        """A log left behind by a process that never reached teardown."""
+        path = str(self.directory / name)
+        cache = DurableTestCache(path, log_writes=False)
+        for run in runs:
+            cache.add_run_result(run)
+        # Everything is synced before close(), so closing writes nothing a crash would not have
+        cache.wal.sync()
+        cache.close()
+        return path
+
+    @staticmethod
+    def _recovered(path: str):
+        """The runs a new process would recover from the log at path."""
+        cache = DurableTestCache(path, log_writes=False)
+        cache.close()
+        return cache.recovered_runs
+
+    @testcase(name="RecoveredRunsStayOutOfTheNewSession", tags=["wal"])
+    def recovered_runs_stay_out(self, env, result):
+        path = self._crashed_log("recovered.wal", [nightly_run(f"r{i}") for i in range(5)])
+        cache = DurableTestCache(path, log_writes=False)
+        result.equal(len(cache), 0, description="The new session starts from an empty cache")
+        result.equal([run.run_id for run in cache.recovered_runs], [f"r{i}" for i in range(5)],
+                     description="The earlier session's runs are kept apart, in order")
+        result.equal({run.metadata["label"] for run in cache.recovered_runs}, {"nightly"},
+                     description="Recovered runs keep the metadata they were recorded with")
+
+        cache.add_run_result(nightly_run("live"))
+        cache.compact(wait=True)
+        cache.close()
+        reopened = DurableTestCache(path, log_writes=False)
+        result.equal(len(reopened.recovered_runs), 6, description="Compaction keeps unreleased recovered runs")
+
+        released = reopened.release_recovered()
+        result.equal(len(released), 6, description="release_recovered hands the runs over")
+        reopened.checkpoint()
+        reopened.close()
+        result.equal(self._recovered(path), [], description="Released runs are not recovered again")
+
+    @testcase(name="TornTailIsTruncated", tags=["wal"])
+    def torn_tail_is_truncated(self, env, result):
+        path = self._crashed_log("torn.wal", [nightly_run("a"), nightly_run("b")])
+        intact = Path(path).stat().st_size
+        with open(path, "ab") as f:
+            f.write(b"\x00\x00\x01\x00torn")
+        log = WriteAheadLog(path, fsync=False)
+        result.equal(len(log.recovered), 2, description="Records before the torn one are replayed")
+        result.equal(Path(path).stat().st_size, intact, description="The torn tail is truncated away")
+        log.close()
+
+    @testcase(name="ConcurrentTransitionsReplayInOrder", tags=["wal", "concurrency"])
+    def concurrent_transitions_replay_in_order(self, env, result):
+        path = str(self.directory / "transitions.wal")
+        cache = DurableTestCache(path, sync_interval=0.001, log_writes=False)
+        run_ids = [f"run-{i}" for i in range(20)]
+        for run_id in run_ids:
+            cache.add_run_result(nightly_run(run_id, status="0"))
+
+        def advance(run_id):
+            # Each thread moves a run on from whichever state another thread left it in
+            for _ in range(50):
+                current = cache.get_run_result(run_id).overall_status
+                cache.transition_status(run_id, current, str(int(current) + 1))
+
+        threads = [threading.Thread(target=advance, args=(run_id,)) for run_id in run_ids for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        live = {run.run_id: run.overall_status for run in cache.get_all_results()}
+        cache.close()
+
+        replayed = {run.run_id: run.overall_status for run in self._recovered(path)}
+        result.equal(replayed, live, description="Replaying the log reproduces every run's final status")
+
+    @testcase(name="ClearIsReplayed", tags=["wal"])
+    def clear_is_replayed(self, env, result):
+        path = str(self.directory / "clear.wal")
+        cache = DurableTestCache(path, log_writes=False)
+        cache.add_run_result(nightly_run("r1"))
+        cache.clear()
+        cache.add_run_result(nightly_run("r2"))
+        cache.close()
+        recovered = self._recovered(path)
+        result.equal([run.run_id for run in recovered], ["r2"], description="Runs cleared before the crash stay cleared")
+
+    @testcase(name="AppendsDoNotWaitForTheDisk", tags=["wal", "concurrency"])
+    def appends_do_not_wait_for_the_disk(self, env, result):
+        log = WriteAheadLog(str(self.directory / "io.wal"), sync_interval=0.001)
+        ticket = log.append(1, "first")
+        # Stand in for a slow write and fsync in progress
+        with log._io_lock:
+            start = time.perf_counter()
+            tickets = [log.append(1, n) for n in range(100)]
+            elapsed = time.perf_counter() - start
+        result.less(elapsed, 0.5, description="Appends go on while a batch is being written")
+        log.wait_for(tickets[-1])
+        result.greater(tickets[-1], ticket, description="Records appended meanwhile are synced next")
+        log.close()
+        result.equal([body for _, body, _ in WriteAheadLog.read(log.path)], ["first"] + list(range(100)),
+                     description="Batches reach the file in append order")
@@ -0,0 +1,175 @@
+"""Trace events for workflow execution, exported as Chrome Trace Event JSON.
+
+A :class:`Tracer` passed to ``WorkflowRunner`` records a complete ("X")
+event for the workflow, every stage, the dependency check, the stage action,
+console printing, fixture lookups, cache inserts and uploads, tagged with
+process and thread ids. The saved file opens in Perfetto
+(https://ui.perfetto.dev) or ``chrome://tracing``.
+
+Like the clock, the tracer of a running workflow is held in a context
+variable, so code called from stage actions (e.g. ``HttpStage``) can add its
+own spans via :func:`get_tracer`. Without a tracer the runner uses
+:data:`NULL_TRACER`, whose spans are a shared no-op object.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+
+class _Span:
+    """A timed region; records one complete event when the block exits."""
+
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: 'Tracer', name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+
+    def annotate(self, **args: Any):
+        """Attach extra arguments, e.g. a status only known at the end of the span."""
+        self.args.update(args)
+
+    def __enter__(self) -> '_Span':
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer._complete(self.name, self.cat, self.start, end, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def annotate(self, **args: Any):
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects trace events from any number of threads."""
+
+    enabled = True
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._origin = time.perf_counter_ns()
+        self._events: List[Dict[str, Any]] = []
+        self._named_threads: set = set()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, cat: str = "thanos", **args: Any) -> _Span:
+        """Context manager timing the enclosed block as one event."""
+        return _Span(self, name, cat, args)
+
+    def instant(self, name: str, cat: str = "thanos", **args: Any):
+        """Record a zero-duration event, e.g. a retry decision."""
+        tid = self._thread_id()
+        self._events.append({
+            "name": name, "cat": cat, "ph": "i", "s": "t",
+            "ts": (time.perf_counter_ns() - self._origin) / 1000,
+            "pid": self.pid, "tid": tid, "args": args,
+        })
+
+    def _complete(self, name: str, cat: str, start: int, end: int, args: Dict[str, Any]):
+        tid = self._thread_id()
+        # list.append is atomic, so recording needs no lock
+        self._events.append({
+            "name": name, "cat": cat, "ph": "X",
+            "ts": (start - self._origin) / 1000, "dur": (end - start) / 1000,
+            "pid": self.pid, "tid": tid, "args": args,
+        })
+
+    def _thread_id(self) -> int:
+        tid = threading.get_native_id()
+        if tid not in self._named_threads:
+            with self._lock:
+                if tid not in self._named_threads:
+                    self._named_threads.add(tid)
+                    self._events.append({
+                        "name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                        "args": {"name": threading.current_thread().name},
+                    })
+        return tid
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        return list(self._events)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """The recorded events in Chrome Trace Event format."""
+        metadata = {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                    "args": {"name": f"thanos ({self.pid})"}}
+        return {"traceEvents": [metadata] + self.events, "displayTimeUnit": "ms"}
+
+    def save(self, path: str | Path) -> Path:
+        """Write the trace as JSON; returns the path written."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        return path
+
+    def clear(self):
+        with self._lock:
+            self._events = []
+            self._named_threads = set()
+
+
+class NullTracer(Tracer):
+    """Tracer used when tracing is off; records nothing."""
+
+    enabled = False
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._events = []
+
+    def span(self, name: str, cat: str = "thanos", **args: Any) -> _NullSpan:
+        return _NULL_SPAN
+
+    def instant(self, name: str, cat: str = "thanos", **args: Any):
+        pass
+
+    def clear(self):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+_current_tracer: ContextVar[Tracer] = ContextVar("thanos_tracer", default=NULL_TRACER)
+
+
+def get_tracer() -> Tracer:
+    """Return the tracer of the workflow running in the current context."""
+    return _current_tracer.get()
+
+
+@contextmanager
+def use_tracer(tracer: Tracer) -> Iterator[Tracer]:
+    """Make tracer the active tracer for the duration of the block."""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
@@ -0,0 +1,328 @@
+"""Append-only write-ahead log that makes a TestCache survive crashes.
+
+Records are framed as a 4-byte big-endian length, a CRC32 of the body and
+a 1-byte record type, followed by the pickled body. Appends go to an
+in-memory buffer; a background thread writes and fsyncs whatever has
+accumulated every ``sync_interval`` seconds (group commit), so one fsync
+covers every record appended in that window. Appends never wait for that
+write: the buffer is swapped under a short lock and written under another.
+``append(..., wait=True)`` blocks until its record is on disk; ``append``
+also returns a ticket to wait on later with :meth:`WriteAheadLog.wait_for`.
+
+On open the log is replayed up to the first torn or corrupt record, and
+anything after it is truncated away. Compaction rewrites the log as one
+record per live run, into a temporary file that atomically replaces it.
+"""
+
+import os
+import pickle
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from rich import print as rprint
+
+from thanos.cache import CacheSnapshot, ConcurrentTestCache, TestRunResult
+
+RUN = 1      # a complete TestRunResult (added or replaced)
+STATUS = 2   # (run_id, new overall status)
+CLEAR = 3    # the cache was cleared
+
+_FRAME = struct.Struct(">IIB")
+
+
+class WriteAheadLog:
+    """Length-prefixed, checksummed binary log with group-commit fsync."""
+
+    def __init__(self, path: str, sync_interval: float = 0.005, fsync: bool = True,
+                 sanitize: Optional[Callable[[Any], Any]] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.sync_interval = sync_interval
+        self.fsync = fsync
+        # Turns a body that cannot be pickled into one that can
+        self.sanitize = sanitize
+        self.recovered: List[Tuple[int, Any]] = list(self._recover())
+        self._file = open(self.path, "ab", buffering=0)
+        self._buffer = bytearray()
+        self._appended = 0      # records handed to append()
+        self._synced = 0        # records known to be on disk
+        # Guards the buffer and counters; appends only ever take this one, briefly
+        self._lock = threading.Lock()
+        # Held while writing to the file, so batches land in order without blocking appends
+        self._io_lock = threading.Lock()
+        self._synced_cond = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="thanos-wal", daemon=True)
+        self._flusher.start()
+
+    @staticmethod
+    def read(path: str) -> Iterator[Tuple[int, Any, int]]:
+        """Yield (record type, body, end offset) for every intact record of a log file."""
+        try:
+            data = Path(path).read_bytes()
+        except FileNotFoundError:
+            return
+        offset = 0
+        while offset + _FRAME.size <= len(data):
+            length, checksum, kind = _FRAME.unpack_from(data, offset)
+            start = offset + _FRAME.size
+            body = data[start:start + length]
+            if len(body) < length or zlib.crc32(body, kind) != checksum:
+                return
+            offset = start + length
+            yield kind, pickle.loads(body), offset
+
+    def _recover(self) -> Iterator[Tuple[int, Any]]:
+        end = 0
+        for kind, body, end in self.read(self.path):
+            yield kind, body
+        if self.path.exists() and self.path.stat().st_size > end:
+            # A crash mid-write left a torn tail; drop it so new records follow intact ones
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+
+    def frame(self, kind: int, body: Any) -> bytes:
+        """Encode a record; pickling is the expensive part of an append and needs no lock."""
+        try:
+            data = pickle.dumps(body, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            if self.sanitize is None:
+                raise
+            data = pickle.dumps(self.sanitize(body), protocol=pickle.HIGHEST_PROTOCOL)
+        return _FRAME.pack(len(data), zlib.crc32(data, kind), kind) + data
+
+    def append(self, kind: int, body: Any, wait: bool = False) -> int:
+        """Queue a record for the next group commit; with ``wait``, return once it is synced."""
+        return self.append_frame(self.frame(kind, body), wait)
+
+    def append_frame(self, frame: bytes, wait: bool = False) -> int:
+        """Queue an encoded record; returns its ticket for :meth:`wait_for`."""
+        with self._lock:
+            if self._closed:
+                raise ValueError("Write-ahead log is closed")
+            self._buffer += frame
+            self._appended += 1
+            ticket = self._appended
+        if wait:
+            self.wait_for(ticket)
+        return ticket
+
+    def wait_for(self, ticket: int):
+        """Block until the record with this ticket is on disk."""
+        with self._lock:
+            if self._synced < ticket:
+                self._wakeup.set()
+            while self._synced < ticket:
+                self._synced_cond.wait()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.sync_interval)
+            self._wakeup.clear()
+            with self._lock:
+                closed = self._closed
+            self.sync()
+            if closed:
+                return
+
+    def sync(self):
+        """Write and fsync everything appended so far."""
+        with self._io_lock:
+            with self._lock:
+                if not self._buffer:
+                    return
+                data, self._buffer = bytes(self._buffer), bytearray()
+                ticket = self._appended
+            # Appends carry on into the new buffer while this batch is written
+            self._file.write(data)
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            with self._lock:
+                self._synced = ticket
+                self._synced_cond.notify_all()
+
+    def compact(self, records: Callable[[], Iterable[Tuple[int, Any]]]):
+        """Replace the log with ``records()``, evaluated while appends are held off."""
+        with self._io_lock, self._lock:
+            temporary = self.path.with_suffix(self.path.suffix + ".compact")
+            with open(temporary, "wb") as f:
+                for kind, body in records():
+                    f.write(self.frame(kind, body))
+                # Records appended since the last group commit come after the compacted state
+                f.write(self._buffer)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._file.close()
+            os.replace(temporary, self.path)
+            if self.fsync:
+                directory = os.open(self.path.parent, os.O_RDONLY)
+                try:
+                    os.fsync(directory)
+                finally:
+                    os.close(directory)
+            self._file = open(self.path, "ab", buffering=0)
+            self._buffer = bytearray()
+            self._synced = self._appended
+            self._synced_cond.notify_all()
+
+    @property
+    def size(self) -> int:
+        return self.path.stat().st_size
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._wakeup.set()
+        self._flusher.join()
+        self._file.close()
+
+
+def _picklable_run(run: TestRunResult) -> TestRunResult:
+    """The run with stage result data that cannot be pickled replaced by its repr."""
+    stages = []
+    for stage in run.stage_results:
+        try:
+            pickle.dumps(stage.result_data)
+            stages.append(stage)
+        except Exception:
+            stages.append(replace(stage, result_data=repr(stage.result_data)))
+    return replace(run, stage_results=stages)
+
+
+class DurableTestCache(ConcurrentTestCache):
+    """
+    A ConcurrentTestCache backed by a write-ahead log.
+
+    Runs recorded by an earlier process that crashed before teardown are
+    replayed on construction into :attr:`recovered_runs`, not into the cache:
+    they belong to that earlier session, so the new one starts empty. They
+    stay in the log until :meth:`release_recovered` is called once they are
+    stored or uploaded elsewhere.
+
+    Every change is logged under the lock of the stripe it applies to, so the
+    log orders the writes to a run as they were applied. The log is
+    compacted once it grows past ``compact_bytes`` and holds more than
+    ``compact_ratio`` records per live run. Runs are also published to
+    ``writer`` when the process takes part in a shared cache.
+    """
+    def __init__(self, path: str, sync_interval: float = 0.005, wait_for_sync: bool = False,
+                 compact_bytes: int = 64 * 1024 * 1024, compact_ratio: float = 2.0, stripes: int = 16,
+                 log_writes: bool = True, writer=None):
+        super().__init__(stripes=stripes, log_writes=log_writes)
+        self.writer = writer
+        self.wait_for_sync = wait_for_sync
+        self.compact_bytes = compact_bytes
+        self.compact_ratio = compact_ratio
+        self.wal = WriteAheadLog(path, sync_interval=sync_interval, sanitize=_picklable_run)
+        self._compacting = threading.Lock()
+        self.recovered_runs: List[TestRunResult] = self._replay(self.wal.recovered)
+        self.wal.recovered = []
+        self._records = len(self.recovered_runs)
+        if self.recovered_runs:
+            rprint(f"[yellow]♻️  Recovered {len(self.recovered_runs)} runs of an earlier session "
+                   f"from write-ahead log {path}[/yellow]")
+
+    @staticmethod
+    def _replay(records: Iterable[Tuple[int, Any]]) -> List[TestRunResult]:
+        """The runs a log's records leave behind, in the order they were first added."""
+        replayed = ConcurrentTestCache(stripes=1, log_writes=False)
+        for kind, body in records:
+            if kind == RUN:
+                replayed.add_run_result(body)
+            elif kind == STATUS:
+                run_id, status = body
+                replayed.transition_status(run_id, None, status)
+            elif kind == CLEAR:
+                replayed.clear()
+        return replayed.get_all_results()
+
+    def _logged(self, ticket: int):
+        # Called after the stripe lock is released: waiting for a sync or compacting under it would stall writers
+        if self.wait_for_sync:
+            self.wal.wait_for(ticket)
+        self._records += 1
+        if self._records > self.compact_ratio * max(len(self) + len(self.recovered_runs), 1) \
+                and self.wal.size > self.compact_bytes:
+            self.compact()
+
+    def add_run_result(self, run_result: TestRunResult):
+        frame = self.wal.frame(RUN, run_result)
+        stripe = self._stripe(run_result.run_id)
+        with stripe.lock:
+            self._store(stripe, run_result)
+            ticket = self.wal.append_frame(frame)
+        self._announce(run_result)
+        self._logged(ticket)
+        if self.writer is not None:
+            self.writer.publish(run_result)
+
+    def transition_status(self, run_id: str, expected: Optional[str], status: str) -> bool:
+        stripe = self._stripe(run_id)
+        with stripe.lock:
+            entry = stripe.index.get(run_id)
+            if entry is None or (expected is not None and entry[1].overall_status != expected):
+                return False
+            self._store(stripe, replace(entry[1], overall_status=status))
+            ticket = self.wal.append(STATUS, (run_id, status))
+        self._logged(ticket)
+        return True
+
+    def clear(self):
+        with self._all_stripes():
+            for stripe in self._stripes:
+                self._reset(stripe)
+            ticket = self.wal.append(CLEAR, None)
+        self._logged(ticket)
+
+    @contextmanager
+    def _all_stripes(self):
+        """Hold every stripe lock, acquired in order; writers take a stripe lock before the log's."""
+        for stripe in self._stripes:
+            stripe.lock.acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(self._stripes):
+                stripe.lock.release()
+
+    def compact(self, wait: bool = False):
+        """Rewrite the log as the recovered and current runs, dropping replaced runs and status updates.
+
+        Skipped if a compaction is already under way, unless ``wait``.
+        """
+        if not self._compacting.acquire(blocking=wait):
+            return
+        try:
+            # Writers are held off for the rewrite so that no record lands between the state and the swap
+            with self._all_stripes():
+                runs = self.recovered_runs + list(CacheSnapshot(
+                    [(stripe.log, stripe.superseded, len(stripe.log)) for stripe in self._stripes]))
+                self.wal.compact(lambda: ((RUN, run) for run in runs))
+            self._records = len(runs)
+        finally:
+            self._compacting.release()
+
+    def release_recovered(self) -> List[TestRunResult]:
+        """Recovered runs are stored or uploaded elsewhere: drop them from the log and return them."""
+        released, self.recovered_runs = self.recovered_runs, []
+        if released:
+            self.compact(wait=True)
+        return released
+
+    def checkpoint(self):
+        """This session's results are safe elsewhere: empty the log (but for unreleased recovered runs), keep the cache."""
+        runs = list(self.recovered_runs)
+        self.wal.compact(lambda: ((RUN, run) for run in runs))
+        self._records = len(runs)
+
+    def close(self):
+        """Sync outstanding records and stop the group-commit thread."""
+        self.wal.sync()
+        self.wal.close()
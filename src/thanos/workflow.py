@@ -2,20 +2,54 @@
 
 import uuid
 
-from datetime import datetime
-from typing import Dict, Any, List
+from contextlib import nullcontext
+
+from typing import Dict, Any, List, Optional
 from graphlib import TopologicalSorter
+from thanos.blobs import BlobRef, BlobStore
 from thanos.stage import TestStage
 from thanos.cache import TestCache, StageResult, TestRunResult
+from thanos.clock import Clock, get_clock, use_clock
+from thanos.context import WorkflowContext, transitive_dependencies
+from thanos.environment import machine_fingerprint
+from thanos.fixtures import FixtureManager, FixtureScope, process_fixtures
+from thanos.memory import MemoryProfiler
+from thanos.telemetry import LiveMetrics
+from thanos.tracing import Tracer, NULL_TRACER, use_tracer
 from rich import print as rprint
 
 
 class WorkflowRunner:
-    def __init__(self, cache: TestCache):
+    def __init__(self, cache: TestCache, fixtures: Optional[FixtureManager] = None,
+                 clock: Optional[Clock] = None, tracer: Optional[Tracer] = None,
+                 memory_profiler: Optional[MemoryProfiler] = None, metrics: Optional[LiveMetrics] = None,
+                 blob_store: Optional[BlobStore] = None, context: Optional[WorkflowContext] = None):
         self.stages: Dict[str, TestStage] = {}
         self.dag: Dict[str, List[str]] = {}
-        self.context: Dict[str, Any] = {}
+        # A WorkflowContext gives every stage an immutable view of only the stages it depends on
+        self.context: Dict[str, Any] = context if context is not None else {}
+        self.scoped = context is not None
+        self._ancestors: Dict[str, frozenset] = {}
         self.cache = cache
+        # Every run of the suite, when ``cache`` only holds this runner's own runs (matrix combinations)
+        self.suite_cache: Optional[TestCache] = None
+        self.fixtures = fixtures
+        # Name of the testcase currently driving the runner, used for per-testcase fixtures
+        self.testcase: Optional[str] = None
+        # Clock activated while the workflow runs; a VirtualClock turns on simulation mode
+        self.clock = clock
+        # Records trace events for every workflow this runner executes; off by default
+        self.tracer = tracer or NULL_TRACER
+        # Opt-in tracemalloc/RSS measurements around every stage
+        self.memory_profiler = memory_profiler
+        # Live counters for the metrics endpoint
+        self.metrics = metrics
+        # Merged into the metadata of every run, e.g. suite, testcase and parameters
+        self.metadata: Dict[str, Any] = {}
+        # Stage results above the store's threshold are kept in run results as BlobRefs
+        self.blob_store = blob_store
+        # Handles of the current run's spilled results, by stage
+        self.spilled: Dict[str, BlobRef] = {}
 
     def add_stage(self, stage: TestStage):
         """Adds a stage to the runner and builds the dependency graph."""
@@ -35,111 +69,201 @@ class WorkflowRunner:
         """
         Executes all test stages in a topologically sorted order.
         """
+        with use_tracer(self.tracer):
+            if self.clock is None:
+                return self._execute_workflow()
+            with use_clock(self.clock):
+                return self._execute_workflow()
+
+    def _execute_workflow(self):
         # Reset context for each workflow execution
         self.context.clear()
-        
-        rprint("\n[bold cyan]🚀 === THANOS TEST FRAMEWORK ===[/bold cyan]")
-        rprint("[bold yellow]--- Starting Test Run ---[/bold yellow]\n")
+        self.spilled.clear()
+        if self.scoped:
+            self._ancestors = transitive_dependencies(self.dag)
+        tracer = self.tracer
 
+        clock = get_clock()
         run_id = str(uuid.uuid4())
-        overall_status = "PASSED"
-        test_run_result = TestRunResult(
-            run_id=run_id,
-            timestamp=datetime.now(),
-            overall_status="IN_PROGRESS"
-        )        
-        try:
-            # Use Python's built-in TopologicalSorter
-            sorter = TopologicalSorter(self.dag)
-            sorted_stages = list(sorter.static_order())
-            
-            rprint(f"[bold blue]📋 Execution order:[/bold blue] [cyan]{sorted_stages}[/cyan]")
+        with tracer.span("workflow", "workflow", run_id=run_id, testcase=self.testcase) as workflow_span:
+            with tracer.span("print", "print"):
+                rprint("\n[bold cyan]🚀 === THANOS TEST FRAMEWORK ===[/bold cyan]")
+                rprint("[bold yellow]--- Starting Test Run ---[/bold yellow]\n")
 
-            for stage_name in sorted_stages:
-                stage = self.stages[stage_name]
-                start_time = datetime.now()
-                
-                # Check for failed dependencies
-                # In a real-world scenario, you might add more sophisticated dependency checks
-                # here. For simplicity, we just check if any dependent stage failed.
-                is_dependency_failed = False
-                for dep_name in stage.dependencies:
-                    if self.stages[dep_name].status == "FAILED":
-                        rprint(f"[yellow]⚠️  Stage '{stage.name}' skipped due to failed dependency: '{dep_name}'.[/yellow]")
-                        stage.status = "SKIPPED"
-                        is_dependency_failed = True
-                        break
+            overall_status = "PASSED"
+            profiler = self.memory_profiler
+            if self.metrics is not None:
+                self.metrics.run_started(self.metadata.get("suite"))
+            memory_run = profiler.begin_run(run_id) if profiler is not None else None
+            test_run_result = TestRunResult(
+                run_id=run_id,
+                timestamp=clock.now(),
+                overall_status="IN_PROGRESS",
+                metadata={**self.metadata, "machine_fingerprint": machine_fingerprint()}
+            )        
+            try:
+                # Use Python's built-in TopologicalSorter
+                sorter = TopologicalSorter(self.dag)
+                sorted_stages = list(sorter.static_order())
                 
-                if is_dependency_failed:
-                    end_time = datetime.now()
-                    duration = (end_time - start_time).total_seconds() * 1000
-                    stage_result = StageResult(
-                        name=stage.name,
-                        status="SKIPPED",
-                        result_data=None,
-                        start_time=start_time,
-                        end_time=end_time,
-                        duration_ms=duration
-                    )
-                    test_run_result.stage_results.append(stage_result)
-                    continue
-
-                if stage.status != "SKIPPED":
-                    try:
-                        stage.run(self.context)
-                        # Store the result in the global context if needed for other stages
-                        self.context[stage.name] = stage.result
-                    except Exception:
-                        rprint(f"[bold red]❌ Test run aborted due to failure in stage: {stage.name}[/bold red]")
+                with tracer.span("print", "print"):
+                    rprint(f"[bold blue]📋 Execution order:[/bold blue] [cyan]{sorted_stages}[/cyan]")
+
+                for stage_name in sorted_stages:
+                    profiling = (profiler.profile_stage(memory_run, stage_name, self.context)
+                                 if profiler is not None else nullcontext())
+                    with tracer.span(stage_name, "stage") as stage_span, profiling:
+                        keep_going = self._execute_stage(stage_name, clock, test_run_result)
+                        stage_span.annotate(status=self.stages[stage_name].status)
+                    if not keep_going:
                         overall_status = "FAILED"
-                        # Capture the result of the failed stage
-                        stage.status = "FAILED"
-                        stage.result = self.stages[stage_name].result
-                        
-                        # Record the failed stage result
-                        end_time = datetime.now()
-                        duration = (end_time - start_time).total_seconds() * 1000
-                        stage_result = StageResult(
-                            name=stage.name,
-                            status="FAILED",
-                            result_data=stage.result,
-                            start_time=start_time,
-                            end_time=end_time,
-                            duration_ms=duration
-                        )
-                        test_run_result.stage_results.append(stage_result)
                         break
-                    
-                    # Record the result of the executed stage
-                    end_time = datetime.now()
-                    duration = (end_time - start_time).total_seconds() * 1000
-                    stage_result = StageResult(
-                        name=stage.name,
-                        status=stage.status,
-                        result_data=stage.result,
-                        start_time=start_time,
-                        end_time=end_time,
-                        duration_ms=duration
-                    )
-                    test_run_result.stage_results.append(stage_result)
                 
-                    # If the stage failed, we break the loop and prevent further execution
-                    if stage.status == "FAILED":
-                        overall_status = "FAILED"
-                        break
+            except Exception as e:
+                rprint(f"[bold red]💥 Error during test setup or execution: {e}[/bold red]")
+                overall_status = "ERROR"
+
+            if memory_run is not None:
+                profiler.end_run(memory_run, self.context)
+                test_run_result.metadata["memory"] = memory_run.summary()
+
+            # Update final status and store in cache
+            test_run_result.overall_status = overall_status
+            if self.metrics is not None:
+                self.metrics.run_completed(overall_status, self.metadata.get("suite"))
+            with tracer.span("cache.add_run_result", "cache"):
+                self.cache.add_run_result(test_run_result)
             
-        except Exception as e:
-            rprint(f"[bold red]💥 Error during test setup or execution: {e}[/bold red]")
-            overall_status = "ERROR"
+            with tracer.span("report_summary", "print"):
+                rprint("\n[bold green]🎉 --- Test Run Complete ---[/bold green]")
+                self._report_summary()
+            workflow_span.annotate(status=overall_status)
+        return run_id
 
-        # Update final status and store in cache
-        test_run_result.overall_status = overall_status
-        self.cache.add_run_result(test_run_result)
+    def _execute_stage(self, stage_name: str, clock: Clock, test_run_result: TestRunResult) -> bool:
+        """Runs one stage and records its StageResult; returns False if the workflow must stop."""
+        stage = self.stages[stage_name]
+        start_time = clock.now()
         
-        rprint("\n[bold green]🎉 --- Test Run Complete ---[/bold green]")
-        self._report_summary()
-        return run_id
+        # Check for failed dependencies
+        # In a real-world scenario, you might add more sophisticated dependency checks
+        # here. For simplicity, we just check if any dependent stage failed.
+        is_dependency_failed = False
+        with self.tracer.span("dependencies", "dependency", dependencies=stage.dependencies):
+            for dep_name in stage.dependencies:
+                if self.stages[dep_name].status == "FAILED":
+                    rprint(f"[yellow]⚠️  Stage '{stage.name}' skipped due to failed dependency: '{dep_name}'.[/yellow]")
+                    stage.status = "SKIPPED"
+                    is_dependency_failed = True
+                    break
+        
+        if is_dependency_failed:
+            end_time = clock.now()
+            duration = (end_time - start_time).total_seconds() * 1000
+            stage_result = StageResult(
+                name=stage.name,
+                status="SKIPPED",
+                result_data=None,
+                start_time=start_time,
+                end_time=end_time,
+                duration_ms=duration
+            )
+            self._record_stage_result(test_run_result, stage_result, executed=False)
+            return True
+
+        if stage.status == "SKIPPED":
+            return True
+
+        if self.metrics is not None:
+            self.metrics.stage_started()
+        try:
+            self._run_stage(stage)
+            # Store the result in the global context if needed for other stages
+            self.context[stage.name] = stage.result
+        except Exception:
+            rprint(f"[bold red]❌ Test run aborted due to failure in stage: {stage.name}[/bold red]")
+            # Capture the result of the failed stage
+            stage.status = "FAILED"
+            
+            # Record the failed stage result
+            end_time = clock.now()
+            duration = (end_time - start_time).total_seconds() * 1000
+            stage_result = StageResult(
+                name=stage.name,
+                status="FAILED",
+                result_data=stage.result,
+                start_time=start_time,
+                end_time=end_time,
+                duration_ms=duration
+            )
+            self._record_stage_result(test_run_result, stage_result)
+            return False
+        
+        # Record the result of the executed stage
+        end_time = clock.now()
+        duration = (end_time - start_time).total_seconds() * 1000
+        stage_result = StageResult(
+            name=stage.name,
+            status=stage.status,
+            result_data=self._spill(stage.name, stage.result),
+            start_time=start_time,
+            end_time=end_time,
+            duration_ms=duration
+        )
+        self._record_stage_result(test_run_result, stage_result)
     
+        # If the stage failed, we stop and prevent further execution
+        return stage.status != "FAILED"
+
+    def _spill(self, stage_name: str, result: Any) -> Any:
+        """The result to keep in the run: a BlobRef if it is large and a blob store is configured."""
+        if self.blob_store is None:
+            return result
+        with self.tracer.span("blob.spill", "cache"):
+            kept = self.blob_store.spill(result)
+        if isinstance(kept, BlobRef):
+            self.spilled[stage_name] = kept
+        return kept
+
+    def _record_stage_result(self, test_run_result: TestRunResult, stage_result: StageResult,
+                             executed: bool = True):
+        test_run_result.stage_results.append(stage_result)
+        if self.metrics is not None:
+            self.metrics.stage_finished(stage_result.name, stage_result.status, stage_result.duration_ms,
+                                        self.metadata.get("suite"), executed)
+
+
+    def _stage_context(self, stage: TestStage):
+        """The context a stage runs with: a scoped snapshot when scoping is on."""
+        if not self.scoped:
+            return self.context
+        return self.context.view_for(stage.name, self._ancestors.get(stage.name, ()))
+
+    def _run_stage(self, stage: TestStage):
+        """Runs a stage, or reuses its result if it is a fixture computed earlier in its scope."""
+        store = None
+        if self.fixtures is not None:
+            store = self.fixtures.store_for(stage.scope, self.testcase)
+        elif stage.scope == FixtureScope.PER_PROCESS:
+            # Process fixtures do not need a suite-level manager
+            store = process_fixtures()
+
+        context = self._stage_context(stage)
+        if store is None:
+            stage.run(context)
+            return
+
+        def compute():
+            stage.run(context)
+            return stage.result
+
+        with self.tracer.span("fixture", "fixture", scope=stage.scope) as span:
+            value, created = store.get_or_create(stage.fixture_key(), compute, stage.teardown)
+            span.annotate(reused=not created)
+        if not created:
+            stage.result = value
+            stage.status = "PASSED"
+            rprint(f"[bold blue]♻️  Reusing {stage.scope} fixture:[/bold blue] [bold cyan]{stage.name}[/bold cyan]")
 
     def _report_summary(self):
         """Prints a summary of the test results."""
@@ -155,13 +279,15 @@ class WorkflowRunner:
 
     def update_run_status(self, run_id: str, status: str):
         """Updates the overall status of a test run in the cache."""
-        run_result = self.cache.get_run_result(run_id)
-        if run_result:
-            run_result.overall_status = status
+        if self.cache.update_status(run_id, status):
             rprint(f"[yellow]⚠️  Updated run {run_id} status to: {status}[/yellow]")
     
     def upload_to_db(self):
         """Simulates uploading all cached results to a database."""
+        with self.tracer.span("upload_to_db", "upload"):
+            self._upload_results()
+
+    def _upload_results(self):
         print("\n--- Uploading Results to DB ---")
         cached_results = self.cache.get_all_results()
         if not cached_results:
@@ -169,15 +295,16 @@ class WorkflowRunner:
             return
 
         for run_result in cached_results:
-            # Here, you would implement the actual database interaction code
-            # e.g., using SQLAlchemy, Django ORM, or a simple `requests` call
-            # to a backend API.
-            print(f"  Uploading run_id: {run_result.run_id} (Status: {run_result.overall_status})")
-            
-            # For demonstration, we'll just print the data
-            # print(f"    Data: {run_result}")
-            # Simulate a successful upload
-            print("  ...Upload successful.")
+            with self.tracer.span("upload", "upload", run_id=run_result.run_id):
+                # Here, you would implement the actual database interaction code
+                # e.g., using SQLAlchemy, Django ORM, or a simple `requests` call
+                # to a backend API.
+                print(f"  Uploading run_id: {run_result.run_id} (Status: {run_result.overall_status})")
+                
+                # For demonstration, we'll just print the data
+                # print(f"    Data: {run_result}")
+                # Simulate a successful upload
+                print("  ...Upload successful.")
 
         print("--- Upload Complete ---")
         # Optional: Clear the cache after a successful upload